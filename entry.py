@@ -1,12 +1,21 @@
+from argparse import ArgumentParser
 from sys import exit
 
 import pygame as pg
 
 from src.window import pygame_window
 from src.utils import const
+from src.exceptions import CommandException
 from src.main.app import App
 
-app = App()
+parser = ArgumentParser(description="Visualize segment trees.")
+parser.add_argument("--load", metavar="PATH", help="memory-map the initial array from a .npy file or a raw file of little-endian int64 values")
+args = parser.parse_args()
+
+try:
+    app = App(args.load)
+except CommandException as e:
+    parser.error(str(e))
 focus_gained: bool = True
 
 while True:
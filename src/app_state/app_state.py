@@ -1,4 +1,6 @@
-from src.utils import VisibilityEnum
+from typing import Optional
+
+from src.utils import VisibilityEnum, map_array
 from src.app_state.states import ThemeManager, TreeManager, CMDLineInterface, Rendering
 
 class AppState:
@@ -13,9 +15,9 @@ class AppState:
     to modify, read, and write to change how the application behaves.
     """
 
-    def __init__(self):
+    def __init__(self, array_path: Optional[str] = None):
         self.theme_manager = ThemeManager()
-        self.tree_manager = TreeManager([1, 3, -2, 8, -7])
+        self.tree_manager = TreeManager(map_array(array_path) if array_path else [1, 3, -2, 8, -7])
         self.cmdline_interface = CMDLineInterface()
         self.rendering = Rendering()
 
@@ -1,6 +1,5 @@
-from typing import Optional, Any
-from collections import deque
-from math import atan2, cos, degrees, radians, sin
+from typing import Optional, Any, TYPE_CHECKING
+from math import atan2, cos, degrees, inf, radians, sin
 
 import cv2, numpy
 import pygame as pg
@@ -10,6 +9,10 @@ from src.window import pygame_window
 from src.utils import VisibilityEnum, CommandRequestFields, const
 from src.dataclass import Theme, Node
 
+if TYPE_CHECKING:
+    from src.segment_tree import SegmentTree
+    from src.app_state.states.tree_manager import TreeManager
+
 class Rendering:
     """
     Handles the rendering of the user interface for the application.
@@ -93,7 +96,10 @@ class Rendering:
         ID_rect_bounding_box_bottom = self._view_ID(x, y, hovered_node)
 
         y = ID_rect_bounding_box_bottom + const.LINE_SPACING
-        self._view_lazy_value(x, y, hovered_node)
+        lazy_rect_bounding_box_bottom = self._view_lazy_value(x, y, hovered_node)
+
+        y = lazy_rect_bounding_box_bottom + const.LINE_SPACING
+        self._view_beats_fields(x, y, hovered_node)
 
     def view_array(self, array: list[int], hovered_node: Optional[Node]):
         """
@@ -129,61 +135,60 @@ class Rendering:
                 x = const.X_OFFSET
                 y = rect.bottom + const.LINE_SPACING
 
-    def draw_tree(self, root: Node) -> Optional[Node]:
-        """Draws the tree structure starting from the specified root node.
+                # Elements past the bottom of the window can't be seen, which
+                # also keeps the virtual array of a sparse tree from being walked.
+                if y >= pygame_window.window_height:
+                    break
+
+    def draw_tree(self, tree_manager: 'TreeManager', hovered_node: Optional[Node]):
+        """Draws the tree managed by the tree manager, as seen through its camera.
 
         This method visually represents the nodes and their connections,
         highlighting the hovered node and displaying data if visibility settings
-        allow it. It traverses the tree and renders each node, returning the
-        currently hovered node if applicable.
+        allow it. Only the nodes and edges within the window are drawn, found in
+        the tree manager's spatial index, so the cost of a frame depends on what is
+        visible rather than on the size of the tree. Their screen coordinates are
+        mapped from their world coordinates with a single vectorized transform.
+        The edges are drawn first, then the nodes in breadth-first order.
+
+        Args:
+            tree_manager (TreeManager): The tree manager holding the tree and the camera.
+            hovered_node (Optional[Node]): The node currently being hovered over, or
+            None if no node is hovered.
         """
 
         theme = self.current_theme
         node_outline_clr = theme.NODE_OUTLINE_CLR
         display_data_clr = theme.NODE_DISPLAY_DATA_CLR
 
-        hovered_node = None
+        tree = tree_manager.segment_tree.root.tree
+        nodes, edges = tree_manager.visible_nodes(const.VIEWPORT_MARGIN)
+        indices = numpy.concatenate((nodes, edges, tree_manager.world_parents[edges]))
 
-        mouse_pos = pg.mouse.get_pos()
-        hit_box = pg.Rect((0, 0), (const.NODE_CIRCLE_RADIUS+25, const.NODE_CIRCLE_RADIUS+25))
+        screen_x, screen_y = tree_manager.camera.to_screen_many(tree_manager.world_x[indices], tree_manager.world_y[indices])
+        positions: dict[int, tuple[int, int]] = dict(zip(tree_manager.world_IDs[indices].tolist(), zip(screen_x.tolist(), screen_y.tolist())))
 
-        queue: deque[Node] = deque([root])
+        IDs = tree_manager.world_IDs[nodes].tolist()
+        self._draw_lines(tree_manager.world_IDs[edges].tolist(), positions)
 
-        while queue:
-            node = queue.popleft()
-            hit_box.center = node.coordinates
+        for ID in IDs:
+            node = Node(tree, ID)
+            position = positions[ID]
 
-            if hit_box.collidepoint(mouse_pos):
-                hovered_node = node
+            if node == hovered_node or self.should_highlight_range(node):
                 node_outline_clr = theme.NODE_OUTLINE_HIGHLIGHT_CLR
                 display_data_clr = theme.NODE_DISPLAY_DATA_HIGHLIGHT_CLR
-                lazy_line_clr = theme.NODE_LAZY_LINE_HIGHLIGHT_CLR
-                lazy_data_clr = theme.NODE_LAZY_DATA_HIGHLIGHT_CLR
-            elif self.should_highlight_range(node):
-                node_outline_clr = theme.NODE_OUTLINE_HIGHLIGHT_CLR
-                display_data_clr = theme.NODE_DISPLAY_DATA_HIGHLIGHT_CLR
-                lazy_line_clr = theme.NODE_LAZY_LINE_HIGHLIGHT_CLR
-                lazy_data_clr = theme.NODE_LAZY_DATA_HIGHLIGHT_CLR
             else:
                 node_outline_clr = theme.NODE_OUTLINE_CLR
                 display_data_clr = theme.NODE_DISPLAY_DATA_CLR
-                lazy_line_clr = theme.NODE_LAZY_LINE_CLR
-                lazy_data_clr = theme.NODE_LAZY_DATA_CLR
 
-            self._draw_lines(node)
-            self._draw_AA_circle(node, node_outline_clr)
+            self._draw_AA_circle(position, node_outline_clr)
 
             if self.visibility_dict[VisibilityEnum.NODE_DATA_FIELD]:
-                self._draw_node_data(node, display_data_clr)
-                self._draw_lazy_value_per_node(node, lazy_line_clr, lazy_data_clr)
-
-            if node.is_leaf():
-                continue
+                self._draw_node_data(node, position, display_data_clr)
 
-            for child in node.children:
-                queue.append(child)
-
-        return hovered_node
+        if self.visibility_dict[VisibilityEnum.NODE_DATA_FIELD]:
+            self._draw_lazy_values(tree, IDs, positions, hovered_node)
 
     def should_highlight_range(self, node: Node):
         """Determines if the specified node falls within the highlight range.
@@ -266,7 +271,7 @@ class Rendering:
         
         return ID_rect.bottom
     
-    def _view_lazy_value(self, x: int, y: int, hovered_node: Node):
+    def _view_lazy_value(self, x: int, y: int, hovered_node: Node) -> int:
         """Displays the lazy value information for a hovered node.
 
         This function renders the label "Lazy:" and the corresponding lazy value of the hovered node at the specified 
@@ -276,12 +281,15 @@ class Rendering:
             x (int): The x-coordinate on the screen where the lazy value information will be displayed.
             y (int): The y-coordinate on the screen where the lazy value information will be displayed.
             hovered_node (Node): The node whose lazy value is being displayed.
+
+        Returns:
+            int: The bottom coordinate of the rendered lazy value display.
         """
 
         theme = self.current_theme
 
         lazy_text, lazy_rect = self.render_text(self.tree_properties_font, "Lazy: ", theme.NODE_INFO_TEXT_CLR)
-        lazy_dat_text, lazy_dat_rect = self.render_text(self.tree_properties_font, f"{hovered_node.lazy_data}", theme.NODE_INFO_DATA_CLR)
+        lazy_dat_text, lazy_dat_rect = self.render_text(self.tree_properties_font, hovered_node.tag_label or "0", theme.NODE_INFO_DATA_CLR)
 
         lazy_dat_rect.topright = (x, y)
         lazy_rect.midright = lazy_dat_rect.midleft
@@ -289,84 +297,149 @@ class Rendering:
         pygame_window.screen.blit(lazy_text, lazy_rect)
         pygame_window.screen.blit(lazy_dat_text, lazy_dat_rect)
 
-    def _draw_AA_circle(self, node: Node, outline_clr: pg.Color):
+        return lazy_rect.bottom
+
+    def _view_beats_fields(self, x: int, y: int, hovered_node: Node):
+        """Displays the fields the segment tree beats keeps for a hovered node, if the beats engine is in use.
+
+        Each of the largest and smallest values is shown with its number of occurrences,
+        followed by the second largest or smallest value, "-" when the segment has a single
+        distinct value.
+
+        Args:
+            x (int): The x-coordinate on the screen where the fields will be displayed.
+            y (int): The y-coordinate on the screen where the first field will be displayed.
+            hovered_node (Node): The node whose fields are being displayed.
+        """
+
+        fields = hovered_node.tree.beats_fields(hovered_node.ID)
+        if fields is None:
+            return
+
+        theme = self.current_theme
+
+        labels = {name: "-" if abs(val) == inf else f"{val}" for name, val in fields.items()}
+
+        rows = [("Max: ", f"{labels['max']} x{labels['max count']}"),
+                ("2nd max: ", labels["second max"]),
+                ("Min: ", f"{labels['min']} x{labels['min count']}"),
+                ("2nd min: ", labels["second min"])]
+
+        for field_label, field_data in rows:
+            field_text, field_rect = self.render_text(self.tree_properties_font, field_label, theme.NODE_INFO_TEXT_CLR)
+            field_dat_text, field_dat_rect = self.render_text(self.tree_properties_font, field_data, theme.NODE_INFO_DATA_CLR)
+
+            field_dat_rect.topright = (x, y)
+            field_rect.midright = field_dat_rect.midleft
+
+            pygame_window.screen.blit(field_text, field_rect)
+            pygame_window.screen.blit(field_dat_text, field_dat_rect)
+
+            y = field_rect.bottom + const.LINE_SPACING
+
+    def _draw_AA_circle(self, position: tuple[int, int], outline_clr: pg.Color):
         """Draws an anti-aliased circle on the screen.
 
-        This function renders a filled circle and an outlined circle at the specified node's coordinates. 
+        This function renders a filled circle and an outlined circle at the specified node's screen coordinates. 
         It utilizes the current theme's filling color for the inner circle and the provided outline color for the outer circle.
 
         Args:
-            node (Node): The node containing the coordinates where the circle will be drawn.
+            position (tuple[int, int]): The screen coordinates of the node where the circle will be drawn.
             outline_clr (pg.Color): The color of the circle's outline.
         """
 
         radius = const.NODE_CIRCLE_RADIUS
         width = const.CIRCLE_OUTLINE_THICKNESS
-        pg.draw.circle(pygame_window.screen, self.current_theme.NODE_FILLINGS_CLR, node.coordinates, const.NODE_CIRCLE_RADIUS-const.LINE_THICKNESS)
+        pg.draw.circle(pygame_window.screen, self.current_theme.NODE_FILLINGS_CLR, position, const.NODE_CIRCLE_RADIUS-const.LINE_THICKNESS)
 
         circle_image = numpy.zeros((const.NODE_CIRCLE_RADIUS*2+4, radius*2+4, 4), dtype = numpy.uint8)
         circle_image = cv2.circle(circle_image, (radius+2, radius+2), radius-width, (outline_clr.r, outline_clr.g, outline_clr.b, 255), width, lineType=cv2.LINE_AA)  
         circle_surface = pg.image.frombuffer(circle_image.flatten(), (radius*2+4, radius*2+4), 'RGBA')
-        pygame_window.screen.blit(circle_surface, circle_surface.get_rect(center=node.coordinates))
+        pygame_window.screen.blit(circle_surface, circle_surface.get_rect(center=position))
 
-    def _draw_lines(self, node: Node):
+    def _draw_lines(self, IDs: list[int], positions: dict[int, tuple[int, int]]):
         """
-        Draws lines connecting the specified node to its children in the user interface.
+        Draws lines connecting the specified nodes to their parents in the user interface.
         This method visually represents the relationships between nodes in the tree 
         structure, enhancing the overall clarity of the tree's layout.
 
         Args:
-            node (Node): The node for which the connecting lines to its children will be drawn.
+            IDs (list[int]): The IDs of the nodes whose line to their parent will be drawn.
+            positions (dict[int, tuple[int, int]]): The screen coordinates of the nodes
+            and of their parents, by ID.
         """
 
         theme = self.current_theme
 
-        if node.is_leaf():
-            return
+        for ID in IDs:
+            self._draw_antialiased_thick_line(
+                positions[ID >> 1],
+                positions[ID],
+                theme.LINE_CLR,
+                const.LINE_THICKNESS
+            )
+
+    def _draw_lazy_values(self, tree: 'SegmentTree', IDs: list[int], positions: dict[int, tuple[int, int]], hovered_node: Optional[Node]):
+        """Draws the lazy value of every visible node holding one.
+
+        Only the visible nodes are looked up in the tree's index of tagged nodes,
+        so tags far off screen cost nothing. The values are drawn after the nodes,
+        on top of them.
+
+        Args:
+            tree (SegmentTree): The tree being drawn.
+            IDs (list[int]): The IDs of the visible nodes.
+            positions (dict[int, tuple[int, int]]): The screen coordinates of the nodes, by ID.
+            hovered_node (Optional[Node]): The node currently being hovered over, or
+            None if no node is hovered.
+        """
+
+        theme = self.current_theme
+
+        tagged_nodes = tree.tagged_nodes
+
+        for ID in IDs:
+            if ID not in tagged_nodes:
+                continue
+
+            node = Node(tree, ID)
+
+            if node == hovered_node or self.should_highlight_range(node):
+                self._draw_lazy_value_per_node(node, positions[ID], theme.NODE_LAZY_LINE_HIGHLIGHT_CLR, theme.NODE_LAZY_DATA_HIGHLIGHT_CLR)
+            else:
+                self._draw_lazy_value_per_node(node, positions[ID], theme.NODE_LAZY_LINE_CLR, theme.NODE_LAZY_DATA_CLR)
 
-        self._draw_antialiased_thick_line(
-            node.coordinates,
-            node.left.coordinates,
-            theme.LINE_CLR,
-            const.LINE_THICKNESS
-        )
-
-        self._draw_antialiased_thick_line(
-            node.coordinates,
-            node.right.coordinates,
-            theme.LINE_CLR,
-            const.LINE_THICKNESS
-        )
-
-    def _draw_lazy_value_per_node(self, node: Node, line_color: pg.Color, data_color: pg.Color):
+    def _draw_lazy_value_per_node(self, node: Node, position: tuple[int, int], line_color: pg.Color, data_color: pg.Color):
         """Draws the lazy value associated with a node.
 
-        This function checks if the node has a lazy value and, if so, renders the corresponding text and a line 
-        indicating the lazy value's position relative to the node. The line's color and the text's color can be customized.
+        This function renders the text of the node's pending tag and a line indicating
+        the lazy value's position relative to the node. The line's color and the text's
+        color can be customized.
 
         Args:
-            node (Node): The node for which the lazy value is being drawn.
+            node (Node): The node holding a pending tag.
+            position (tuple[int, int]): The screen coordinates of the node.
             line_color (pg.Color): The color of the line indicating the lazy value.
             data_color (pg.Color): The color of the text displaying the lazy value.
         """
 
-        if node.lazy_data == 0: return
+        lazy_text, lazy_rect = self.render_text(self.node_data_font, node.tag_label, data_color)
 
-        lazy_text, lazy_rect = self.render_text(self.node_data_font, f"{node.lazy_data}", data_color)
+        x, y = position
 
-        beginning_coords = node.x + const.LAZY_LINE_OFFSET, node.y - const.LAZY_LINE_OFFSET
+        beginning_coords = x + const.LAZY_LINE_OFFSET, y - const.LAZY_LINE_OFFSET
         destined_coords = beginning_coords[0] + const.LAZY_LINE_LENGTH, beginning_coords[1] - const.LAZY_LINE_LENGTH
         lazy_rect.bottomleft = destined_coords
 
         if node.is_left_node():
-            beginning_coords = node.x - const.LAZY_LINE_OFFSET, node.y - const.LAZY_LINE_OFFSET
+            beginning_coords = x - const.LAZY_LINE_OFFSET, y - const.LAZY_LINE_OFFSET
             destined_coords = beginning_coords[0] - const.LAZY_LINE_LENGTH, beginning_coords[1] - const.LAZY_LINE_LENGTH
             lazy_rect.bottomright = destined_coords
 
         self._draw_antialiased_thick_line(beginning_coords, destined_coords, line_color, const.LAZY_LINE_THICKNESS)
         pygame_window.screen.blit(lazy_text, lazy_rect)
 
-    def _draw_node_data(self, node: Node, display_data_clr: pg.Color):
+    def _draw_node_data(self, node: Node, position: tuple[int, int], display_data_clr: pg.Color):
         """
         Displays the data value of the specified node in the user interface. This method
         renders the node's data at the node's coordinates using the specified color, 
@@ -374,13 +447,36 @@ class Rendering:
 
         Args:
             node (Node): The node whose data value will be displayed.
+            position (tuple[int, int]): The screen coordinates of the node.
             display_data_clr (pg.Color): The color used for rendering the node's data.
         """
 
-        node_display_data, node_display_data_rect = self.render_text(self.node_data_font, f"{node.data}", display_data_clr)
-        node_display_data_rect.center = node.coordinates
+        node_display_data, node_display_data_rect = self.render_text(self.node_data_font, self._format_node_data(node.data), display_data_clr)
+        node_display_data_rect.center = position
         pygame_window.screen.blit(node_display_data, node_display_data_rect)
 
+    @staticmethod
+    def _format_node_data(data: int) -> str:
+        """
+        Formats a node's value to fit in its circle: values with more than
+        `MAX_NODE_DATA_DIGITS` digits are shown in scientific notation.
+
+        Args:
+            data (int): The node's value.
+
+        Returns:
+            str: The text to draw.
+        """
+
+        text = f"{data}"
+        digits = text.lstrip("-")
+
+        if len(digits) <= const.MAX_NODE_DATA_DIGITS:
+            return text
+
+        sign = "-" if data < 0 else ""
+        return f"{sign}{digits[0]}.{digits[1:3]}e{len(digits)-1}"
+
     def _draw_antialiased_thick_line(self, point_start: tuple[int, int], point_end: tuple[int, int], line_color: pg.Color, line_thickness: float):
         """
         Draw an antialiased polygon that resembles a line.
@@ -1,10 +1,18 @@
-from collections import deque
+from array import array
+from collections import OrderedDict
+from time import perf_counter
+from typing import Optional
+
+import numpy
 
 from src.window import pygame_window
-from src.utils import const, ContourEnum
-from src.dataclass import Node, QueryFunction
+from src.utils import const, ContourEnum, map_array, shutdown_build_pool, verify_query_function
+from src.dataclass import QueryFunction, SubtreeLayout, Camera, Node
+from src.dataclass.subtree_layout import ContourNode
+from src.exceptions import CommandException
 from src.segment_tree import SegmentTree
-from src.exports.query_functions import exported_core_query_functions
+from src.dynamic_segment_tree import DynamicSegmentTree
+from src.exports.query_functions import exported_core_query_functions, exported_modular_query_functions, modular_query_functions
 
 class TreeManager:
     """
@@ -14,50 +22,206 @@ class TreeManager:
     for rendering.
     """
 
-    def __init__(self, data: list[int]):
+    def __init__(self, data: list[int] | numpy.ndarray):
         """Initializes the TreeManager with the provided data.
 
         This constructor sets up the available query functions,
         initializes the current function to "add_f", and creates
-        a segment tree using the provided data. It also sets the
-        initial zoom level for the tree visualization.
+        a segment tree using the provided data. It also sets up the
+        camera the tree is viewed through.
 
         Args:
-            data (list[int]): The list of integers to be used as
+            data (list[int] | numpy.ndarray): The integers to be used as
             the initial data for the segment tree.
         """
 
         self.available_functions: dict[str, QueryFunction] = {}
         self.load_functions(exported_core_query_functions)
+        self.load_functions(exported_modular_query_functions)
+        self.modulus: int = const.DEFAULT_MODULUS
+        self._subtree_layouts: dict[int, SubtreeLayout] = {}
+        self._layout_cache: OrderedDict[int, tuple[array, array]] = OrderedDict()
+        self._layout_cache_bytes: int = 0
+        self.build_workers: int = 1
 
         self.current_function: QueryFunction = self.available_functions["add_f"]
-        self.segment_tree = SegmentTree(data, self.current_function)
-        self.zoom_level: float = 1.0
+        self.segment_tree = SegmentTree(data, self.current_function, self.build_workers)
+        self.camera = Camera()
+        self.world_IDs = numpy.zeros(0, dtype=numpy.int64)
+        self.world_x = numpy.zeros(0, dtype=numpy.int64)
+        self.world_y = numpy.zeros(0, dtype=numpy.int64)
+        self.world_parents = numpy.zeros(0, dtype=numpy.int64)
+        self.world_edge_low = numpy.zeros(0, dtype=numpy.int64)
+        self.world_edge_high = numpy.zeros(0, dtype=numpy.int64)
+        self.world_depth_starts: list[int] = [0]
+        self._hover_key: Optional[tuple] = None
+        self._hovered_ID: Optional[int] = None
+
+    @property
+    def is_sparse(self) -> bool:
+        return isinstance(self.segment_tree, DynamicSegmentTree)
+
+    def use_sparse_tree(self, length: int, default: int):
+        """Replace the segment tree with a sparse one over a virtual array.
+
+        Args:
+            length (int): The length of the virtual array.
+            default (int): The value of every element of the virtual array.
+        """
+
+        traversal = self.segment_tree.traversal
+        shutdown_build_pool()
+        self.segment_tree = DynamicSegmentTree(length, default, self.current_function)
+        self.segment_tree.traversal = traversal
+        self.generate_node_position()
+        self.center_tree()
+
+    def use_dense_tree(self, data: list[int] | numpy.ndarray):
+        """Replace the segment tree with a regular one built over the given array.
+
+        The workers kept by a parallel build of the previous array are stopped
+        first, so they don't hold on to its memory.
+
+        Args:
+            data (list[int] | numpy.ndarray): The array of the new segment tree.
+        """
+
+        traversal = self.segment_tree.traversal
+        shutdown_build_pool()
+        self.segment_tree = SegmentTree(data, self.current_function, self.build_workers)
+        self.segment_tree.traversal = traversal
+        self.generate_node_position()
+        self.center_tree()
+
+    def load_array(self, path: str):
+        """Replace the segment tree with one built over an array mapped from a file.
+
+        Args:
+            path (str): The path of a `.npy` file or of a raw file of little-endian int64 values.
+
+        Raises:
+            CommandException: If the file can't be mapped as an array of integers.
+        """
+
+        self.use_dense_tree(map_array(path))
+
+    def refresh_layout(self):
+        """Recompute the layout if an update created or dropped nodes.
+
+        A regular segment tree changes shape when the length of its array changes,
+        a sparse one whenever an update splits or merges nodes. The app calls this
+        before drawing every frame, so any number of updates between two frames only
+        lay the tree out once, and a tree whose nodes the sequence engine left stale
+        is only rebuilt then.
+        """
+
+        if not self.segment_tree.layout_outdated:
+            return
+
+        self.generate_node_position()
+        self.center_tree()
 
     def generate_node_position(self):
         """Generate the position of nodes in a tree structure.
 
-        This function computes the preliminary x-coordinates for each node starting
-        from the root and then calculates the final coordinates based on those 
-        preliminary values. It ensures that the nodes are positioned correctly for
-        rendering in a visual representation of the tree.
+        A regular segment tree's shape only depends on the length of its array, so
+        its layout is computed in closed form by `_compute_regular_layout`, and the
+        coordinates of the most recently used lengths are kept in a cache bounded by
+        `LAYOUT_CACHE_MAX_BYTES`; laying out a tree of a cached length only looks its
+        coordinates up, without allocating any layout array. The nodes of a sparse
+        segment tree are positioned one by one from the leaves up instead, then the
+        final coordinates are calculated from the preliminary values. Both run in
+        linear time.
         """
 
-        self._compute_prelim_x(self.segment_tree.root)
-        self._compute_final_coordinates(self.segment_tree.root, 0)
-        self.compute_transformed_coordinates()
+        segment_tree = self.segment_tree
+        length = segment_tree.array_length
+
+        self.camera.x_offset = 0
+        self.camera.y_offset = 0
+        segment_tree.materialize()
+        segment_tree.layout_outdated = False
+
+        if length == 0:
+            segment_tree.allocate_layout()
+            self._collect_world_coordinates()
+            return
+
+        if self.is_sparse:
+            segment_tree.allocate_layout()
+            self._compute_prelim_x(1)
+            self._compute_final_coordinates(1, 0)
+        elif length in self._layout_cache:
+            self._layout_cache.move_to_end(length)
+            segment_tree.original_x, segment_tree.original_y = self._layout_cache[length]
+        else:
+            segment_tree.allocate_layout()
+            self._compute_regular_layout()
+            self._cache_layout(length, segment_tree.original_x, segment_tree.original_y)
+
+        self._collect_world_coordinates()
+
+    def benchmark_layout(self, lengths: list[int]) -> list[tuple[int, float, float]]:
+        """Time the two ways of laying out a regular segment tree on arrays of the given lengths.
+
+        Each length gets a throwaway tree, which replaces the current one while it is
+        laid out. The current tree and its layout are left as they are.
+
+        Args:
+            lengths (list[int]): The lengths of the arrays to lay out.
+
+        Returns:
+            list[tuple[int, float, float]]: For each length, the seconds taken by the
+            closed form and by positioning the nodes one by one.
+        """
+
+        current_tree = self.segment_tree
+        timings: list[tuple[int, float, float]] = []
+
+        try:
+            for length in lengths:
+                self.segment_tree = SegmentTree(numpy.zeros(length, dtype=numpy.int64), self.current_function, self.build_workers)
+
+                self.segment_tree.allocate_layout()
+                start = perf_counter()
+                self._compute_regular_layout()
+                closed_form = perf_counter() - start
+
+                self.segment_tree.allocate_layout()
+                start = perf_counter()
+                self._compute_prelim_x(1)
+                self._compute_final_coordinates(1, 0)
+                node_by_node = perf_counter() - start
+
+                timings.append((length, closed_form, node_by_node))
+        finally:
+            self.segment_tree = current_tree
+
+        return timings
 
     def center_tree(self):
         """Centers the segment tree in the window.
 
         This method calculates the horizontal offset needed to position the
-        segment tree's root at the center of the window. It then moves the
-        tree accordingly and updates the transformed coordinates for rendering.
+        segment tree's root at the center of the window and moves the camera
+        accordingly.
+        """
+
+        x, _ = self.camera.to_screen(self.segment_tree.original_x[1], self.segment_tree.original_y[1])
+        self.camera.move(pygame_window.half_window_width - x, 0)
+
+    def focus_node(self, ID: int):
+        """Moves the tree so that the node with the given ID is at the center of the window.
+
+        The node is looked up directly by its ID in the tree's coordinate arrays,
+        no traversal is needed to find it.
+
+        Args:
+            ID (int): The ID of the node to move into view.
         """
 
-        delta_x = pygame_window.half_window_width - self.segment_tree.root.x
-        self.move_tree_by_delta_pos(delta_x, 0)
-        self.compute_transformed_coordinates()
+        x, y = self.camera.to_screen(self.segment_tree.original_x[ID], self.segment_tree.original_y[ID])
+        self.camera.move(pygame_window.half_window_width - x, pygame_window.half_window_height - y)
 
     def switch_function(self, name: str):
         """Switches the current query function to the specified function name.
@@ -76,11 +240,85 @@ class TreeManager:
         except KeyError:
             print(f"QueryFunction named <{name}> doesn't exist!")
 
+    def set_modulus(self, modulus: int):
+        """Replace the modular query functions with ones computing modulo another modulus.
+
+        If the current function is one of them, the segment tree switches to its
+        version for the new modulus and is rebuilt.
+
+        Args:
+            modulus (int): The new modulus.
+
+        Raises:
+            CommandException: If the modulus is less than 2.
+        """
+
+        if modulus < 2:
+            raise CommandException(f"The modulus must be at least 2, got {modulus}!")
+
+        functions = modular_query_functions(modulus)
+        for function in functions:
+            self.available_functions.pop(function.name, None)
+
+        self.load_functions(functions)
+        self.modulus = modulus
+
+        if any(function.name == self.current_function.name for function in functions):
+            self.switch_function(self.current_function.name)
+            self.segment_tree.rebuild()
+
+    def set_build_workers(self, workers: int):
+        """Set how many processes build the segment tree over large arrays.
+
+        Trees are built in this process unless this is set to more than 1. The
+        sparse tree never builds its nodes up front, so it ignores the setting
+        until a regular tree replaces it. Workers kept from an earlier build are
+        stopped, the next parallel build forking as many as set.
+
+        Args:
+            workers (int): The number of processes, 1 to always build in this process.
+
+        Raises:
+            CommandException: If the number of processes is less than 1.
+        """
+
+        if workers < 1:
+            raise CommandException(f"At least 1 build worker is needed, got {workers}!")
+
+        self.build_workers = workers
+        shutdown_build_pool()
+
+        if not self.is_sparse:
+            self.segment_tree.build_workers = workers
+
+    def checkout_version(self, index: int):
+        """Restore the segment tree to one of its saved versions.
+
+        The current query function follows the version's, and the layout is only
+        updated if the version's array has a different length.
+
+        Args:
+            index (int): The index of the version in the tree's history.
+
+        Raises:
+            CommandException: If persistence is off or the version doesn't exist.
+        """
+
+        previous_length = self.segment_tree.array_length
+        self.segment_tree.checkout(index)
+        self.current_function = self.segment_tree.versions[index].function
+
+        if self.segment_tree.array_length != previous_length:
+            self.generate_node_position()
+            self.center_tree()
+
     def load_functions(self, exported_functions: list[QueryFunction]):
         """
         Loads a list of query functions into the available functions dictionary. If a 
         function already exists, it skips adding it and prints a message indicating
-        the function was skipped.
+        the function was skipped. The algebraic properties each function declares are
+        checked by `verify_query_function`, those that don't hold are dropped with a
+        message, so no engine relies on them.
 
         Args:
             exported_functions (list[QueryFunction]): A list of QueryFunction objects to be loaded.
@@ -91,191 +329,524 @@ class TreeManager:
                 print(f"QueryFunction <{function.name}> already existed! Skipping...")
                 continue
 
+            failed = verify_query_function(function)
+            if failed:
+                print(f"QueryFunction <{function.name}> doesn't satisfy {', '.join(failed)}! Ignoring them...")
+                function = function.without_properties(failed)
+
             self.available_functions[function.name] = function
 
-    def move_tree_by_delta_pos(self, delta_x: int, delta_y: int):
-        """Move a tree and its children by specified delta values.
+    def _collect_world_coordinates(self):
+        """Gather the IDs and world coordinates of every node into NumPy arrays.
 
-        This function adjusts the position of the root node of a tree by adding the
-        specified delta values to its x and y coordinates. It then propagates these 
-        changes to all child nodes, ensuring that the entire tree is moved consistently.
+        The arrays list the nodes in increasing ID order, which is breadth-first
+        order, so the nodes of every depth are contiguous and sorted by x-coordinate.
+        This makes them a spatial index: `world_depth_starts` holds where every depth
+        begins, and `world_edge_low`/`world_edge_high` the horizontal extent of the
+        edge from each node to its parent. Edges never cross, so both are sorted
+        within a depth too, and `visible_nodes` can binary search all of them.
+        """
+
+        segment_tree = self.segment_tree
+
+        if self.is_sparse:
+            IDs = numpy.fromiter(sorted(segment_tree.original_x), dtype=numpy.int64)
+            self.world_x = numpy.fromiter((segment_tree.original_x[ID] for ID in IDs.tolist()), dtype=numpy.int64, count=IDs.size)
+            self.world_y = numpy.fromiter((segment_tree.original_y[ID] for ID in IDs.tolist()), dtype=numpy.int64, count=IDs.size)
+        else:
+            low = numpy.frombuffer(segment_tree.low, dtype=numpy.int64)
+            high = numpy.frombuffer(segment_tree.high, dtype=numpy.int64)
+            IDs = numpy.flatnonzero(low <= high)
+            self.world_x = numpy.frombuffer(segment_tree.original_x, dtype=numpy.int64)[IDs]
+            self.world_y = numpy.frombuffer(segment_tree.original_y, dtype=numpy.int64)[IDs]
+
+        self.world_IDs = IDs
+        self._hover_key = None
+        self.world_parents = numpy.searchsorted(IDs, IDs >> 1)
+        self.world_edge_low = numpy.minimum(self.world_x, self.world_x[self.world_parents])
+        self.world_edge_high = numpy.maximum(self.world_x, self.world_x[self.world_parents])
+
+        depth_count = int(IDs[-1]).bit_length() if IDs.size else 0
+        self.world_depth_starts = numpy.searchsorted(IDs, numpy.left_shift(1, numpy.arange(depth_count+1))).tolist()
+
+    def visible_nodes(self, margin: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """Find the nodes and the edges that can be seen in the window through the camera.
+
+        The window is mapped back to world coordinates and widened by `margin` pixels
+        on every side. The depths whose nodes lie within it vertically are kept, and on
+        each of them the visible nodes are found by binary search on their x-coordinates.
+        The edges between two consecutive depths are searched the same way whenever the
+        band between them meets the window, so an edge crossing the window is found even
+        if both of its nodes are off screen. The cost depends on what is visible, not on
+        the size of the tree.
 
         Args:
-            delta_x (int): The change in the x-coordinate.
-            delta_y (int): The change in the y-coordinate.
+            margin (int): How many pixels beyond the window a node is still considered visible.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: The indices, into the world arrays, of the
+            visible nodes and of the nodes whose edge to their parent is visible.
         """
 
-        queue: deque[Node] = deque([self.segment_tree.root])
+        left, top = self.camera.to_world(-margin, -margin)
+        right, bottom = self.camera.to_world(pygame_window.window_width + margin, pygame_window.window_height + margin)
 
-        while queue:
-            node = queue.popleft()
-            node.x_offset += delta_x
-            node.y_offset += delta_y
+        nodes: list[numpy.ndarray] = []
+        edges: list[numpy.ndarray] = []
+        starts = self.world_depth_starts
+        parent_y = None
 
-            if node.is_leaf():
-                continue
+        for start, end in zip(starts, starts[1:]):
+            if parent_y is not None and parent_y > bottom:
+                break
+
+            y = int(self.world_y[start])
+
+            if top <= y <= bottom:
+                x = self.world_x[start:end]
+                nodes.append(numpy.arange(start + numpy.searchsorted(x, left, "left"),
+                                          start + numpy.searchsorted(x, right, "right")))
+
+            if parent_y is not None and parent_y <= bottom and y >= top:
+                edges.append(numpy.arange(start + numpy.searchsorted(self.world_edge_high[start:end], left, "left"),
+                                          start + numpy.searchsorted(self.world_edge_low[start:end], right, "right")))
 
-            for child in node.children:
-                queue.append(child)
+            parent_y = y
 
-    def compute_transformed_coordinates(self):
-        """Compute and update the transformed coordinates of all nodes in the tree.
+        empty = numpy.zeros(0, dtype=numpy.int64)
+
+        return (numpy.concatenate(nodes) if nodes else empty, numpy.concatenate(edges) if edges else empty)
+
+    def node_at(self, x: int, y: int) -> Optional[int]:
+        """Find the node under a point of the window.
+
+        A node is under the point when the point lies in the square of side
+        `NODE_HIT_BOX_SIZE` centered on the node on screen. Only the depths whose
+        band contains the point are looked at, and on each of them the point is
+        mapped to world coordinates and bisected into the sorted x-coordinates of
+        the depth, so the two nodes around it are the only candidates.
+
+        Args:
+            x (int): The x-coordinate of the point on screen.
+            y (int): The y-coordinate of the point on screen.
 
-        This function iterates through each node in the segment tree, applying a 
-        zoom factor to the original coordinates and adjusting them with any specified
-        offsets. The updated coordinates are stored back in the node, allowing for 
-        accurate rendering based on the current zoom level.
+        Returns:
+            Optional[int]: The ID of the node nearest to the point among the ones
+            under it, or None if there is none.
         """
 
-        queue: deque[Node] = deque([self.segment_tree.root])
+        camera = self.camera
+        reach = const.NODE_HIT_BOX_SIZE // 2
+        world_x, _ = camera.to_world(x, y)
+        starts = self.world_depth_starts
 
-        while queue:
-            node = queue.popleft()
-            node.x = int(node.original_x * self.zoom_level) + node.x_offset
-            node.y = int(node.original_y * self.zoom_level) + node.y_offset
+        nearest_ID: Optional[int] = None
+        nearest_distance = None
 
-            if node.is_leaf():
+        for start, end in zip(starts, starts[1:]):
+            depth_y = int(self.world_y[start])
+            _, screen_y = camera.to_screen(0, depth_y)
+
+            if screen_y - y > reach:
+                break
+
+            if y - screen_y > reach:
                 continue
 
-            for child in node.children:
-                queue.append(child)
+            level = self.world_x[start:end]
+            i = int(numpy.searchsorted(level, world_x))
+
+            for j in range(max(i-1, 0), min(i+1, end-start)):
+                screen_x, _ = camera.to_screen(int(level[j]), depth_y)
+                distance = (screen_x - x) ** 2 + (screen_y - y) ** 2
+
+                if abs(screen_x - x) <= reach and (nearest_distance is None or distance < nearest_distance):
+                    nearest_ID, nearest_distance = int(self.world_IDs[start+j]), distance
+
+        return nearest_ID
+
+    def hovered_node(self, mouse_pos: tuple[int, int]) -> Optional[Node]:
+        """Get the node under the mouse, picking it again only when something moved.
+
+        The node is looked up with `node_at` when the mouse position or the camera
+        differs from the last call, or when the tree has been laid out since, and
+        the cached result is returned otherwise.
+
+        Args:
+            mouse_pos (tuple[int, int]): The position of the mouse in the window.
+
+        Returns:
+            Optional[Node]: The hovered node, or None if no node is hovered.
+        """
+
+        camera = self.camera
+        key = (mouse_pos, camera.x_offset, camera.y_offset, camera.zoom_level)
 
-    def _compute_final_coordinates(self, node: Node, mod_sum: float):
+        if key != self._hover_key:
+            self._hover_key = key
+            self._hovered_ID = self.node_at(*mouse_pos)
+
+        if self._hovered_ID is None:
+            return None
+
+        return self.segment_tree.node(self._hovered_ID)
+
+    def _compute_final_coordinates(self, ID: int, mod_sum: float):
         """Compute the final coordinates for a node in a tree structure.
 
         This function updates the final x and y coordinates of a node based on its
-        preliminary x value and depth in the tree. It also propagates any 
+        preliminary x value and depth in the tree. It also propagates any
         modifications to the coordinates down to the node's children, ensuring that
         the entire tree is positioned correctly for rendering.
 
         Args:
-            node (Node): The node for which to compute the final coordinates.
+            ID (int): The ID of the node for which to compute the final coordinates.
             mod_sum (float): The cumulative modifier to adjust the x-coordinate.
         """
 
-        node.preliminary_x += mod_sum
-        mod_sum += node.modifier
-        node.modifier = 0
+        segment_tree = self.segment_tree
 
-        node.original_x = int(node.preliminary_x * const.SCALE)
-        node.original_y = int((node.depth + const.DEPTH_OFFSET) * const.VERTICAL_SCALE)
+        final_x = segment_tree.preliminary_x[ID] + mod_sum
+        mod_sum += segment_tree.modifier[ID]
 
-        if node.is_leaf():
+        segment_tree.original_x[ID] = int(final_x * const.SCALE)
+        segment_tree.original_y[ID] = int((self._depth(ID) + const.DEPTH_OFFSET) * const.VERTICAL_SCALE)
+
+        if segment_tree.is_leaf(ID):
             return
 
-        for child in node.children:
+        for child in (2*ID, 2*ID+1):
             self._compute_final_coordinates(child, mod_sum)
 
-    def _compute_prelim_x(self, node: Node):
+    def _compute_prelim_x(self, ID: int):
         """Compute the preliminary x-coordinate for a node in a tree.
 
         This function calculates the preliminary x-coordinate for a given node based
-        on its position relative to its siblings and children. It ensures that the 
-        x-coordinates are set correctly for rendering the tree structure visually, 
+        on its position relative to its siblings and children. It ensures that the
+        x-coordinates are set correctly for rendering the tree structure visually,
         taking into account the distances between nodes.
 
         Args:
-            node (Node): The node for which to compute the preliminary x-coordinate.
+            ID (int): The ID of the node for which to compute the preliminary x-coordinate.
+        """
+
+        if not self.segment_tree.is_leaf(ID):
+            for child in (2*ID, 2*ID+1):
+                self._compute_prelim_x(child)
+
+        self._position_node(ID)
+
+    def _position_node(self, ID: int):
+        """Compute the preliminary x-coordinate and modifier of a single node.
+
+        The children of the node and its left sibling must already be positioned.
+        A right child is then merged with its left sibling by `_check_for_conflicts`.
+
+        Args:
+            ID (int): The ID of the node to position.
         """
 
-        if node.is_leaf():
-            if node.is_left_node():
-                node.preliminary_x = 0
+        segment_tree = self.segment_tree
+        preliminary_x, modifier = segment_tree.preliminary_x, segment_tree.modifier
+        segment_tree.thread[ID] = 0
+
+        if segment_tree.is_leaf(ID):
+            modifier[ID] = 0
+            if self._is_left_node(ID):
+                preliminary_x[ID] = 0
             else:
-                node.preliminary_x = node.previous_sibling.preliminary_x \
+                preliminary_x[ID] = preliminary_x[ID-1] \
                     + const.SIBLING_DISTANCE + const.NODE_DISTANCE
+                self._check_for_conflicts(ID)
 
             return
 
-        for child in node.children:
-            self._compute_prelim_x(child)
+        mid = float((preliminary_x[2*ID] + preliminary_x[2*ID+1]) / 2)
 
-        left_child = node.left
-        right_child = node.right
-
-        mid = float((left_child.preliminary_x + right_child.preliminary_x) / 2)
-
-        if node.is_left_node():
-            node.preliminary_x = mid
+        if self._is_left_node(ID):
+            preliminary_x[ID] = mid
+            modifier[ID] = 0
             return
 
-        node.preliminary_x = node.previous_sibling.preliminary_x \
+        preliminary_x[ID] = preliminary_x[ID-1] \
             + const.SIBLING_DISTANCE + const.NODE_DISTANCE
-        node.modifier = node.preliminary_x - mid
-        self._check_for_conflicts(node)
+        modifier[ID] = preliminary_x[ID] - mid
+        self._check_for_conflicts(ID)
 
-    def _check_for_conflicts(self, node: Node):
+    def _check_for_conflicts(self, ID: int):
         """Check and resolve conflicts in node positioning within the tree.
 
-        This function evaluates the positioning of a node relative to its previous
-        sibling to ensure that the minimum required distance between them is 
-        maintained. If a conflict is detected, it adjusts the node's preliminary
-        x-coordinate and modifier accordingly to resolve the overlap.
+        The right contour of the left sibling's subtree and the left contour of the
+        node's subtree are walked together, one depth at a time, on the depths
+        both subtrees reach. If the two are closer than the minimum distance on any
+        of them, the node's preliminary x-coordinate and modifier are shifted
+        right by the largest shortfall.
+
+        Like in Buchheim and Walker's version of the algorithm, the last node of
+        the shallower subtree's outer contour is then threaded to the next node of
+        the deeper subtree's contour, so that the contours of the parent's subtree
+        can later be walked without visiting any node off them. The thread carries
+        the difference between the modifier sums of both nodes, so following it
+        keeps the sum up to date in constant time. Walking the contours costs as
+        many steps as the shallower subtree has levels, which adds up to linear
+        time over the tree.
 
         Args:
-            node (Node): The node to check for positioning conflicts.
+            ID (int): The ID of the right child to merge with its left sibling.
         """
 
         min_distance: float = const.TREE_DISTANCE + const.NODE_DISTANCE
         shift_value: float = 0.0
 
-        node_contour: dict[int, float] = {}
-        self._get_contour(node, 0, node_contour, ContourEnum.LEFT)
-
-        sibling = node.previous_sibling
-        sibling_contour: dict[int, float] = {}
-        self._get_contour(sibling, 0, sibling_contour, ContourEnum.RIGHT)
-
-        for level in range(
-            node.depth+1,
-            min(
-                max(node_contour.keys()),
-                max(sibling_contour.keys())
-            )+1
-        ):
-            distance = node_contour[level] - sibling_contour[level]
-            if distance + shift_value >= min_distance:
-                continue
+        segment_tree = self.segment_tree
+        preliminary_x = segment_tree.preliminary_x
+        sibling = ID-1
+
+        # Inner contours face each other, outer contours face away. The sums are
+        # those of the modifiers of a node's ancestors below the parent.
+        inner_left, inner_right = sibling, ID
+        outer_left, outer_right = sibling, ID
+        left_sum, right_sum = 0.0, 0.0
+        outer_left_sum, outer_right_sum = 0.0, 0.0
+
+        while True:
+            next_left, left_sum = self._next_on_contour(inner_left, left_sum, ContourEnum.RIGHT)
+            next_right, right_sum = self._next_on_contour(inner_right, right_sum, ContourEnum.LEFT)
+
+            if not next_left or not next_right:
+                break
 
-            shift_value = max(min_distance - distance, shift_value)
+            inner_left, inner_right = next_left, next_right
+            outer_left, outer_left_sum = self._next_on_contour(outer_left, outer_left_sum, ContourEnum.LEFT)
+            outer_right, outer_right_sum = self._next_on_contour(outer_right, outer_right_sum, ContourEnum.RIGHT)
+
+            distance = (preliminary_x[inner_right] + right_sum) - (preliminary_x[inner_left] + left_sum)
+            if distance + shift_value < min_distance:
+                shift_value = max(min_distance - distance, shift_value)
+
+        # Every node below the node itself moves with its modifier.
+        if outer_right != ID:
+            outer_right_sum += shift_value
+
+        if next_left:
+            segment_tree.thread[outer_right] = next_left
+            segment_tree.thread_modifier[outer_right] = left_sum - outer_right_sum
+        elif next_right:
+            segment_tree.thread[outer_left] = next_right
+            segment_tree.thread_modifier[outer_left] = right_sum + shift_value - outer_left_sum
 
         if shift_value == 0:
             return
 
-        node.preliminary_x += shift_value
-        node.modifier += shift_value
+        preliminary_x[ID] += shift_value
+        segment_tree.modifier[ID] += shift_value
 
-    def _get_contour(self, node: Node, mod_sum: float, values: dict[int, float], side: ContourEnum):
-        """Retrieve the contour values for a node in the tree.
+    def _next_on_contour(self, ID: int, mod_sum: float, side: ContourEnum) -> tuple[int, float]:
+        """Find the node following a node on a contour of a subtree.
 
-        This function populates a dictionary with the contour values of a node based
-        on its position and depth, either from the left or right side. It 
-        recursively processes the node's children to ensure that all relevant 
-        contour values are captured, adjusting for any modifiers as necessary.
+        It is the node's outer child, or the node its thread points to when it is
+        a leaf. The sum of the modifiers of the next node's ancestors is the node's
+        sum extended by its own modifier when it is the parent, or by the modifier
+        difference kept with the thread otherwise.
 
         Args:
-            node (Node): The node for which to compute contour values.
-            mod_sum (float): The cumulative modifier to adjust the contour values.
-            values (dict[int, float]): A dictionary to store the contour values indexed by depth.
-            side (ContourEnum): Specifies whether to compute the left or right contour.
+            ID (int): The ID of a node on the contour.
+            mod_sum (float): The sum of the modifiers of the node's ancestors.
+            side (ContourEnum): Whether to follow the left or the right contour.
 
-        Raises:
-            ValueError: If 'side' is not one of the accepted values (left or right).
+        Returns:
+            tuple[int, float]: The ID of the next node, 0 if the contour ends at the
+            node, and the sum of the modifiers of its ancestors.
         """
 
-        if side not in [ContourEnum.LEFT, ContourEnum.RIGHT]:
-            raise ValueError("'side' only accepts either 2 values: 'left' or 'right'.")
+        segment_tree = self.segment_tree
 
-        if node.depth not in values:
-            values[node.depth] = node.preliminary_x + mod_sum
-        else:
-            fn = min if side == ContourEnum.LEFT else max
-            values[node.depth] = fn(values[node.depth], node.preliminary_x + mod_sum)
+        if not segment_tree.is_leaf(ID):
+            child = 2*ID if side == ContourEnum.LEFT else 2*ID+1
+            return child, mod_sum + segment_tree.modifier[ID]
+
+        thread = segment_tree.thread[ID]
+        if not thread:
+            return 0, mod_sum
 
-        mod_sum += node.modifier
+        return thread, mod_sum + segment_tree.thread_modifier[ID]
 
-        if node.is_leaf():
+    def _cache_layout(self, length: int, original_x: array, original_y: array):
+        """Keep the coordinates of a regular segment tree's layout for its length.
+
+        The least recently used lengths are evicted until the cache fits in
+        `LAYOUT_CACHE_MAX_BYTES`. The arrays are kept as they are, not copied, since
+        nothing writes to a layout's coordinates once they are computed.
+
+        Args:
+            length (int): The length of the tree's array.
+            original_x (array): The x-coordinate of every node slot.
+            original_y (array): The y-coordinate of every node slot.
+        """
+
+        size = original_x.itemsize * len(original_x) + original_y.itemsize * len(original_y)
+        if size > const.LAYOUT_CACHE_MAX_BYTES:
             return
 
-        for child in node.children:
-            self._get_contour(child, mod_sum, values, side)
\ No newline at end of file
+        self._layout_cache[length] = (original_x, original_y)
+        self._layout_cache_bytes += size
+
+        while self._layout_cache_bytes > const.LAYOUT_CACHE_MAX_BYTES:
+            _, (evicted_x, evicted_y) = self._layout_cache.popitem(last=False)
+            self._layout_cache_bytes -= evicted_x.itemsize * len(evicted_x) + evicted_y.itemsize * len(evicted_y)
+
+    def _compute_regular_layout(self):
+        """Compute the coordinates of every node of a regular segment tree in closed form.
+
+        Every node on a level of a regular segment tree splits one of at most two
+        segment lengths, so the preliminary x-coordinates and modifiers of the
+        level's children take at most four distinct values. Those are looked up in
+        `_subtree_layout` and written to the whole level at once. The final
+        coordinates are then summed top-down one level at a time, adding the same
+        values in the same order as `_compute_final_coordinates`, so both give
+        exactly the same coordinates.
+        """
+
+        segment_tree = self.segment_tree
+        capacity = segment_tree.capacity
+
+        low = numpy.frombuffer(segment_tree.low, dtype=numpy.int64)
+        high = numpy.frombuffer(segment_tree.high, dtype=numpy.int64)
+        preliminary_x = numpy.frombuffer(segment_tree.preliminary_x, dtype=numpy.float64)
+        modifier = numpy.frombuffer(segment_tree.modifier, dtype=numpy.float64)
+        original_x = numpy.frombuffer(segment_tree.original_x, dtype=numpy.int64)
+        original_y = numpy.frombuffer(segment_tree.original_y, dtype=numpy.int64)
+        mod_sum = numpy.zeros(capacity, dtype=numpy.float64)
+
+        preliminary_x[1] = self._subtree_layout(segment_tree.array_length).prelim
+        level = numpy.ones(1, dtype=numpy.int64)
+        depth = const.ROOT_DEPTH
+
+        while level.size:
+            original_x[level] = ((preliminary_x[level] + mod_sum[level]) * const.SCALE).astype(numpy.int64)
+            original_y[level] = int((depth + const.DEPTH_OFFSET) * const.VERTICAL_SCALE)
+
+            parents = level[low[level] < high[level]]
+            lengths = high[parents] - low[parents] + 1
+
+            for length in numpy.unique(lengths).tolist():
+                same_length = parents[lengths == length]
+                layout = self._subtree_layout(length)
+
+                preliminary_x[2*same_length] = self._subtree_layout((length+1) // 2).prelim
+                preliminary_x[2*same_length+1] = layout.right_prelim
+                modifier[2*same_length+1] = layout.right_modifier
+
+            children_sum = mod_sum[parents] + modifier[parents]
+            mod_sum[2*parents] = children_sum
+            mod_sum[2*parents+1] = children_sum
+
+            level = numpy.sort(numpy.concatenate((2*parents, 2*parents+1)))
+            depth += 1
+
+    def _subtree_layout(self, length: int) -> SubtreeLayout:
+        """Get the relative layout of a regular segment tree's subtree over a segment of a given length.
+
+        The layout is derived from those of its children exactly the way
+        `_position_node` would position them, and kept for every later tree, so
+        a tree of n elements only computes O(log n) of them.
+
+        Args:
+            length (int): The length of the subtree's segment.
+
+        Returns:
+            SubtreeLayout: The layout of the subtree.
+        """
+
+        layout = self._subtree_layouts.get(length)
+        if layout is not None:
+            return layout
+
+        if length == 1:
+            layout = SubtreeLayout(0, 0, 0, [], [])
+            self._subtree_layouts[length] = layout
+            return layout
+
+        left, right = self._subtree_layout((length+1) // 2), self._subtree_layout(length // 2)
+
+        right_prelim = left.prelim + const.SIBLING_DISTANCE + const.NODE_DISTANCE
+        right_modifier = 0.0
+
+        if length // 2 > 1:
+            right_modifier = right_prelim - right.prelim
+
+            # A left child's modifier is always 0.
+            shift_value = self._contour_shift(left.right_contour, 0.0, right.left_contour, right_modifier)
+            right_prelim += shift_value
+            right_modifier += shift_value
+
+        left_depth, right_depth = len(left.left_contour), len(right.right_contour)
+
+        left_contour = [(left.prelim, ())] \
+            + [(prelim, (0.0,) + path) for prelim, path in left.left_contour] \
+            + [(prelim, (right_modifier,) + path) for prelim, path in right.left_contour[left_depth:]]
+        right_contour = [(right_prelim, ())] \
+            + [(prelim, (right_modifier,) + path) for prelim, path in right.right_contour] \
+            + [(prelim, (0.0,) + path) for prelim, path in left.right_contour[right_depth:]]
+
+        layout = SubtreeLayout(float((left.prelim + right_prelim) / 2), right_prelim, right_modifier, left_contour, right_contour)
+        self._subtree_layouts[length] = layout
+        return layout
+
+    @staticmethod
+    def _contour_shift(sibling_contour: list[ContourNode], sibling_modifier: float,
+                       node_contour: list[ContourNode], node_modifier: float) -> float:
+        """Compute how far a right child has to move away from its left sibling, like `_check_for_conflicts` does.
+
+        Args:
+            sibling_contour (list[ContourNode]): The right contour of the left sibling's subtree.
+            sibling_modifier (float): The modifier of the left sibling.
+            node_contour (list[ContourNode]): The left contour of the node's subtree.
+            node_modifier (float): The modifier of the node before it's moved.
+
+        Returns:
+            float: The distance the node has to move right by.
+        """
+
+        min_distance: float = const.TREE_DISTANCE + const.NODE_DISTANCE
+        shift_value: float = 0.0
+
+        for (sibling_prelim, sibling_path), (node_prelim, node_path) in zip(sibling_contour, node_contour):
+            sibling_sum, node_sum = 0 + sibling_modifier, 0 + node_modifier
+
+            for modifier in sibling_path:
+                sibling_sum += modifier
+            for modifier in node_path:
+                node_sum += modifier
+
+            distance = (node_prelim + node_sum) - (sibling_prelim + sibling_sum)
+            if distance + shift_value < min_distance:
+                shift_value = max(min_distance - distance, shift_value)
+
+        return shift_value
+
+    @staticmethod
+    def _depth(ID: int) -> int:
+        """Get the depth of a node from its heap-style ID.
+
+        Args:
+            ID (int): The ID of the node.
+
+        Returns:
+            int: The depth of the node, the root being at `const.ROOT_DEPTH`.
+        """
+
+        return const.ROOT_DEPTH + ID.bit_length() - 1
+
+    @staticmethod
+    def _is_left_node(ID: int) -> bool:
+        """Check whether a node is the left child of its parent; the root counts as one.
+
+        Args:
+            ID (int): The ID of the node.
+
+        Returns:
+            bool: True if the node is a left child or the root, otherwise False.
+        """
+
+        return ID % 2 == 0 or ID == 1
@@ -1,3 +1,6 @@
 from src.dataclass.query_function import QueryFunction
 from src.dataclass.node import Node
-from src.dataclass.theme import Theme
\ No newline at end of file
+from src.dataclass.theme import Theme
+from src.dataclass.version import Version
+from src.dataclass.subtree_layout import SubtreeLayout
+from src.dataclass.camera import Camera
\ No newline at end of file
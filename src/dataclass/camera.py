@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+
+import numpy
+
+@dataclass(slots=True)
+class Camera:
+    """Represents the view of the tree on screen, an offset and a zoom level.
+
+    Nodes keep their world coordinates, the ones computed by the layout, and are
+    only mapped to the screen when they are drawn or hit-tested, so panning and
+    zooming only change the camera.
+
+    Attributes:
+        x_offset (int): The screen x-coordinate of the world's origin.
+        y_offset (int): The screen y-coordinate of the world's origin.
+        zoom_level (float): The number of pixels per unit of world coordinates.
+    """
+
+    x_offset: int = 0
+    y_offset: int = 0
+    zoom_level: float = 1.0
+
+    def move(self, delta_x: int, delta_y: int):
+        """Move everything on screen by the given number of pixels.
+
+        Args:
+            delta_x (int): The change in the x-coordinate.
+            delta_y (int): The change in the y-coordinate.
+        """
+
+        self.x_offset += delta_x
+        self.y_offset += delta_y
+
+    def to_screen(self, x: int, y: int) -> tuple[int, int]:
+        """Map a point from world to screen coordinates.
+
+        Args:
+            x (int): The world x-coordinate.
+            y (int): The world y-coordinate.
+
+        Returns:
+            tuple[int, int]: The screen coordinates of the point.
+        """
+
+        return (int(x * self.zoom_level) + self.x_offset, int(y * self.zoom_level) + self.y_offset)
+
+    def to_screen_many(self, x: numpy.ndarray, y: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """Map points from world to screen coordinates with one vectorized operation per axis.
+
+        The coordinates are truncated toward zero like `to_screen` does.
+
+        Args:
+            x (numpy.ndarray): The world x-coordinates.
+            y (numpy.ndarray): The world y-coordinates.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: The screen x- and y-coordinates of the points.
+        """
+
+        return ((x * self.zoom_level).astype(numpy.int64) + self.x_offset,
+                (y * self.zoom_level).astype(numpy.int64) + self.y_offset)
+
+    def to_world(self, x: int, y: int) -> tuple[float, float]:
+        """Map a point from screen to world coordinates.
+
+        Args:
+            x (int): The screen x-coordinate.
+            y (int): The screen y-coordinate.
+
+        Returns:
+            tuple[float, float]: The world coordinates of the point.
+        """
+
+        return ((x - self.x_offset) / self.zoom_level, (y - self.y_offset) / self.zoom_level)
\ No newline at end of file
@@ -1,86 +1,107 @@
-from src.utils import const
+from typing import Optional, TYPE_CHECKING
 
-from typing import Optional
+if TYPE_CHECKING:
+    from src.segment_tree import SegmentTree
 
 class Node:
     """
-    Represents a node in a segment tree, containing references to its children,
-    parent, and various properties related to its position and data. This class
-    provides methods to initialize child nodes, construct the node with specific
-    values, and determine its relationships within the tree.
+    Represents a lightweight view over one node of a segment tree. The node's
+    fields are not stored on the view itself, they are read from
+    the flat per-node arrays of the owning tree at the node's ID. Views are cheap
+    to create and are only materialized when code needs to walk the tree, such
+    as the renderer.
     """
 
-    __slots__ = (
-        "left", "right", "parent",
-        "low", "high",
-        "x", "y",
-        "preliminary_x", "modifier", "depth",
-        "data", "ID",
-        "lazy_data",
-        "x_offset", "y_offset",
-        "original_x", "original_y",
-        "x", "y"
-    )
+    __slots__ = ("tree", "ID")
 
-    def __init__(self):
-        self.left: Optional[Node] = None
-        self.right: Optional[Node] = None
-        self.parent: Optional[Node] = None
+    def __init__(self, tree: 'SegmentTree', ID: int):
+        self.tree = tree
+        self.ID = ID
 
-        self.data: int = 0
-        self.lazy_data: int = 0
-        self.low: int = 0
-        self.high: int = 0
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Node) and self.tree is other.tree and self.ID == other.ID
 
-        self.original_x: int = 0
-        self.original_y: int = 0
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.ID))
 
-        self.x_offset: int = 0
-        self.y_offset: int = 0
+    @property
+    def data(self) -> int:
+        return self.tree.data[self.ID]
 
-        self.x: int = 0
-        self.y: int = 0
+    @property
+    def lazy_data(self) -> int:
+        return self.tree.lazy_data[self.ID]
 
-        self.depth: int = 0
-        self.modifier: float = 0.0
-        self.preliminary_x: float = 0.0
-        self.ID: int = 0
+    @property
+    def lazy_scale(self) -> int:
+        return self.tree.lazy_scale[self.ID]
 
-    def init_children(self):
+    @property
+    def tag_label(self) -> str:
         """
-        Initializes the left and right child nodes of the current node. This method
-        creates new Node instances for both children and sets their parent reference
-        to the current node.
+        Returns a short description of the update pending on the node: the
+        increment alone for a range increment, "=v" for a range assignment and
+        "*a+b" for any other affine update.
+
+        Returns:
+            str: The label of the pending update, empty if there is none.
         """
 
-        self.left = Node()
-        self.right = Node()
+        scale, val = self.lazy_scale, self.lazy_data
+
+        if scale == 1:
+            return "" if val == 0 else f"{val}"
 
-        self.left.parent = self.right.parent = self
+        if scale == 0:
+            return f"={val}"
 
-    def construct(self, low: int, high: int, ID: int) -> None:
+        return f"*{scale}{val:+}"
+
+    @property
+    def low(self) -> int:
+        return self.tree.low[self.ID]
+
+    @property
+    def high(self) -> int:
+        return self.tree.high[self.ID]
+
+    @property
+    def depth(self) -> int:
         """
-        Constructs the node with specified bounds and a unique identifier. This 
-        method sets the depth of the node based on its position in the tree and 
-        assigns the provided low and high values along with the node's ID.
+        Returns the depth of the node, which follows directly from its heap-style
+        ID since every level doubles the IDs of the level above it.
 
-        Args:
-            low (int): The lower bound value associated with the node.
-            high (int): The upper bound value associated with the node.
-            ID (int): A unique identifier for the node.
+        Returns:
+            int: The depth of the node, the root having a depth of 0.
         """
 
-        self.depth = const.ROOT_DEPTH if self.is_root() else self.parent.depth + 1
-        self.ID = ID
+        return self.ID.bit_length() - 1
+
+    @property
+    def original_x(self) -> int:
+        return self.tree.original_x[self.ID]
+
+    @property
+    def original_y(self) -> int:
+        return self.tree.original_y[self.ID]
+
+    @property
+    def left(self) -> Optional['Node']:
+        return None if self.is_leaf() else Node(self.tree, 2*self.ID)
 
-        self.low = low
-        self.high = high
+    @property
+    def right(self) -> Optional['Node']:
+        return None if self.is_leaf() else Node(self.tree, 2*self.ID+1)
+
+    @property
+    def parent(self) -> Optional['Node']:
+        return None if self.is_root() else Node(self.tree, self.ID // 2)
 
     @property
     def children(self) -> tuple['Node', 'Node']:
         """
         Returns the left and right children of the node as a tuple. This property
-        provides a convenient way to access the child nodes without directly 
+        provides a convenient way to access the child nodes without directly
         referencing the attributes.
 
         Returns:
@@ -92,7 +113,7 @@ class Node:
     @property
     def previous_sibling(self) -> Optional['Node']:
         """
-        Returns the previous sibling of the node, if applicable. This property 
+        Returns the previous sibling of the node, if applicable. This property
         checks if the node is the root or a left child; if so, it returns None,
         otherwise it returns the left sibling from the parent.
 
@@ -101,54 +122,48 @@ class Node:
         """
 
         return None if self.is_root() or self.is_left_node() \
-            else self.parent.left
+            else Node(self.tree, self.ID - 1)
 
-    @property
-    def coordinates(self) -> tuple[int, int]:
+    def is_leaf(self) -> bool:
         """
-        Returns the current coordinates of the node as a tuple. This property 
-        provides a convenient way to access the x and y position of the node.
+        Determines whether the node is a leaf node. A leaf node is defined as a
+        node whose segment only contains a single element, meaning it does not
+        have any children.
 
         Returns:
-            tuple[int, int]: A tuple containing the x and y coordinates of the node.
+            bool: True if the node is a leaf, False otherwise.
         """
 
-        return (self.x, self.y)
+        return self.tree.is_leaf(self.ID)
 
-    def is_leaf(self) -> bool:
+    def has_tag(self) -> bool:
         """
-        Determines whether the node is a leaf node. A leaf node is defined as a 
-        node that does not have any children, meaning both the left and right 
-        child references are None.
+        Determines whether the node carries a pending lazy update.
 
         Returns:
-            bool: True if the node is a leaf, False otherwise.
+            bool: True if a tag is pending on the node, False otherwise.
         """
 
-        return self.left is None and self.right is None
+        return self.lazy_scale != 1 or self.lazy_data != 0
 
     def is_root(self) -> bool:
         """
-        Determines whether the node is the root of the tree. A root node is defined
-        as a node that does not have a parent, meaning its parent reference is None.
+        Determines whether the node is the root of the tree. The root is always
+        the node with an ID of 1.
 
         Returns:
             bool: True if the node is the root, False otherwise.
         """
 
-        return self.parent is None
+        return self.ID == 1
 
     def is_left_node(self) -> bool:
         """
-        Determines whether the node is the left child of its parent. This method 
-        checks if the current node is equal to the left child of its parent; if 
-        the parent does not exist, it assumes the node is a left node.
+        Determines whether the node is the left child of its parent. Left
+        children have even IDs; the root is considered a left node.
 
         Returns:
             bool: True if the node is a left child, False otherwise.
         """
 
-        try:
-            return self is self.parent.left
-        except AttributeError:
-            return True
+        return self.ID % 2 == 0 or self.is_root()
@@ -1,5 +1,7 @@
-from typing import Callable
-from dataclasses import dataclass
+from typing import Callable, Optional
+from dataclasses import dataclass, fields, replace
+
+import numpy
 
 @dataclass(slots=True, unsafe_hash=True, frozen=True)
 class QueryFunction:
@@ -10,14 +12,86 @@ class QueryFunction:
     query result. It is designed to provide a structured way to manage query
     functions within the application.
 
+    A function also declares its algebraic properties. The engines and fast
+    paths that rearrange how values are combined are picked from them, and
+    they are checked on random values by `verify_query_function` when the
+    function is loaded. A function that is not associative is only ever
+    combined along the shape of the segment tree.
+
     Attributes:
         name (str): The name of the query function.
         description (str): A brief description of what the query function does.
         fn (Callable[[int, int], int]): The actual function that performs the query operation.
-        invalid_query_val (int): The value returned when the query is invalid.
+        invalid_query_val (int): The value returned when the query is invalid, for a
+            function without an identity. The query of a range outside of the array
+            results in the identity otherwise, like an empty range does.
+        vectorized_fn (Optional[Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray]]):
+            An element-wise version of `fn` over int64 arrays, used to build the
+            segment tree one level at a time. It must raise OverflowError instead of
+            returning a wrapped-around result. None if there is no such version.
+        range_add_fn (Optional[Callable[[int, int, int], int]]): How a pending range
+            increment acts on an aggregate. Given a node's value, the value added to
+            every element of its segment and the segment's length, it returns the
+            node's new value. None if range increments can't be applied lazily.
+        range_assign_fn (Optional[Callable[[int, int], int]]): The value of a node whose
+            segment has all of its elements set to the same value, given that value and
+            the segment's length. None if range assignments can't be applied lazily.
+        range_scale_fn (Optional[Callable[[int, int, int], Optional[int]]]): How a pending
+            range multiplication acts on an aggregate. Given a node's value, the non-zero
+            factor every element of its segment is multiplied by and the segment's length,
+            it returns the node's new value, or None if that factor isn't supported.
+            None if range multiplications can't be applied lazily.
+        associative (bool): Whether fn(fn(x, y), z) == fn(x, fn(y, z)). Ranges of such a
+            function can be answered by the iterative traversal, in batches with NumPy, and
+            by the other engines when it has their property as well.
+        commutative (bool): Whether fn(x, y) == fn(y, x).
+        identity (Optional[int]): The value e such that fn(e, x) == fn(x, e) == x for any
+            result x of `fn`. It is the result of an empty range, and of the empty prefix
+            of the Fenwick engine. None if there is no such integer.
+        idempotent (bool): Whether combining a result of `fn` with itself gives back that
+            result. Ranges of such an associative function can be answered by the sparse
+            table engine.
+        inverse_fn (Optional[Callable[[int, int], int]]): Removes its second argument from
+            its first, inverse_fn(fn(x, y), y) == x. Ranges of such an associative and
+            commutative function can be answered by the Fenwick engine. None if `fn` isn't
+            invertible.
+        beats_field (Optional[str]): The aggregate of a segment tree beats node that `fn`
+            computes over a range, "sum", "max" or "min". Ranges of such a function can be
+            answered by the beats engine. None if `fn` is none of those.
+        result_bits_fn (Optional[Callable[[int, int], int]]): A cheap upper bound on the
+            bit length of fn(x, y), for a function whose results can grow far longer than
+            its operands. The segment tree refuses to compute a result whose bound exceeds
+            `MAX_RESULT_BITS`. None if results stay about as long as the operands.
+            The range functions of such a query function must then raise OverflowError
+            instead of computing a power longer than `MAX_RESULT_BITS`.
     """
 
     name: str
     description: str
     fn: Callable[[int, int], int]
-    invalid_query_val: int
\ No newline at end of file
+    invalid_query_val: int
+    vectorized_fn: Optional[Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray]] = None
+    range_add_fn: Optional[Callable[[int, int, int], int]] = None
+    range_assign_fn: Optional[Callable[[int, int], int]] = None
+    range_scale_fn: Optional[Callable[[int, int, int], Optional[int]]] = None
+    associative: bool = False
+    commutative: bool = False
+    identity: Optional[int] = None
+    idempotent: bool = False
+    inverse_fn: Optional[Callable[[int, int], int]] = None
+    beats_field: Optional[str] = None
+    result_bits_fn: Optional[Callable[[int, int], int]] = None
+
+    def without_properties(self, names: list[str]) -> 'QueryFunction':
+        """Get a copy of the function that no longer declares some of its properties.
+
+        Args:
+            names (list[str]): The names of the fields to reset to their default, which
+                never declares a property.
+
+        Returns:
+            QueryFunction: The copy.
+        """
+
+        defaults = {field.name: field.default for field in fields(self)}
+        return replace(self, **{name: defaults[name] for name in names})
\ No newline at end of file
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+
+ContourNode = tuple[float, tuple[float, ...]]
+
+@dataclass(slots=True, frozen=True)
+class SubtreeLayout:
+    """Represents the relative layout of a segment tree's subtree over a segment of a given length.
+
+    A node's preliminary x-coordinate and modifier only depend on the shape of its
+    subtree and, for a right child, on its left sibling's, and the shape of a
+    segment tree's subtree only depends on the length of its segment. So every
+    subtree over the same length is laid out the same way.
+
+    A contour lists, for every depth below the subtree's root, the node with the
+    smallest (left contour) or largest (right contour) x-coordinate on that depth,
+    as its preliminary x-coordinate and the modifiers of its ancestors from the
+    root's child down to its parent. The root's own modifier comes first in the
+    sum giving the node's x-coordinate relative to the root, and it depends on
+    whether the root is a left or a right child, so it isn't included.
+
+    Attributes:
+        prelim (float): The preliminary x-coordinate of the root when it is a left child or the tree's root.
+        right_prelim (float): The preliminary x-coordinate of the root's right child.
+        right_modifier (float): The modifier of the root's right child.
+        left_contour (list[ContourNode]): The left contour, starting from the root's children.
+        right_contour (list[ContourNode]): The right contour, starting from the root's children.
+    """
+
+    prelim: float
+    right_prelim: float
+    right_modifier: float
+    left_contour: list[ContourNode]
+    right_contour: list[ContourNode]
\ No newline at end of file
@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from src.dataclass.query_function import QueryFunction
+
+if TYPE_CHECKING:
+    from src.engines import PersistentSegmentTree
+
+@dataclass(slots=True, frozen=True)
+class Version:
+    """Represents one saved state of a segment tree in persistent mode.
+
+    Attributes:
+        label (str): A short description of the update that produced the version.
+        function (QueryFunction): The query function of the tree in that state.
+        length (int): The length of the array in that state.
+        pool (PersistentSegmentTree): The pool of nodes holding the version.
+        root (int): The root of the version in its pool.
+    """
+
+    label: str
+    function: QueryFunction
+    length: int
+    pool: 'PersistentSegmentTree'
+    root: int
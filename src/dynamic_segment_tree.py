@@ -0,0 +1,601 @@
+from collections.abc import Sequence as SequenceABC
+from contextlib import contextmanager
+from itertools import repeat
+from typing import Iterator, Optional, Sequence
+
+from src.utils import TraversalEnum, QueryEngineEnum
+from src.exceptions import CommandException
+from src.dataclass import QueryFunction
+from src.segment_tree import SegmentTree
+
+class DynamicSegmentTree(SegmentTree):
+    """
+    Represents a segment tree over a virtual array of a fixed length, every
+    element of which starts with the same default value. Nodes are only created
+    when an update has to go below a node, so the tree can span ranges far too
+    large to be held in memory, its size staying proportional to the number of
+    updated positions times the height of the tree.
+
+    The per-node fields are stored in dicts indexed by the same heap-style IDs as
+    `SegmentTree`, so `Node` views, the layout and the renderer work unchanged. A
+    node without children is collapsed: every element of its segment has the
+    same value, kept in `uniform`, and the node is drawn as a leaf. Children are
+    always created in pairs, by splitting a collapsed node. Queries walk the
+    tree recursively, collapsed nodes being descended virtually, so the results
+    are the same as those of a `SegmentTree` built over the whole array.
+    """
+
+    def __init__(self, length: int, default: int, function_obj: QueryFunction):
+        """Initialize a sparse segment tree made of a single collapsed root.
+
+        The flat storage of `SegmentTree` is never allocated, which is why its
+        constructor isn't called.
+
+        Args:
+            length (int): The length of the virtual array.
+            default (int): The value of every element of the virtual array.
+            function_obj (QueryFunction): An object containing the function used for
+            combining values and the value to return for invalid queries.
+        """
+
+        self.length = length
+        self.traversal = TraversalEnum.RECURSIVE
+        self.engine = QueryEngineEnum.SEGMENT_TREE
+        self.persistent = False
+        self.versions = []
+        self.version_index = -1
+        self.layout_outdated = False
+        self._fenwick_tree = None
+        self._beats_tree = None
+        self._sequence_tree = None
+        self._tree_stale = False
+        self._array_synced = True
+
+        self.data: dict[int, int] = {}
+        self.lazy_scale: dict[int, int] = {}
+        self.lazy_data: dict[int, int] = {}
+        self.low: dict[int, int] = {}
+        self.high: dict[int, int] = {}
+        self.uniform: dict[int, int] = {}
+        self.tagged_nodes: set[int] = set()
+        self.allocate_layout()
+
+        self.switch_function(function_obj)
+
+        if length > 0:
+            self._create(1, 0, length-1, default)
+
+    @property
+    def array(self) -> Sequence[int]:
+        """Get a read-only view of the virtual array.
+
+        Elements are computed when they are read, iterating over the view walks
+        the tree once and repeats the value of every collapsed node.
+
+        Returns:
+            Sequence[int]: The values currently represented by the segment tree.
+        """
+
+        return _ArrayView(self)
+
+    @property
+    def array_length(self) -> int:
+        return self.length
+
+    @property
+    def leaf_ID(self) -> Sequence[int]:
+        """Get a view mapping each position to the deepest node created over it.
+
+        Returns:
+            Sequence[int]: The ID of the deepest existing node containing each position.
+        """
+
+        return _LeafIDView(self)
+
+    def has_node(self, ID: int) -> bool:
+        return ID in self.data
+
+    def is_leaf(self, ID: int) -> bool:
+        """Check whether the node with the given ID has no children.
+
+        A collapsed node is considered a leaf even if its segment holds several
+        elements, since nothing below it exists.
+
+        Args:
+            ID (int): The heap-style identifier of an existing node.
+
+        Returns:
+            bool: True if the node is collapsed, otherwise False.
+        """
+
+        return ID in self.uniform
+
+    def node_ids(self) -> Iterator[int]:
+        """Iterate over the IDs of every existing node in breadth-first order.
+
+        The IDs are collected before the first one is yielded, so nodes may be
+        created or propagated while iterating.
+
+        Yields:
+            int: The ID of each node, in increasing order.
+        """
+
+        yield from sorted(self.data)
+
+    def switch_function(self, function_obj: QueryFunction):
+        super().switch_function(function_obj)
+        self._uniform_values: dict[tuple[int, int], int] = {}
+
+    def set_engine(self, engine: QueryEngineEnum):
+        if engine != QueryEngineEnum.SEGMENT_TREE:
+            raise CommandException("A sparse segment tree can only be queried by walking the tree!")
+
+        self.engine = engine
+
+    def query(self, q_low: int, q_high: int) -> int:
+        """Retrieve the result of a query on the segment tree for a specified range.
+
+        Args:
+            q_low (int): The lower bound of the range to query.
+            q_high (int): The upper bound of the range to query.
+
+        Returns:
+            int: The result of the query for the specified range.
+        """
+
+        if self.length == 0:
+            return self._INVALID_QUERY
+
+        return self._query(q_low, q_high, 1, 0, self.length-1)
+
+    def query_many(self, lows: Sequence[int], highs: Sequence[int]) -> list[int]:
+        return [self.query(q_low, q_high) for q_low, q_high in zip(lows, highs)]
+
+    def kth_smallest(self, q_low: int, q_high: int, k: int) -> int:
+        raise CommandException("A sparse segment tree can't answer order statistics!")
+
+    def count_less(self, q_low: int, q_high: int, x: int) -> int:
+        raise CommandException("A sparse segment tree can't answer order statistics!")
+
+    def update_element_no_lazy(self, pos: int, val: int) -> None:
+        """Update the value at a specified position, creating the nodes on its path if needed.
+
+        Args:
+            pos (int): The position in the virtual array to update.
+            val (int): The new value to set at the specified position.
+
+        Raises:
+            CommandException: If the position is outside of the array.
+        """
+
+        if not 0 <= pos < self.length:
+            raise CommandException(f"Position {pos} is outside of the array!")
+
+        with self._restore_on_abort():
+            self._update_element_no_lazy(pos, val, 1, 0, self.length-1)
+
+    def update_many(self, positions: Sequence[int], values: Sequence[int]) -> None:
+        for pos in positions:
+            if not 0 <= pos < self.length:
+                raise CommandException(f"Position {pos} is outside of the array!")
+
+        with self._restore_on_abort():
+            for pos, val in zip(positions, values):
+                self._update_element_no_lazy(pos, val, 1, 0, self.length-1)
+
+    def affine_segment_lazy(self, scale: int, val: int, segment_low: int, segment_high: int):
+        """Map every element of a range through x -> scale * x + val.
+
+        Collapsed nodes inside the range are updated directly, only the nodes
+        crossing a bound of the range are split. A range assignment collapses
+        every node it covers, dropping the nodes below them.
+
+        Args:
+            scale (int): The factor each element of the range is multiplied by.
+            val (int): The value then added to each element of the range.
+            segment_low (int): The lower bound of the range.
+            segment_high (int): The upper bound of the range.
+
+        Raises:
+            CommandException: If the query function can't apply the update lazily.
+        """
+
+        self._check_tag_supported(scale, val)
+
+        if self.length > 0:
+            with self._restore_on_abort():
+                self._update_segment_lazy(scale, val, 1, 0, self.length-1, segment_low, segment_high)
+
+    def propagate(self, ID: int):
+        """Propagates the lazy value down the segment tree.
+
+        The tag of a collapsed node is applied to its value and to the value shared
+        by its elements, there are no children to pass it to.
+
+        Args:
+            ID (int): The ID of the node to propagate the lazy value from.
+        """
+
+        scale, lazy_data = self.lazy_scale[ID], self.lazy_data[ID]
+
+        if scale == 1 and lazy_data == 0:
+            return
+
+        self.data[ID] = self._apply_tag(self.data[ID], scale, lazy_data, self.high[ID] - self.low[ID] + 1)
+
+        if ID in self.uniform:
+            self.uniform[ID] = scale * self.uniform[ID] + lazy_data
+        else:
+            self._compose_lazy(2*ID, scale, lazy_data)
+            self._compose_lazy(2*ID+1, scale, lazy_data)
+
+        self.lazy_scale[ID] = 1
+        self.lazy_data[ID] = 0
+        self.tagged_nodes.discard(ID)
+
+    def insert(self, pos: int, val: int):
+        raise CommandException("A sparse segment tree has a fixed length!")
+
+    def splice(self, pos: int, values: Sequence[int]):
+        raise CommandException("A sparse segment tree has a fixed length!")
+
+    def remove(self, pos: int) -> int:
+        raise CommandException("A sparse segment tree has a fixed length!")
+
+    def rebuild(self, save_version: bool = True):
+        """Recompute the value of every node, typically after the query function was switched.
+
+        Pending tags are pushed down to the collapsed nodes first, without touching
+        any node value since those may have been computed by another function.
+        A sparse segment tree is never persistent, so `save_version` is ignored.
+        """
+
+        lazy_scale, lazy_data, uniform = self.lazy_scale, self.lazy_data, self.uniform
+
+        for ID in sorted(self.data):
+            scale, val = lazy_scale[ID], lazy_data[ID]
+            if scale == 1 and val == 0:
+                continue
+
+            if ID in uniform:
+                uniform[ID] = scale * uniform[ID] + val
+            else:
+                self._compose_lazy(2*ID, scale, val)
+                self._compose_lazy(2*ID+1, scale, val)
+
+            lazy_scale[ID] = 1
+            lazy_data[ID] = 0
+            self.tagged_nodes.discard(ID)
+
+        data, low, high = self.data, self.low, self.high
+
+        for ID in sorted(data, reverse=True):
+            if ID in uniform:
+                data[ID] = self._uniform_value(uniform[ID], high[ID] - low[ID] + 1)
+            else:
+                data[ID] = self._fn(data[2*ID], data[2*ID+1])
+
+    def enable_persistence(self):
+        raise CommandException("A sparse segment tree can't be made persistent!")
+
+    def allocate_layout(self, capacity: Optional[int] = None):
+        """Allocate the per-node layout dicts used to position nodes on screen.
+
+        Args:
+            capacity (Optional[int]): Unused, the dicts grow with the tree.
+        """
+
+        self.original_x: dict[int, int] = {}
+        self.original_y: dict[int, int] = {}
+        self.preliminary_x: dict[int, float] = {}
+        self.modifier: dict[int, float] = {}
+        self.thread: dict[int, int] = {}
+        self.thread_modifier: dict[int, float] = {}
+
+    @contextmanager
+    def _restore_on_abort(self) -> Iterator[None]:
+        """Put the previous nodes back if the result length budget aborts the update run in the block.
+
+        There is no array to rebuild from, so the per-node dicts are copied instead,
+        and only for query functions declaring `result_bits_fn`.
+        """
+
+        if self._result_bits_fn is None:
+            yield
+            return
+
+        fields = ("data", "lazy_scale", "lazy_data", "low", "high", "uniform")
+        saved = {name: getattr(self, name).copy() for name in fields}
+        tagged_nodes = self.tagged_nodes.copy()
+
+        try:
+            yield
+        except CommandException:
+            for name, values in saved.items():
+                setattr(self, name, values)
+            self.tagged_nodes = tagged_nodes
+            self.layout_outdated = True
+            raise
+
+    def _create(self, ID: int, low: int, high: int, elem: int):
+        """Create a collapsed node whose elements all have the same value.
+
+        Args:
+            ID (int): The ID of the node.
+            low (int): The lower bound of the node's segment.
+            high (int): The upper bound of the node's segment.
+            elem (int): The value of every element of the segment.
+        """
+
+        self.data[ID] = self._uniform_value(elem, high - low + 1)
+        self.lazy_scale[ID] = 1
+        self.lazy_data[ID] = 0
+        self.low[ID] = low
+        self.high[ID] = high
+        self.uniform[ID] = elem
+
+    def _split(self, ID: int, low: int, high: int):
+        """Give a collapsed node two collapsed children sharing its value.
+
+        The node's tag must have been propagated beforehand.
+
+        Args:
+            ID (int): The ID of the node to split.
+            low (int): The lower bound of the node's segment.
+            high (int): The upper bound of the node's segment.
+        """
+
+        elem = self.uniform.pop(ID)
+        mid = (low+high) // 2
+
+        self._create(2*ID, low, mid, elem)
+        self._create(2*ID+1, mid+1, high, elem)
+        self.layout_outdated = True
+
+    def _collapse(self, ID: int, elem: int):
+        """Drop every node below a node, whose elements now all have the same value.
+
+        The node's own value must already be up to date.
+
+        Args:
+            ID (int): The ID of the node to collapse.
+            elem (int): The value of every element of the node's segment.
+        """
+
+        stack = [2*ID, 2*ID+1]
+
+        while stack:
+            child = stack.pop()
+            self.tagged_nodes.discard(child)
+
+            if self.uniform.pop(child, None) is None:
+                stack.extend((2*child, 2*child+1))
+
+            for field in (self.data, self.lazy_scale, self.lazy_data, self.low, self.high):
+                del field[child]
+
+        self.uniform[ID] = elem
+        self.layout_outdated = True
+
+    def _uniform_value(self, elem: int, length: int) -> int:
+        """Compute the value of a node over a segment whose elements all have the same value.
+
+        Segments of the same length split the same way, so the subtree below such
+        a node only has two distinct segment lengths per level and its value is
+        computed in O(log length) steps, for any query function. Values are kept
+        until the query function changes, since most nodes hold the default value.
+
+        Args:
+            elem (int): The value of every element of the segment.
+            length (int): The number of elements in the segment.
+
+        Returns:
+            int: The value the node would have in a fully built tree.
+        """
+
+        key = (elem, length)
+        value = self._uniform_values.get(key)
+
+        if value is None:
+            if length == 1:
+                value = elem
+            else:
+                value = self._fn(self._uniform_value(elem, (length+1) // 2), self._uniform_value(elem, length // 2))
+
+            self._uniform_values[key] = value
+
+        return value
+
+    def _update_segment_lazy(self, scale: int, val: int, ID: int, low: int, high: int, segment_low: int, segment_high: int):
+        self.propagate(ID)
+
+        if self._is_segment_invalid(segment_low, segment_high, low, high):
+            return
+        if self._is_segment_within_range(segment_low, segment_high, low, high):
+            self.data[ID] = self._apply_tag(self.data[ID], scale, val, high - low + 1)
+
+            if ID in self.uniform:
+                self.uniform[ID] = scale * self.uniform[ID] + val
+            elif scale == 0:
+                self._collapse(ID, val)
+            else:
+                self._compose_lazy(2*ID, scale, val)
+                self._compose_lazy(2*ID+1, scale, val)
+
+            return
+
+        if ID in self.uniform:
+            elem = self.uniform[ID]
+            if scale * elem + val == elem:
+                return
+
+            self._split(ID, low, high)
+
+        mid = (low+high) // 2
+        self._update_segment_lazy(scale, val, 2*ID, low, mid, segment_low, segment_high)
+        self._update_segment_lazy(scale, val, 2*ID+1, mid+1, high, segment_low, segment_high)
+        self.data[ID] = self._fn(self.data[2*ID], self.data[2*ID+1])
+
+    def _update_element_no_lazy(self, pos: int, val: int, ID: int, low: int, high: int) -> None:
+        self.propagate(ID)
+
+        if ID in self.uniform:
+            if self.uniform[ID] == val:
+                return
+
+            if low == high:
+                self.data[ID] = val
+                self.uniform[ID] = val
+                return
+
+            self._split(ID, low, high)
+
+        mid = (low+high) // 2
+        if pos <= mid:
+            self._update_element_no_lazy(pos, val, 2*ID, low, mid)
+            self.propagate(2*ID+1)
+        else:
+            self._update_element_no_lazy(pos, val, 2*ID+1, mid+1, high)
+            self.propagate(2*ID)
+
+        self.data[ID] = self._fn(self.data[2*ID], self.data[2*ID+1])
+
+    def _query(self, q_low: int, q_high: int, ID: int, low: int, high: int) -> int:
+        if self._is_segment_invalid(q_low, q_high, low, high):
+            return self._INVALID_QUERY
+
+        self.propagate(ID)
+
+        if self._is_segment_within_range(q_low, q_high, low, high):
+            return self.data[ID]
+
+        if ID in self.uniform:
+            return self._query_uniform(self.uniform[ID], q_low, q_high, low, high)
+
+        mid = (low+high) // 2
+
+        if q_high <= mid:
+            return self._query(q_low, q_high, 2*ID, low, mid)
+        if mid < q_low:
+            return self._query(q_low, q_high, 2*ID+1, mid+1, high)
+
+        left_child = self._query(q_low, q_high, 2*ID, low, mid)
+        right_child = self._query(q_low, q_high, 2*ID+1, mid+1, high)
+
+        return self._fn(left_child, right_child)
+
+    def _query_uniform(self, elem: int, q_low: int, q_high: int, low: int, high: int) -> int:
+        """Query a range of a segment whose elements all have the same value.
+
+        The nodes below the segment are walked as if they existed, so the result
+        is combined in the same order as in a fully built tree.
+
+        Args:
+            elem (int): The value of every element of the segment.
+            q_low (int): The lower bound of the query range.
+            q_high (int): The upper bound of the query range.
+            low (int): The lower bound of the segment.
+            high (int): The upper bound of the segment.
+
+        Returns:
+            int: The result of the query over the segment.
+        """
+
+        if self._is_segment_invalid(q_low, q_high, low, high):
+            return self._INVALID_QUERY
+
+        if self._is_segment_within_range(q_low, q_high, low, high):
+            return self._uniform_value(elem, high - low + 1)
+
+        mid = (low+high) // 2
+
+        if q_high <= mid:
+            return self._query_uniform(elem, q_low, q_high, low, mid)
+        if mid < q_low:
+            return self._query_uniform(elem, q_low, q_high, mid+1, high)
+
+        return self._fn(self._query_uniform(elem, q_low, q_high, low, mid),
+                        self._query_uniform(elem, q_low, q_high, mid+1, high))
+
+    def _value_at(self, pos: int) -> int:
+        """Get the current value of an element without propagating any tag.
+
+        Args:
+            pos (int): The position of the element.
+
+        Returns:
+            int: The value of the element.
+        """
+
+        scale, offset, ID = 1, 0, 1
+
+        while True:
+            # Tags deeper in the tree are older, so they are applied first.
+            offset += scale * self.lazy_data[ID]
+            scale *= self.lazy_scale[ID]
+
+            if ID in self.uniform:
+                return scale * self.uniform[ID] + offset
+
+            ID = 2*ID if pos <= self.high[2*ID] else 2*ID+1
+
+    def _values(self) -> Iterator[int]:
+        """Iterate over the current value of every element, in order.
+
+        Yields:
+            int: The value of each element.
+        """
+
+        if self.length == 0:
+            return
+
+        stack = [(1, 1, 0)]
+
+        while stack:
+            ID, scale, offset = stack.pop()
+            offset += scale * self.lazy_data[ID]
+            scale *= self.lazy_scale[ID]
+
+            if ID in self.uniform:
+                yield from repeat(scale * self.uniform[ID] + offset, self.high[ID] - self.low[ID] + 1)
+                continue
+
+            stack.append((2*ID+1, scale, offset))
+            stack.append((2*ID, scale, offset))
+
+class _ArrayView(SequenceABC):
+    """A read-only sequence over the virtual array of a `DynamicSegmentTree`."""
+
+    def __init__(self, tree: DynamicSegmentTree):
+        self.tree = tree
+
+    def __len__(self) -> int:
+        return self.tree.length
+
+    def __getitem__(self, pos: int) -> int:
+        if pos < 0:
+            pos += self.tree.length
+        if not 0 <= pos < self.tree.length:
+            raise IndexError("array index out of range")
+
+        return self.tree._value_at(pos)
+
+    def __iter__(self) -> Iterator[int]:
+        return self.tree._values()
+
+class _LeafIDView(SequenceABC):
+    """A read-only sequence giving the deepest existing node over each position of a `DynamicSegmentTree`."""
+
+    def __init__(self, tree: DynamicSegmentTree):
+        self.tree = tree
+
+    def __len__(self) -> int:
+        return self.tree.length
+
+    def __getitem__(self, pos: int) -> int:
+        tree, ID = self.tree, 1
+
+        while ID not in tree.uniform:
+            ID = 2*ID if pos <= tree.high[2*ID] else 2*ID+1
+
+        return ID
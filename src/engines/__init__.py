@@ -0,0 +1,6 @@
+from src.engines.sparse_table import SparseTable
+from src.engines.fenwick_tree import FenwickTree
+from src.engines.persistent_segment_tree import PersistentSegmentTree
+from src.engines.segment_tree_beats import SegmentTreeBeats
+from src.engines.wavelet_matrix import WaveletMatrix
+from src.engines.implicit_treap import ImplicitTreap
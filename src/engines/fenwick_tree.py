@@ -0,0 +1,168 @@
+import operator
+from typing import Callable, Optional, Sequence
+
+class FenwickTree:
+    """
+    Represents a Fenwick tree (binary indexed tree) answering range queries of an
+    invertible, commutative function. Slot i holds the result of the function
+    over the 2**k values ending at position i, k being the number of trailing
+    zeros of i, so a prefix is covered by O(log n) slots. A range is the prefix
+    ending at its upper bound with the prefix before it removed through the
+    inverse function, the empty prefix being the identity of the function.
+
+    Range increments are kept aside in two Fenwick trees of sums over the
+    difference array of the increments, the usual range-update/range-query
+    scheme, so they only make sense when the function itself is a sum.
+    """
+
+    def __init__(self, values: Sequence[int], fn: Callable[[int, int], int], inverse_fn: Callable[[int, int], int], identity: int):
+        """Build a Fenwick tree over the given values in O(n).
+
+        Args:
+            values (Sequence[int]): The values to answer queries on.
+            fn (Callable[[int, int], int]): The function combining two values.
+            inverse_fn (Callable[[int, int], int]): Removes its second argument from its
+                first, inverse_fn(fn(x, y), y) == x.
+            identity (int): The identity of `fn`, which every invertible function has.
+        """
+
+        self._fn = fn
+        self._inverse_fn = inverse_fn
+        self._increments: Optional[tuple['FenwickTree', 'FenwickTree']] = None
+
+        n = len(values)
+        tree = [identity]
+        tree.extend(values)
+
+        for i in range(1, n+1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] = fn(tree[parent], tree[i])
+
+        self.tree = tree
+
+    def __len__(self) -> int:
+        return len(self.tree) - 1
+
+    def add(self, pos: int, delta: int):
+        """Combine a value into the value at a position.
+
+        Args:
+            pos (int): The position to update.
+            delta (int): The value combined into the value at the position.
+        """
+
+        fn, tree, n = self._fn, self.tree, len(self)
+        i = pos + 1
+
+        while i <= n:
+            tree[i] = fn(tree[i], delta)
+            i += i & -i
+
+    def set(self, pos: int, val: int):
+        """Replace the value at a position.
+
+        Args:
+            pos (int): The position to update.
+            val (int): The new value at the position.
+        """
+
+        self.add(pos, self._inverse_fn(val, self.query(pos, pos)))
+
+    def add_range(self, val: int, low: int, high: int):
+        """Add a value to every element of a range, for sums only.
+
+        Args:
+            val (int): The value added to each element of the range.
+            low (int): The lower bound of the range.
+            high (int): The upper bound of the range.
+        """
+
+        if self._increments is None:
+            zeros = [0] * len(self)
+            self._increments = (FenwickTree(zeros, operator.add, operator.sub, 0),
+                                FenwickTree(zeros, operator.add, operator.sub, 0))
+
+        differences, weighted_differences = self._increments
+        differences.add(low, val)
+        weighted_differences.add(low, val * low)
+
+        if high+1 < len(self):
+            differences.add(high+1, -val)
+            weighted_differences.add(high+1, -val * (high+1))
+
+    def query(self, q_low: int, q_high: int) -> int:
+        """Compute the result of the function over a range.
+
+        Args:
+            q_low (int): The lower bound of the range, at least 0.
+            q_high (int): The upper bound of the range, at least `q_low` and less
+                than the number of values.
+
+        Returns:
+            int: The result of the function over the range.
+        """
+
+        return self._inverse_fn(self._prefix(q_high+1), self._prefix(q_low))
+
+    def values(self) -> list[int]:
+        """Recover every current value in O(n) by undoing the build.
+
+        Returns:
+            list[int]: The value at each position.
+        """
+
+        values = self._unbuild(self.tree, self._inverse_fn)
+
+        if self._increments is not None:
+            increment = 0
+            for i, difference in enumerate(self._unbuild(self._increments[0].tree, operator.sub)):
+                increment += difference
+                values[i] = self._fn(values[i], increment)
+
+        return values
+
+    def _prefix(self, length: int) -> int:
+        """Compute the result of the function over the first `length` values, the identity if there are none.
+
+        Args:
+            length (int): The number of values in the prefix.
+
+        Returns:
+            int: The result of the function over the prefix.
+        """
+
+        fn, tree = self._fn, self.tree
+        result, i = tree[length], length - (length & -length)
+
+        while i > 0:
+            result = fn(result, tree[i])
+            i -= i & -i
+
+        if self._increments is not None:
+            differences, weighted_differences = self._increments
+            result = fn(result, differences._prefix(length) * length - weighted_differences._prefix(length))
+
+        return result
+
+    @staticmethod
+    def _unbuild(tree: list[int], inverse_fn: Callable[[int, int], int]) -> list[int]:
+        """Recover the values a Fenwick tree holds by undoing its build in reverse order.
+
+        Args:
+            tree (list[int]): The slots of the Fenwick tree, slot 0 holding the identity.
+            inverse_fn (Callable[[int, int], int]): The inverse of the tree's function.
+
+        Returns:
+            list[int]: The value at each position.
+        """
+
+        values = list(tree)
+        n = len(values) - 1
+
+        for i in range(n, 0, -1):
+            parent = i + (i & -i)
+            if parent <= n:
+                values[parent] = inverse_fn(values[parent], values[i])
+
+        return values[1:]
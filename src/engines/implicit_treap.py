@@ -0,0 +1,295 @@
+import random
+from typing import Callable, Optional, Sequence
+
+class ImplicitTreap:
+    """
+    Represents an implicit treap holding a sequence of values, answering range
+    queries of an associative function while taking positional inserts and
+    removals. It is a binary search tree ordered by position, where positions
+    aren't stored but follow from the sizes of the subtrees, and a heap on random
+    priorities, which keeps its height O(log n) in expectation. Every node keeps
+    the result of the function over its subtree, so a range query, a point update,
+    an insert or a removal all cost O(log n) expected.
+
+    The nodes live in flat lists indexed by node number, 0 standing for no node.
+    The slots of removed nodes are reused by later inserts.
+    """
+
+    def __init__(self, values: Sequence[int], fn: Callable[[int, int], int]):
+        """Build a treap over the given values in O(n).
+
+        Args:
+            values (Sequence[int]): The values to answer queries on, in order.
+            fn (Callable[[int, int], int]): The associative function combining two values.
+        """
+
+        self._fn = fn
+        self._random = random.Random()
+        self._left: list[int] = [0]
+        self._right: list[int] = [0]
+        self._size: list[int] = [0]
+        self._priority: list[float] = [0.0]
+        self._value: list[int] = [0]
+        self._aggregate: list[int] = [0]
+        self._free: list[int] = []
+
+        self._root = self._build(values)
+
+    def __len__(self) -> int:
+        return self._size[self._root]
+
+    def query(self, q_low: int, q_high: int) -> int:
+        """Compute the result of the function over a range.
+
+        Args:
+            q_low (int): The lower bound of the range, at least 0.
+            q_high (int): The upper bound of the range, at least `q_low` and less
+                than the number of values.
+
+        Returns:
+            int: The result of the function over the range, combined from left to right.
+        """
+
+        return self._query(self._root, q_low, q_high)
+
+    def set(self, pos: int, val: int):
+        """Replace the value at a position.
+
+        Args:
+            pos (int): The position to update.
+            val (int): The new value at the position.
+        """
+
+        left, size, path = self._left, self._size, []
+        node = self._root
+
+        while True:
+            path.append(node)
+            left_size = size[left[node]]
+
+            if pos == left_size:
+                break
+
+            if pos < left_size:
+                node = left[node]
+            else:
+                pos -= left_size + 1
+                node = self._right[node]
+
+        self._value[node] = val
+
+        for node in reversed(path):
+            self._pull(node)
+
+    def splice(self, pos: int, values: Sequence[int]):
+        """Insert a sequence of values before a position.
+
+        Args:
+            pos (int): The position the first value is inserted at, between 0 and
+                the number of values.
+            values (Sequence[int]): The values to insert, in order.
+        """
+
+        before, after = self._split(self._root, pos)
+        self._root = self._merge(self._merge(before, self._build(values)), after)
+
+    def remove(self, pos: int) -> int:
+        """Remove the value at a position.
+
+        Args:
+            pos (int): The position of the value, at least 0 and less than the number of values.
+
+        Returns:
+            int: The removed value.
+        """
+
+        before, rest = self._split(self._root, pos)
+        removed, after = self._split(rest, 1)
+        self._root = self._merge(before, after)
+        self._free.append(removed)
+
+        return self._value[removed]
+
+    def values(self) -> list[int]:
+        """Get every value in order with an in-order walk of the treap.
+
+        Returns:
+            list[int]: The value at each position.
+        """
+
+        left, right, value = self._left, self._right, self._value
+        values: list[int] = []
+        stack: list[int] = []
+        node = self._root
+
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = left[node]
+
+            node = stack.pop()
+            values.append(value[node])
+            node = right[node]
+
+        return values
+
+    def _build(self, values: Sequence[int]) -> int:
+        """Build a treap over a sequence of values in O(n) and return its root.
+
+        Nodes are appended in order with random priorities; the nodes of the right
+        spine with a lower priority than the new node become its left subtree.
+        A node's subtree is complete once it leaves the spine, which is when its
+        size and aggregate are computed.
+
+        Args:
+            values (Sequence[int]): The values, in order.
+
+        Returns:
+            int: The root of the new treap, 0 if there are no values.
+        """
+
+        left, right, priority = self._left, self._right, self._priority
+        spine: list[int] = []
+
+        for val in values:
+            node = self._new_node(val)
+            last = 0
+
+            while spine and priority[spine[-1]] < priority[node]:
+                last = spine.pop()
+                self._pull(last)
+
+            left[node] = last
+            if spine:
+                right[spine[-1]] = node
+
+            spine.append(node)
+
+        for node in reversed(spine):
+            self._pull(node)
+
+        return spine[0] if spine else 0
+
+    def _new_node(self, val: int) -> int:
+        """Create a node without children holding a value.
+
+        Args:
+            val (int): The value of the node.
+
+        Returns:
+            int: The new node.
+        """
+
+        priority = self._random.random()
+
+        if self._free:
+            node = self._free.pop()
+            self._left[node] = self._right[node] = 0
+            self._size[node] = 1
+            self._priority[node] = priority
+            self._value[node] = self._aggregate[node] = val
+            return node
+
+        self._left.append(0)
+        self._right.append(0)
+        self._size.append(1)
+        self._priority.append(priority)
+        self._value.append(val)
+        self._aggregate.append(val)
+        return len(self._value) - 1
+
+    def _pull(self, node: int):
+        """Recompute the size and aggregate of a node from its children.
+
+        Args:
+            node (int): The node.
+        """
+
+        left, right = self._left[node], self._right[node]
+        aggregate = self._value[node]
+
+        if left:
+            aggregate = self._fn(self._aggregate[left], aggregate)
+        if right:
+            aggregate = self._fn(aggregate, self._aggregate[right])
+
+        self._size[node] = self._size[left] + self._size[right] + 1
+        self._aggregate[node] = aggregate
+
+    def _split(self, node: int, pos: int) -> tuple[int, int]:
+        """Split a treap into its first `pos` values and the rest.
+
+        Args:
+            node (int): The root of the treap.
+            pos (int): The number of values going to the first treap.
+
+        Returns:
+            tuple[int, int]: The roots of both treaps.
+        """
+
+        if not node:
+            return 0, 0
+
+        left_size = self._size[self._left[node]]
+
+        if pos <= left_size:
+            before, self._left[node] = self._split(self._left[node], pos)
+            self._pull(node)
+            return before, node
+
+        self._right[node], after = self._split(self._right[node], pos - left_size - 1)
+        self._pull(node)
+        return node, after
+
+    def _merge(self, before: int, after: int) -> int:
+        """Merge two treaps, every value of the first one coming first.
+
+        Args:
+            before (int): The root of the first treap.
+            after (int): The root of the second treap.
+
+        Returns:
+            int: The root of the merged treap.
+        """
+
+        if not before or not after:
+            return before or after
+
+        if self._priority[before] > self._priority[after]:
+            self._right[before] = self._merge(self._right[before], after)
+            self._pull(before)
+            return before
+
+        self._left[after] = self._merge(before, self._left[after])
+        self._pull(after)
+        return after
+
+    def _query(self, node: int, q_low: int, q_high: int) -> int:
+        """Compute the result of the function over a range of a subtree's values.
+
+        Args:
+            node (int): The root of the subtree.
+            q_low (int): The lower bound of the range, relative to the subtree.
+            q_high (int): The upper bound of the range, relative to the subtree.
+
+        Returns:
+            int: The result of the function over the range.
+        """
+
+        if q_low == 0 and q_high == self._size[node] - 1:
+            return self._aggregate[node]
+
+        left_size = self._size[self._left[node]]
+        result: Optional[int] = None
+
+        if q_low < left_size:
+            result = self._query(self._left[node], q_low, min(q_high, left_size-1))
+
+        if q_low <= left_size <= q_high:
+            result = self._value[node] if result is None else self._fn(result, self._value[node])
+
+        if q_high > left_size:
+            right_result = self._query(self._right[node], max(q_low - left_size - 1, 0), q_high - left_size - 1)
+            result = right_result if result is None else self._fn(result, right_result)
+
+        return result
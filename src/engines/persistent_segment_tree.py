@@ -0,0 +1,259 @@
+from array import array
+from typing import Callable, Optional, Sequence
+
+class PersistentSegmentTree:
+    """
+    Represents a pool of segment tree nodes shared by many versions of a tree.
+    Nodes are never modified once created: an update copies the O(log n) nodes
+    on its path and returns the root of the new version, every other node being
+    shared with the version it was made from.
+
+    Range increments are stored as permanent marks instead of lazy tags, since
+    pushing a tag down would modify shared nodes. A node's value includes the
+    increments marked on itself and below it, the increments marked on its
+    ancestors are added while walking down. Every version held by a pool uses
+    the same query function; a pool is needed per function.
+    """
+
+    def __init__(self, fn: Callable[[int, int], int], invalid_query_val: int,
+                 range_add_fn: Optional[Callable[[int, int, int], int]] = None):
+        """Create an empty pool of nodes.
+
+        Args:
+            fn (Callable[[int, int], int]): The function combining the values of two nodes.
+            invalid_query_val (int): The value of a query outside of the array.
+            range_add_fn (Optional[Callable[[int, int, int], int]]): How a range
+                increment acts on a node's value, see `QueryFunction.range_add_fn`.
+        """
+
+        self._fn = fn
+        self._INVALID_QUERY = invalid_query_val
+        self._range_add_fn = range_add_fn
+
+        self.data: list[int] = []
+        self.mark: list[int] = []
+        self.left = array("q")
+        self.right = array("q")
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def snapshot(self, heap_data: Sequence[int]) -> int:
+        """Add a version made of the nodes of a segment tree laid out by heap IDs.
+
+        The nodes are copied in one block in which the node with heap ID h is at
+        offset h, so the children of every node are found arithmetically without
+        walking the tree. The tree must not have any pending lazy tag.
+
+        Args:
+            heap_data (Sequence[int]): The value of every node, indexed by heap ID.
+
+        Returns:
+            int: The root of the new version.
+        """
+
+        base, capacity = len(self.data), len(heap_data)
+
+        self.data.extend(heap_data)
+        self.mark.extend([0] * capacity)
+        self.left.extend(range(base, base + 2*capacity, 2))
+        self.right.extend(range(base + 1, base + 2*capacity + 1, 2))
+
+        return base + 1
+
+    def build(self, values: Sequence[int]) -> int:
+        """Add a version holding the given values, built from scratch.
+
+        Used when the tree to save can't be copied as is, because it has pending
+        lazy tags or its node values are out of date.
+
+        Args:
+            values (Sequence[int]): The value at each position.
+
+        Returns:
+            int: The root of the new version.
+        """
+
+        if not values:
+            return self.snapshot([self._INVALID_QUERY] * 2)
+
+        return self._build(values, 0, len(values)-1)
+
+    def set(self, root: int, length: int, pos: int, val: int) -> int:
+        """Create a version where the value at a position is replaced.
+
+        Args:
+            root (int): The root of the version to update.
+            length (int): The length of the array of the version.
+            pos (int): The position to update.
+            val (int): The new value at the position.
+
+        Returns:
+            int: The root of the new version.
+        """
+
+        return self._set(root, 0, length-1, pos, val, 0)
+
+    def add_range(self, root: int, length: int, val: int, segment_low: int, segment_high: int) -> int:
+        """Create a version where a value is added to every element of a range.
+
+        Args:
+            root (int): The root of the version to update.
+            length (int): The length of the array of the version.
+            val (int): The value added to each element of the range.
+            segment_low (int): The lower bound of the range.
+            segment_high (int): The upper bound of the range.
+
+        Returns:
+            int: The root of the new version.
+        """
+
+        return self._add_range(root, 0, length-1, val, segment_low, segment_high)
+
+    def query(self, root: int, length: int, q_low: int, q_high: int) -> int:
+        """Query a range of a version, the same way `SegmentTree.query` walks the tree recursively.
+
+        Args:
+            root (int): The root of the version to query.
+            length (int): The length of the array of the version.
+            q_low (int): The lower bound of the range.
+            q_high (int): The upper bound of the range.
+
+        Returns:
+            int: The result of the query for the specified range.
+        """
+
+        return self._query(root, 0, length-1, q_low, q_high, 0)
+
+    def values(self, root: int, length: int) -> list[int]:
+        """Recover the array of a version.
+
+        Args:
+            root (int): The root of the version.
+            length (int): The length of the array of the version.
+
+        Returns:
+            list[int]: The value at each position.
+        """
+
+        values: list[int] = []
+        if length:
+            self._collect(root, 0, length-1, 0, values)
+
+        return values
+
+    def _copy(self, node: int) -> int:
+        """Append a copy of a node to the pool.
+
+        Args:
+            node (int): The node to copy.
+
+        Returns:
+            int: The copy.
+        """
+
+        self.data.append(self.data[node])
+        self.mark.append(self.mark[node])
+        self.left.append(self.left[node])
+        self.right.append(self.right[node])
+
+        return len(self.data) - 1
+
+    def _pull(self, node: int, length: int):
+        """Recompute a node's value from its children and its own mark.
+
+        Args:
+            node (int): The node to recompute.
+            length (int): The number of elements in the node's segment.
+        """
+
+        value = self._fn(self.data[self.left[node]], self.data[self.right[node]])
+        if self.mark[node]:
+            value = self._range_add_fn(value, self.mark[node], length)
+
+        self.data[node] = value
+
+    def _build(self, values: Sequence[int], low: int, high: int) -> int:
+        if low == high:
+            left = right = 0
+            value = values[low]
+        else:
+            mid = (low+high) // 2
+            left = self._build(values, low, mid)
+            right = self._build(values, mid+1, high)
+            value = self._fn(self.data[left], self.data[right])
+
+        self.data.append(value)
+        self.mark.append(0)
+        self.left.append(left)
+        self.right.append(right)
+
+        return len(self.data) - 1
+
+    def _set(self, node: int, low: int, high: int, pos: int, val: int, increment: int) -> int:
+        copy = self._copy(node)
+
+        if low == high:
+            self.data[copy] = val - increment
+            self.mark[copy] = 0
+            return copy
+
+        mid = (low+high) // 2
+        increment += self.mark[node]
+
+        if pos <= mid:
+            self.left[copy] = self._set(self.left[node], low, mid, pos, val, increment)
+        else:
+            self.right[copy] = self._set(self.right[node], mid+1, high, pos, val, increment)
+
+        self._pull(copy, high-low+1)
+        return copy
+
+    def _add_range(self, node: int, low: int, high: int, val: int, segment_low: int, segment_high: int) -> int:
+        if low > segment_high or high < segment_low:
+            return node
+
+        copy = self._copy(node)
+
+        if segment_low <= low and high <= segment_high:
+            self.data[copy] = self._range_add_fn(self.data[copy], val, high-low+1)
+            self.mark[copy] += val
+            return copy
+
+        mid = (low+high) // 2
+        self.left[copy] = self._add_range(self.left[node], low, mid, val, segment_low, segment_high)
+        self.right[copy] = self._add_range(self.right[node], mid+1, high, val, segment_low, segment_high)
+
+        self._pull(copy, high-low+1)
+        return copy
+
+    def _query(self, node: int, low: int, high: int, q_low: int, q_high: int, increment: int) -> int:
+        if low > high or low > q_high or high < q_low:
+            return self._INVALID_QUERY
+
+        if q_low <= low and high <= q_high:
+            if increment:
+                return self._range_add_fn(self.data[node], increment, high-low+1)
+            return self.data[node]
+
+        mid = (low+high) // 2
+        increment += self.mark[node]
+
+        if q_high <= mid:
+            return self._query(self.left[node], low, mid, q_low, q_high, increment)
+        if mid < q_low:
+            return self._query(self.right[node], mid+1, high, q_low, q_high, increment)
+
+        return self._fn(self._query(self.left[node], low, mid, q_low, q_high, increment),
+                        self._query(self.right[node], mid+1, high, q_low, q_high, increment))
+
+    def _collect(self, node: int, low: int, high: int, increment: int, values: list[int]):
+        if low == high:
+            values.append(self.data[node] + increment)
+            return
+
+        mid = (low+high) // 2
+        increment += self.mark[node]
+
+        self._collect(self.left[node], low, mid, increment, values)
+        self._collect(self.right[node], mid+1, high, increment, values)
@@ -0,0 +1,354 @@
+import math
+from typing import Sequence
+
+class SegmentTreeBeats:
+    """
+    Represents a segment tree beats (Ji's segment tree) answering sum, max and
+    min queries under range chmin, range chmax and range increments. Besides its
+    sum, every node keeps the largest value of its segment, the second largest
+    distinct value and how many times the largest occurs, and the same three
+    fields for the smallest values.
+
+    A chmin by v only has to stop at a node whose second largest value is below
+    v: the update then only lowers the occurrences of the largest value, so the
+    sum changes by a known amount and the children are fixed when the node is
+    pushed down. Otherwise it walks further, which merges at least two distinct
+    values of the segment; this bounds the amortized cost of an update by
+    O(log² n). Chmax is the mirror image on the smallest values.
+
+    The nodes use the heap IDs and midpoint split of `SegmentTree`, so the
+    fields of a node are those of the segment tree node with the same ID. A
+    missing second value is -inf for the maxima and inf for the minima.
+    """
+
+    def __init__(self, values: Sequence[int], leaf_ID: Sequence[int], capacity: int):
+        """Build the tree over the given values in O(n).
+
+        Args:
+            values (Sequence[int]): The value at each position.
+            leaf_ID (Sequence[int]): The ID of the leaf of each position in the segment tree.
+            capacity (int): The number of node slots of the segment tree.
+        """
+
+        self._length = len(values)
+
+        self.sum = [0] * capacity
+        self.max1 = [-math.inf] * capacity
+        self.max2 = [-math.inf] * capacity
+        self.max_count = [0] * capacity
+        self.min1 = [math.inf] * capacity
+        self.min2 = [math.inf] * capacity
+        self.min_count = [0] * capacity
+        self.lazy_add = [0] * capacity
+
+        internal = bytearray(capacity)
+
+        for pos, ID in enumerate(leaf_ID):
+            val = values[pos]
+            self.sum[ID] = self.max1[ID] = self.min1[ID] = val
+            self.max_count[ID] = self.min_count[ID] = 1
+
+            ID >>= 1
+            while ID and not internal[ID]:
+                internal[ID] = 1
+                ID >>= 1
+
+        for ID in range(capacity-1, 0, -1):
+            if internal[ID]:
+                self._pull(ID)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def chmin(self, val: int, low: int, high: int):
+        """Replace every value x of a range with min(x, val).
+
+        Args:
+            val (int): The upper bound given to the values of the range.
+            low (int): The lower bound of the range, at least 0.
+            high (int): The upper bound of the range, less than the number of values.
+        """
+
+        self._chmin(val, low, high, 1, 0, self._length-1)
+
+    def chmax(self, val: int, low: int, high: int):
+        """Replace every value x of a range with max(x, val).
+
+        Args:
+            val (int): The lower bound given to the values of the range.
+            low (int): The lower bound of the range, at least 0.
+            high (int): The upper bound of the range, less than the number of values.
+        """
+
+        self._chmax(val, low, high, 1, 0, self._length-1)
+
+    def add_range(self, val: int, low: int, high: int):
+        """Add a value to every element of a range.
+
+        Args:
+            val (int): The value added to each element of the range.
+            low (int): The lower bound of the range, at least 0.
+            high (int): The upper bound of the range, less than the number of values.
+        """
+
+        self._add_range(val, low, high, 1, 0, self._length-1)
+
+    def set(self, pos: int, val: int):
+        """Replace the value at a position.
+
+        Args:
+            pos (int): The position to update.
+            val (int): The new value at the position.
+        """
+
+        ID, low, high = 1, 0, self._length-1
+        path: list[int] = []
+
+        while low != high:
+            self._push(ID, low, high)
+            path.append(ID)
+
+            mid = (low+high) // 2
+            if pos <= mid:
+                ID, high = 2*ID, mid
+            else:
+                ID, low = 2*ID+1, mid+1
+
+        self.sum[ID] = self.max1[ID] = self.min1[ID] = val
+
+        for ID in reversed(path):
+            self._pull(ID)
+
+    def query(self, field: str, q_low: int, q_high: int) -> int:
+        """Compute the sum, max or min of a range.
+
+        Args:
+            field (str): Which aggregate to compute, "sum", "max" or "min".
+            q_low (int): The lower bound of the range, at least 0.
+            q_high (int): The upper bound of the range, at least `q_low` and less
+                than the number of values.
+
+        Returns:
+            int: The aggregate over the range.
+        """
+
+        if field == "sum":
+            fn, data = (lambda x, y: x + y), self.sum
+        elif field == "max":
+            fn, data = max, self.max1
+        else:
+            fn, data = min, self.min1
+
+        return self._query(fn, data, q_low, q_high, 1, 0, self._length-1)
+
+    def values(self) -> list[int]:
+        """Recover every current value in O(n), pushing every pending update down to the leaves.
+
+        Returns:
+            list[int]: The value at each position.
+        """
+
+        values: list[int] = []
+        if self._length:
+            self._collect(values, 1, 0, self._length-1)
+
+        return values
+
+    def fields(self, ID: int) -> dict[str, int | float]:
+        """Get the fields the tree keeps for a node.
+
+        The fields are exact for the node's whole segment even when updates are
+        still pending below it.
+
+        Args:
+            ID (int): The ID of the node.
+
+        Returns:
+            dict[str, int | float]: The node's sum, largest and second largest
+            values, count of the largest, and the same for the smallest values.
+        """
+
+        return {"sum": self.sum[ID],
+                "max": self.max1[ID], "second max": self.max2[ID], "max count": self.max_count[ID],
+                "min": self.min1[ID], "second min": self.min2[ID], "min count": self.min_count[ID]}
+
+    def _pull(self, ID: int):
+        """Recompute a node's fields from its children.
+
+        Args:
+            ID (int): The node to recompute.
+        """
+
+        left, right = 2*ID, 2*ID+1
+        max1, max2, max_count = self.max1, self.max2, self.max_count
+        min1, min2, min_count = self.min1, self.min2, self.min_count
+
+        self.sum[ID] = self.sum[left] + self.sum[right]
+
+        if max1[left] > max1[right]:
+            max1[ID], max_count[ID] = max1[left], max_count[left]
+            max2[ID] = max(max2[left], max1[right])
+        elif max1[left] < max1[right]:
+            max1[ID], max_count[ID] = max1[right], max_count[right]
+            max2[ID] = max(max1[left], max2[right])
+        else:
+            max1[ID], max_count[ID] = max1[left], max_count[left] + max_count[right]
+            max2[ID] = max(max2[left], max2[right])
+
+        if min1[left] < min1[right]:
+            min1[ID], min_count[ID] = min1[left], min_count[left]
+            min2[ID] = min(min2[left], min1[right])
+        elif min1[left] > min1[right]:
+            min1[ID], min_count[ID] = min1[right], min_count[right]
+            min2[ID] = min(min1[left], min2[right])
+        else:
+            min1[ID], min_count[ID] = min1[left], min_count[left] + min_count[right]
+            min2[ID] = min(min2[left], min2[right])
+
+    def _apply_add(self, ID: int, val: int, length: int):
+        """Add a value to every element of a node's segment, leaving the children to a later push.
+
+        Args:
+            ID (int): The node to update.
+            val (int): The value added.
+            length (int): The number of elements in the node's segment.
+        """
+
+        self.sum[ID] += val * length
+        self.max1[ID] += val
+        self.min1[ID] += val
+        self.lazy_add[ID] += val
+
+        if self.max2[ID] != -math.inf:
+            self.max2[ID] += val
+        if self.min2[ID] != math.inf:
+            self.min2[ID] += val
+
+    def _apply_chmin(self, ID: int, val: int):
+        """Lower the largest values of a node to `val`, which lies strictly between its two largest values.
+
+        Args:
+            ID (int): The node to update.
+            val (int): The new largest value.
+        """
+
+        max1 = self.max1[ID]
+        self.sum[ID] -= (max1 - val) * self.max_count[ID]
+
+        if self.min1[ID] == max1:
+            self.min1[ID] = val
+        elif self.min2[ID] == max1:
+            self.min2[ID] = val
+
+        self.max1[ID] = val
+
+    def _apply_chmax(self, ID: int, val: int):
+        """Raise the smallest values of a node to `val`, which lies strictly between its two smallest values.
+
+        Args:
+            ID (int): The node to update.
+            val (int): The new smallest value.
+        """
+
+        min1 = self.min1[ID]
+        self.sum[ID] += (val - min1) * self.min_count[ID]
+
+        if self.max1[ID] == min1:
+            self.max1[ID] = val
+        elif self.max2[ID] == min1:
+            self.max2[ID] = val
+
+        self.min1[ID] = val
+
+    def _push(self, ID: int, low: int, high: int):
+        """Pass the updates pending on a node to its children.
+
+        The increment is passed first; a child whose largest (smallest) value then
+        exceeds the node's was cut by a chmin (chmax) that stopped at the node.
+
+        Args:
+            ID (int): The node to push down.
+            low (int): The lower index of the node's segment.
+            high (int): The upper index of the node's segment.
+        """
+
+        left, right = 2*ID, 2*ID+1
+
+        if self.lazy_add[ID]:
+            mid = (low+high) // 2
+            self._apply_add(left, self.lazy_add[ID], mid-low+1)
+            self._apply_add(right, self.lazy_add[ID], high-mid)
+            self.lazy_add[ID] = 0
+
+        for child in (left, right):
+            if self.max1[child] > self.max1[ID]:
+                self._apply_chmin(child, self.max1[ID])
+            if self.min1[child] < self.min1[ID]:
+                self._apply_chmax(child, self.min1[ID])
+
+    def _chmin(self, val: int, s_low: int, s_high: int, ID: int, low: int, high: int):
+        if high < s_low or s_high < low or self.max1[ID] <= val:
+            return
+
+        if s_low <= low and high <= s_high and self.max2[ID] < val:
+            self._apply_chmin(ID, val)
+            return
+
+        self._push(ID, low, high)
+        mid = (low+high) // 2
+        self._chmin(val, s_low, s_high, 2*ID, low, mid)
+        self._chmin(val, s_low, s_high, 2*ID+1, mid+1, high)
+        self._pull(ID)
+
+    def _chmax(self, val: int, s_low: int, s_high: int, ID: int, low: int, high: int):
+        if high < s_low or s_high < low or self.min1[ID] >= val:
+            return
+
+        if s_low <= low and high <= s_high and self.min2[ID] > val:
+            self._apply_chmax(ID, val)
+            return
+
+        self._push(ID, low, high)
+        mid = (low+high) // 2
+        self._chmax(val, s_low, s_high, 2*ID, low, mid)
+        self._chmax(val, s_low, s_high, 2*ID+1, mid+1, high)
+        self._pull(ID)
+
+    def _add_range(self, val: int, s_low: int, s_high: int, ID: int, low: int, high: int):
+        if high < s_low or s_high < low:
+            return
+
+        if s_low <= low and high <= s_high:
+            self._apply_add(ID, val, high-low+1)
+            return
+
+        self._push(ID, low, high)
+        mid = (low+high) // 2
+        self._add_range(val, s_low, s_high, 2*ID, low, mid)
+        self._add_range(val, s_low, s_high, 2*ID+1, mid+1, high)
+        self._pull(ID)
+
+    def _query(self, fn, data: list, q_low: int, q_high: int, ID: int, low: int, high: int) -> int:
+        if q_low <= low and high <= q_high:
+            return data[ID]
+
+        self._push(ID, low, high)
+        mid = (low+high) // 2
+
+        if q_high <= mid:
+            return self._query(fn, data, q_low, q_high, 2*ID, low, mid)
+        if mid < q_low:
+            return self._query(fn, data, q_low, q_high, 2*ID+1, mid+1, high)
+
+        return fn(self._query(fn, data, q_low, q_high, 2*ID, low, mid),
+                  self._query(fn, data, q_low, q_high, 2*ID+1, mid+1, high))
+
+    def _collect(self, values: list[int], ID: int, low: int, high: int):
+        if low == high:
+            values.append(self.sum[ID])
+            return
+
+        self._push(ID, low, high)
+        mid = (low+high) // 2
+        self._collect(values, 2*ID, low, mid)
+        self._collect(values, 2*ID+1, mid+1, high)
@@ -0,0 +1,156 @@
+from typing import Callable, Optional, Sequence
+
+import numpy
+
+class SparseTable:
+    """
+    Represents a sparse table answering range queries of an idempotent function
+    in O(1). Level k holds the result of every range of 2**k elements, so any
+    range is covered by the two, possibly overlapping, ranges of the largest
+    power of two that fits in it. Overlapping is harmless because combining a
+    value with itself doesn't change the result of an idempotent function.
+
+    The table is built in O(n log n), one NumPy operation per level when the
+    function has a vectorized form and the values fit in an int64, with plain
+    Python lists otherwise. It is a read-only snapshot of the values it was built
+    from, so it has to be rebuilt after any of them changes.
+    """
+
+    def __init__(self, values: Sequence[int], fn: Callable[[int, int], int],
+                 vectorized_fn: Optional[Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray]] = None):
+        """Build a sparse table over the given values.
+
+        Args:
+            values (Sequence[int]): The values to answer queries on.
+            fn (Callable[[int, int], int]): The idempotent function combining two values.
+            vectorized_fn (Optional[Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray]]):
+                The element-wise NumPy form of `fn`, None if it doesn't have one.
+        """
+
+        self._fn = fn
+        self._vectorized_fn = vectorized_fn
+        self.levels: list[numpy.ndarray] | list[list[int]] = []
+
+        if vectorized_fn is not None:
+            try:
+                self._build_vectorized(values)
+                return
+            except OverflowError:
+                pass
+
+        self._vectorized_fn = None
+        self._build(values)
+
+    def __len__(self) -> int:
+        return len(self.levels[0]) if self.levels else 0
+
+    def query(self, q_low: int, q_high: int) -> int:
+        """Compute the result of the function over a range.
+
+        Args:
+            q_low (int): The lower bound of the range, at least 0.
+            q_high (int): The upper bound of the range, at least `q_low` and less
+                than the number of values.
+
+        Returns:
+            int: The result of the function over the range.
+        """
+
+        level = (q_high - q_low + 1).bit_length() - 1
+        values = self.levels[level]
+        other = q_high - (1 << level) + 1
+
+        if other == q_low:
+            return int(values[q_low])
+
+        return self._fn(int(values[q_low]), int(values[other]))
+
+    def query_many(self, lows: numpy.ndarray, highs: numpy.ndarray) -> list[int]:
+        """Compute the result of the function over a batch of ranges.
+
+        Ranges of the same level are combined with one NumPy operation. If a result
+        doesn't fit in an int64, the whole batch is answered one range at a time
+        with Python ints instead.
+
+        Args:
+            lows (numpy.ndarray): The lower bound of each range, as for `query`.
+            highs (numpy.ndarray): The upper bound of each range, as for `query`.
+
+        Returns:
+            list[int]: The result of each range, in the same order as the ranges.
+        """
+
+        if self._vectorized_fn is None:
+            return [self.query(int(q_low), int(q_high)) for q_low, q_high in zip(lows, highs)]
+
+        try:
+            return self._query_many_vectorized(lows, highs)
+        except OverflowError:
+            return [self.query(int(q_low), int(q_high)) for q_low, q_high in zip(lows, highs)]
+
+    def _query_many_vectorized(self, lows: numpy.ndarray, highs: numpy.ndarray) -> list[int]:
+        """Compute the result of the function over a batch of ranges, one NumPy operation per level.
+
+        Args:
+            lows (numpy.ndarray): The lower bound of each range, as for `query`.
+            highs (numpy.ndarray): The upper bound of each range, as for `query`.
+
+        Returns:
+            list[int]: The result of each range, in the same order as the ranges.
+
+        Raises:
+            OverflowError: If any of the results does not fit in an int64.
+        """
+
+        results = numpy.empty(len(lows), dtype=numpy.int64)
+        levels = numpy.frexp((highs - lows + 1).astype(numpy.float64))[1] - 1
+
+        for level in numpy.unique(levels):
+            selected = levels == level
+            q_low, q_high = lows[selected], highs[selected]
+            other = q_high - (1 << int(level)) + 1
+
+            values = self.levels[level]
+            combined = self._vectorized_fn(values[q_low], values[other])
+            results[selected] = numpy.where(other == q_low, values[q_low], combined)
+
+        return results.tolist()
+
+    def _build_vectorized(self, values: Sequence[int]):
+        """Build every level of the table with one NumPy operation per level.
+
+        Args:
+            values (Sequence[int]): The values to answer queries on.
+
+        Raises:
+            OverflowError: If a value does not fit in an int64, or is its minimum
+                whose absolute value doesn't.
+        """
+
+        level = numpy.asarray(values, dtype=numpy.int64)
+        if (level == numpy.iinfo(numpy.int64).min).any():
+            raise OverflowError("int64 minimum has no int64 absolute value")
+
+        self.levels = [level]
+        width = 1
+
+        while 2*width <= len(values):
+            level = self._vectorized_fn(level[:-width], level[width:])
+            self.levels.append(level)
+            width *= 2
+
+    def _build(self, values: Sequence[int]):
+        """Build every level of the table with Python ints.
+
+        Args:
+            values (Sequence[int]): The values to answer queries on.
+        """
+
+        fn, level = self._fn, list(values)
+        self.levels = [level]
+        width = 1
+
+        while 2*width <= len(values):
+            level = [fn(level[i], level[i+width]) for i in range(len(level) - width)]
+            self.levels.append(level)
+            width *= 2
@@ -0,0 +1,114 @@
+from bisect import bisect_left
+from typing import Sequence
+
+import numpy
+
+class WaveletMatrix:
+    """
+    Represents a wavelet matrix answering order statistics over ranges: the k-th
+    smallest value of a range and how many values of a range are below a bound.
+    Values are replaced by their rank among the distinct values, then every level
+    splits the ranks on one bit, from the most significant down, stably moving
+    those with the bit unset in front. Each level keeps, for every prefix of the
+    sequence, how many of its ranks had the bit unset, so a range maps to its
+    sub-range on the next level in O(1) and a query costs O(log σ), σ being the
+    number of distinct values.
+
+    It is built in O(n log σ) with one NumPy operation per level. Like the sparse
+    table it is a read-only snapshot of the values it was built from, so it has
+    to be rebuilt after any of them changes.
+    """
+
+    def __init__(self, values: Sequence[int]):
+        """Build a wavelet matrix over the given values.
+
+        Args:
+            values (Sequence[int]): The values to answer queries on.
+        """
+
+        try:
+            array = numpy.array(values, dtype=numpy.int64)
+        except OverflowError:
+            array = numpy.array(values, dtype=object)
+
+        distinct, ranks = numpy.unique(array, return_inverse=True)
+        self.distinct: list[int] = distinct.tolist()
+        self.zeros: list[int] = []
+        self.prefix_zeros: list[numpy.ndarray] = []
+
+        ranks = ranks.astype(numpy.int64).reshape(-1)
+        self._bits = max(len(self.distinct)-1, 0).bit_length()
+
+        for bit in range(self._bits-1, -1, -1):
+            unset = ((ranks >> bit) & 1) == 0
+            prefix_zeros = numpy.zeros(len(ranks)+1, dtype=numpy.int64)
+            numpy.cumsum(unset, out=prefix_zeros[1:])
+
+            self.prefix_zeros.append(prefix_zeros)
+            self.zeros.append(int(prefix_zeros[-1]))
+            ranks = numpy.concatenate((ranks[unset], ranks[~unset]))
+
+    def __len__(self) -> int:
+        return len(self.prefix_zeros[0]) - 1 if self.prefix_zeros else 0
+
+    def kth_smallest(self, q_low: int, q_high: int, k: int) -> int:
+        """Find the k-th smallest value of a range.
+
+        Args:
+            q_low (int): The lower bound of the range, at least 0.
+            q_high (int): The upper bound of the range, at least `q_low` and less
+                than the number of values.
+            k (int): The position of the value in the sorted range, 0 being the smallest.
+                At least 0 and less than the length of the range.
+
+        Returns:
+            int: The k-th smallest value of the range.
+        """
+
+        low, high, rank = q_low, q_high+1, 0
+
+        for level, prefix_zeros in enumerate(self.prefix_zeros):
+            low_zeros, high_zeros = int(prefix_zeros[low]), int(prefix_zeros[high])
+
+            if k < high_zeros - low_zeros:
+                low, high = low_zeros, high_zeros
+            else:
+                k -= high_zeros - low_zeros
+                rank |= 1 << (self._bits-1 - level)
+                low += self.zeros[level] - low_zeros
+                high += self.zeros[level] - high_zeros
+
+        return self.distinct[rank]
+
+    def count_less(self, q_low: int, q_high: int, x: int) -> int:
+        """Count the values of a range that are strictly less than a bound.
+
+        Args:
+            q_low (int): The lower bound of the range, at least 0.
+            q_high (int): The upper bound of the range, at least `q_low` and less
+                than the number of values.
+            x (int): The bound.
+
+        Returns:
+            int: The number of values of the range below `x`.
+        """
+
+        bound = bisect_left(self.distinct, x)
+        low, high = q_low, q_high+1
+
+        if bound >= len(self.distinct):
+            return high - low
+
+        count = 0
+
+        for level, prefix_zeros in enumerate(self.prefix_zeros):
+            low_zeros, high_zeros = int(prefix_zeros[low]), int(prefix_zeros[high])
+
+            if (bound >> (self._bits-1 - level)) & 1:
+                count += high_zeros - low_zeros
+                low += self.zeros[level] - low_zeros
+                high += self.zeros[level] - high_zeros
+            else:
+                low, high = low_zeros, high_zeros
+
+        return count
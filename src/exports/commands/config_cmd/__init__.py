@@ -1,4 +1,9 @@
 from src.exports.commands.config_cmd.query_fn import query_fn_cmd
+from src.exports.commands.config_cmd.modulus import modulus_cmd
+from src.exports.commands.config_cmd.traversal import traversal_cmd
+from src.exports.commands.config_cmd.engine import engine_cmd
+from src.exports.commands.config_cmd.build_workers import build_workers_cmd
+from src.exports.commands.config_cmd.persistent import persistent_cmd
 from src.exports.commands.config_cmd.list_queryfn import list_query_fn_cmd
 from src.exports.commands.config_cmd.list_theme import list_theme_cmd
 from src.exports.commands.config_cmd.theme import theme_cmd
@@ -8,6 +13,11 @@ from src.exports.commands.config_cmd.view_node_info import view_node_info_cmd
 
 exported_config_cmds = [
     query_fn_cmd,
+    modulus_cmd,
+    traversal_cmd,
+    engine_cmd,
+    build_workers_cmd,
+    persistent_cmd,
     list_query_fn_cmd,
     list_theme_cmd,
     theme_cmd,
@@ -0,0 +1,30 @@
+import argparse
+from typing import Optional
+
+from src.app_state.app_state import AppState
+from src.base_command import BaseCommand
+from src.exceptions import ArgumentError, CommandException
+
+class BuildWorkers(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="build-workers",
+            description="Set how many processes build the segment tree over large arrays, or print it when no count is given.",
+        )
+
+        self.parser.add_argument("count", type=int, nargs="?", default=None)
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            tree_manager = app_state.tree_manager
+
+            if parsed_args.count is None:
+                print(tree_manager.build_workers)
+                return
+
+            tree_manager.set_build_workers(parsed_args.count)
+        except (ArgumentError, CommandException) as e:
+            return e
+
+build_workers_cmd = BuildWorkers()
\ No newline at end of file
@@ -0,0 +1,25 @@
+import argparse
+from typing import Optional
+
+from src.utils import QueryEngineEnum
+from src.app_state.app_state import AppState
+from src.base_command import BaseCommand
+from src.exceptions import ArgumentError, CommandException
+
+class Engine(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="engine",
+            description="Set the engine answering range queries, the segment tree stays the drawn model.",
+        )
+
+        self.parser.add_argument("engine", type=str, choices=[engine.value for engine in QueryEngineEnum])
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            app_state.tree_manager.segment_tree.set_engine(QueryEngineEnum(parsed_args.engine))
+        except (ArgumentError, CommandException) as e:
+            return e
+
+engine_cmd = Engine()
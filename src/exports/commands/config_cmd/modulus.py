@@ -0,0 +1,30 @@
+import argparse
+from typing import Optional
+
+from src.app_state.app_state import AppState
+from src.base_command import BaseCommand
+from src.exceptions import ArgumentError, CommandException
+
+class Modulus(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="modulus",
+            description="Set the modulus of add_mod, mul_mod and pow_mod, or print it when no value is given.",
+        )
+
+        self.parser.add_argument("value", type=int, nargs="?", default=None)
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            tree_manager = app_state.tree_manager
+
+            if parsed_args.value is None:
+                print(tree_manager.modulus)
+                return
+
+            tree_manager.set_modulus(parsed_args.value)
+        except (ArgumentError, CommandException) as e:
+            return e
+
+modulus_cmd = Modulus()
\ No newline at end of file
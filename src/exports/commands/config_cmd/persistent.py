@@ -0,0 +1,29 @@
+import argparse
+from typing import Optional
+
+from src.app_state.app_state import AppState
+from src.base_command import BaseCommand
+from src.exceptions import ArgumentError, CommandException
+
+class Persistent(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="persistent",
+            description="Turn on or off saving a version of the segment tree after every update. Turning it off drops the history.",
+        )
+
+        self.parser.add_argument("mode", type=str, choices=["on", "off"])
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            segment_tree = app_state.tree_manager.segment_tree
+
+            if parsed_args.mode == "on":
+                segment_tree.enable_persistence()
+            else:
+                segment_tree.disable_persistence()
+        except (ArgumentError, CommandException) as e:
+            return e
+
+persistent_cmd = Persistent()
@@ -20,10 +20,17 @@ class QueryFN(BaseCommand):
             tree_manager = app_state.tree_manager
             segment_tree = app_state.tree_manager.segment_tree
 
+            previous_function = tree_manager.current_function.name
             tree_manager.switch_function(parsed_args.fn_name)
-            segment_tree.rebuild()
-            tree_manager.generate_node_position()
-            tree_manager.compute_transformed_coordinates()
+
+            try:
+                segment_tree.rebuild()
+            except CommandException:
+                tree_manager.switch_function(previous_function)
+                segment_tree.rebuild(save_version=False)
+                raise
+
+            tree_manager.refresh_layout()
             tree_manager.center_tree()
         except (ArgumentError, CommandException) as e:
             return e
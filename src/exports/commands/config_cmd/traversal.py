@@ -0,0 +1,25 @@
+import argparse
+from typing import Optional
+
+from src.utils import TraversalEnum
+from src.app_state.app_state import AppState
+from src.base_command import BaseCommand
+from src.exceptions import ArgumentError, CommandException
+
+class Traversal(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="traversal",
+            description="Set how the segment tree walks its nodes for point updates and range queries.",
+        )
+
+        self.parser.add_argument("mode", type=str, choices=[mode.value for mode in TraversalEnum])
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            app_state.tree_manager.segment_tree.traversal = TraversalEnum(parsed_args.mode)
+        except (ArgumentError, CommandException) as e:
+            return e
+
+traversal_cmd = Traversal()
@@ -1,5 +1,7 @@
 from src.exports.commands.rendering_cmd.highlight_range import highlight_range_cmd
+from src.exports.commands.rendering_cmd.benchmark_layout import benchmark_layout_cmd
 
 exported_rendering_cmds = [
-    highlight_range_cmd
+    highlight_range_cmd,
+    benchmark_layout_cmd
 ]
\ No newline at end of file
@@ -0,0 +1,32 @@
+import argparse
+from typing import Optional
+
+from src.app_state.app_state import AppState
+from src.base_command import BaseCommand
+from src.exceptions import ArgumentError, CommandException
+
+class BenchmarkLayout(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="benchmark-layout",
+            description="Time the layout of segment trees over 10, 100, ... up to 10^max_exponent elements, in closed form and node by node.",
+        )
+
+        self.parser.add_argument("max_exponent", type=int, default=5, nargs='?')
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+
+            if parsed_args.max_exponent < 1:
+                raise CommandException(f"The largest exponent must be at least 1, got {parsed_args.max_exponent}!")
+
+            lengths = [10**exponent for exponent in range(1, parsed_args.max_exponent+1)]
+
+            print(f"{'length':>12} {'closed form':>14} {'node by node':>14}")
+            for length, closed_form, node_by_node in app_state.tree_manager.benchmark_layout(lengths):
+                print(f"{length:>12} {closed_form*1000:>12.2f}ms {node_by_node*1000:>12.2f}ms")
+        except (ArgumentError, CommandException) as e:
+            return e
+
+benchmark_layout_cmd = BenchmarkLayout()
\ No newline at end of file
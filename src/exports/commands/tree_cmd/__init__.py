@@ -1,21 +1,51 @@
 from src.exports.commands.tree_cmd.insert import insert_cmd
 from src.exports.commands.tree_cmd.remove import remove_cmd
 from src.exports.commands.tree_cmd.replace import replace_cmd
+from src.exports.commands.tree_cmd.replace_many import replace_many_cmd
+from src.exports.commands.tree_cmd.set_array import set_array_cmd
+from src.exports.commands.tree_cmd.sparse import sparse_cmd
+from src.exports.commands.tree_cmd.load import load_cmd
 from src.exports.commands.tree_cmd.query import query_cmd
+from src.exports.commands.tree_cmd.query_many import query_many_cmd
+from src.exports.commands.tree_cmd.kth import kth_cmd
+from src.exports.commands.tree_cmd.count_less import count_less_cmd
 from src.exports.commands.tree_cmd.extend import extend_cmd
 from src.exports.commands.tree_cmd.clear import clear_cmd
 from src.exports.commands.tree_cmd.home import home_cmd
+from src.exports.commands.tree_cmd.goto import goto_cmd
 from src.exports.commands.tree_cmd.update_range import update_range_cmd
+from src.exports.commands.tree_cmd.set_range import set_range_cmd
+from src.exports.commands.tree_cmd.affine_range import affine_range_cmd
+from src.exports.commands.tree_cmd.chmin_range import chmin_range_cmd
+from src.exports.commands.tree_cmd.chmax_range import chmax_range_cmd
 from src.exports.commands.tree_cmd.propagate import propagate_cmd
+from src.exports.commands.tree_cmd.undo import undo_cmd
+from src.exports.commands.tree_cmd.redo import redo_cmd
+from src.exports.commands.tree_cmd.versions import versions_cmd
 
 exported_tree_cmds = [
     insert_cmd,
     remove_cmd,
     replace_cmd,
+    replace_many_cmd,
+    set_array_cmd,
+    sparse_cmd,
+    load_cmd,
     update_range_cmd,
+    set_range_cmd,
+    affine_range_cmd,
+    chmin_range_cmd,
+    chmax_range_cmd,
     query_cmd,
+    query_many_cmd,
+    kth_cmd,
+    count_less_cmd,
     extend_cmd,
     clear_cmd,
     home_cmd,
-    propagate_cmd
+    goto_cmd,
+    propagate_cmd,
+    undo_cmd,
+    redo_cmd,
+    versions_cmd
 ]
\ No newline at end of file
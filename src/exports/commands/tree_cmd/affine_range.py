@@ -0,0 +1,30 @@
+import argparse
+from typing import Optional
+
+from src.app_state.app_state import AppState
+from src.base_command import BaseCommand
+from src.exceptions import ArgumentError, CommandException
+
+class AffineRange(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="affine-range",
+            description="Update a segment by replacing each element x with scale * x + value."
+        )
+
+        self.parser.add_argument("segment_low", type=int)
+        self.parser.add_argument("segment_high", type=int)
+        self.parser.add_argument("scale", type=int)
+        self.parser.add_argument("value", type=int)
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            tree_manager = app_state.tree_manager
+            tree_manager.segment_tree.affine_segment_lazy(parsed_args.scale, parsed_args.value,
+                                                          parsed_args.segment_low, parsed_args.segment_high)
+            tree_manager.refresh_layout()
+        except (ArgumentError, CommandException) as e:
+            return e
+
+affine_range_cmd = AffineRange()
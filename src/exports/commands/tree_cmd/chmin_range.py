@@ -0,0 +1,28 @@
+import argparse
+from typing import Optional
+
+from src.app_state.app_state import AppState
+from src.base_command import BaseCommand
+from src.exceptions import ArgumentError, CommandException
+
+class ChMinRange(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="chmin-range",
+            description="Replace each element of a segment by the min of itself and a value, with the beats engine."
+        )
+
+        self.parser.add_argument("segment_low", type=int)
+        self.parser.add_argument("segment_high", type=int)
+        self.parser.add_argument("value", type=int)
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            tree_manager = app_state.tree_manager
+            tree_manager.segment_tree.chmin_segment(parsed_args.value, parsed_args.segment_low, parsed_args.segment_high)
+            tree_manager.refresh_layout()
+        except (ArgumentError, CommandException) as e:
+            return e
+
+chmin_range_cmd = ChMinRange()
\ No newline at end of file
@@ -13,9 +13,14 @@ class Clear(BaseCommand):
 
     def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
         tree_manager = app_state.tree_manager
-        tree_manager.segment_tree.array.clear()
+
+        if tree_manager.is_sparse:
+            tree_manager.use_dense_tree([])
+            return
+
+        tree_manager.segment_tree.array = []
+        tree_manager.segment_tree.rebuild()
         tree_manager.generate_node_position()
-        tree_manager.compute_transformed_coordinates()
         tree_manager.center_tree()
 
 clear_cmd = Clear()
\ No newline at end of file
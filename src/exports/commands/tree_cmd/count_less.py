@@ -0,0 +1,27 @@
+import argparse
+from typing import Optional
+
+from src.base_command import BaseCommand
+from src.app_state.app_state import AppState
+from src.exceptions import ArgumentError, CommandException
+
+class CountLess(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="count-less",
+            description="Count the elements of a given range that are strictly less than a value.",
+        )
+
+        self.parser.add_argument("low", type=int)
+        self.parser.add_argument("high", type=int)
+        self.parser.add_argument("x", type=int)
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            segment_tree = app_state.tree_manager.segment_tree
+            print(segment_tree.count_less(parsed_args.low, parsed_args.high, parsed_args.x))
+        except (ArgumentError, CommandException) as e:
+            return e
+
+count_less_cmd = CountLess()
\ No newline at end of file
@@ -21,15 +21,11 @@ class Extend(BaseCommand):
             tree_manager = app_state.tree_manager
             segment_tree = tree_manager.segment_tree
 
-            index_to_extend = len(segment_tree.array)
+            index_to_extend = segment_tree.array_length
             if (parsed_args.index != -1):
                 index_to_extend = parsed_args.index
 
-            segment_tree.array[index_to_extend:index_to_extend] = parsed_args.sequence
-            segment_tree.rebuild()
-            tree_manager.generate_node_position()
-            tree_manager.compute_transformed_coordinates()
-            tree_manager.center_tree()
+            segment_tree.splice(index_to_extend, parsed_args.sequence)
         except (ArgumentError, CommandException) as e:
             return e
 
@@ -0,0 +1,39 @@
+import argparse
+from typing import Optional
+
+from src.base_command import BaseCommand
+from src.app_state.app_state import AppState
+from src.exceptions import ArgumentError, CommandException
+
+class Goto(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="goto",
+            description="Move the tree so that the leaf of an array index is centered, or the node with a given ID if --id is set."
+        )
+
+        self.parser.add_argument("target", type=int)
+        self.parser.add_argument("--id", "-id", action="store_true")
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            tree_manager = app_state.tree_manager
+            tree_manager.refresh_layout()
+            segment_tree = tree_manager.segment_tree
+
+            if parsed_args.id:
+                if not segment_tree.has_node(parsed_args.target):
+                    raise CommandException(f"Node with ID {parsed_args.target} doesn't exist!")
+
+                tree_manager.focus_node(parsed_args.target)
+                return
+
+            if not 0 <= parsed_args.target < segment_tree.array_length:
+                raise CommandException(f"Index {parsed_args.target} is out of range!")
+
+            tree_manager.focus_node(segment_tree.leaf_ID[parsed_args.target])
+        except (ArgumentError, CommandException) as e:
+            return e
+
+goto_cmd = Goto()
@@ -12,6 +12,8 @@ class Home(BaseCommand):
         )
 
     def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
-        app_state.tree_manager.center_tree()
+        tree_manager = app_state.tree_manager
+        tree_manager.refresh_layout()
+        tree_manager.center_tree()
 
 home_cmd = Home()
\ No newline at end of file
@@ -21,15 +21,11 @@ class Insert(BaseCommand):
             tree_manager = app_state.tree_manager
             segment_tree = tree_manager.segment_tree
 
-            index_to_insert = len(segment_tree.array)
+            index_to_insert = segment_tree.array_length
             if (parsed_args.index != -1):
                 index_to_insert = parsed_args.index
 
-            segment_tree.array.insert(index_to_insert, parsed_args.value)
-            segment_tree.rebuild()
-            tree_manager.generate_node_position()
-            tree_manager.compute_transformed_coordinates()
-            tree_manager.center_tree()
+            segment_tree.insert(index_to_insert, parsed_args.value)
         except (ArgumentError, CommandException) as e:
             return e
 
@@ -0,0 +1,27 @@
+import argparse
+from typing import Optional
+
+from src.base_command import BaseCommand
+from src.app_state.app_state import AppState
+from src.exceptions import ArgumentError, CommandException
+
+class Kth(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="kth",
+            description="Find the k-th smallest element of a given range, k = 1 being the smallest.",
+        )
+
+        self.parser.add_argument("low", type=int)
+        self.parser.add_argument("high", type=int)
+        self.parser.add_argument("k", type=int)
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            segment_tree = app_state.tree_manager.segment_tree
+            print(segment_tree.kth_smallest(parsed_args.low, parsed_args.high, parsed_args.k))
+        except (ArgumentError, CommandException) as e:
+            return e
+
+kth_cmd = Kth()
\ No newline at end of file
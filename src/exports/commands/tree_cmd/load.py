@@ -0,0 +1,24 @@
+import argparse
+from typing import Optional
+
+from src.base_command import BaseCommand
+from src.app_state.app_state import AppState
+from src.exceptions import ArgumentError, CommandException
+
+class Load(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="load",
+            description="Replace the array with one memory-mapped from a .npy file or a raw file of little-endian int64 values.",
+        )
+
+        self.parser.add_argument("path", type=str)
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            app_state.tree_manager.load_array(parsed_args.path)
+        except (ArgumentError, CommandException) as e:
+            return e
+
+load_cmd = Load()
@@ -1,6 +1,5 @@
 import argparse
 from typing import Optional
-from collections import deque
 
 from src.base_command import BaseCommand
 from src.app_state.app_state import AppState
@@ -14,17 +13,6 @@ class Propagate(BaseCommand):
         )
 
     def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
-        segment_tree = app_state.tree_manager.segment_tree
-        queue = deque([segment_tree.root])
-
-        while queue:
-            node = queue.popleft()
-            segment_tree.propagate(node)
-
-            if node.is_leaf():
-                continue
-
-            for child in node.children:
-                queue.append(child)
+        app_state.tree_manager.segment_tree.propagate_all()
 
 propagate_cmd = Propagate()
\ No newline at end of file
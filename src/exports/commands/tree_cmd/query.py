@@ -9,17 +9,22 @@ class Query(BaseCommand):
     def __init__(self):
         super().__init__(
             name="query",
-            description="Query the segment tree for value from a given range.",
+            description="Query the segment tree for value from a given range, or a saved version of it with --at.",
         )
 
         self.parser.add_argument("low", type=int)
         self.parser.add_argument("high", type=int)
+        self.parser.add_argument("--at", type=int, default=None, metavar="VERSION")
 
     def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
         try:
             parsed_args: argparse.Namespace = self.parser.parse_args(args)
             segment_tree = app_state.tree_manager.segment_tree
-            print(segment_tree.query(parsed_args.low, parsed_args.high))
+
+            if parsed_args.at is not None:
+                print(segment_tree.query_at(parsed_args.at, parsed_args.low, parsed_args.high))
+            else:
+                print(segment_tree.query(parsed_args.low, parsed_args.high))
         except (ArgumentError, CommandException) as e:
             return e
 
@@ -0,0 +1,56 @@
+import argparse
+from typing import Optional
+from itertools import islice
+
+from src.utils import const
+from src.base_command import BaseCommand
+from src.app_state.app_state import AppState
+from src.exceptions import ArgumentError, CommandException
+
+class QueryMany(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="query-many",
+            description="Answer the ranges listed in a file, one 'low high' pair per line, and write one result per line to an output file.",
+        )
+
+        self.parser.add_argument("path", type=str)
+        self.parser.add_argument("-o", "--output", "-output", type=str, default=None)
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            segment_tree = app_state.tree_manager.segment_tree
+            output_path = parsed_args.output or f"{parsed_args.path}.out"
+            answered = 0
+
+            try:
+                with open(parsed_args.path) as ranges_file, open(output_path, "w") as output_file:
+                    while lines := list(islice(ranges_file, const.BATCH_CHUNK_SIZE)):
+                        lows, highs = self._parse_ranges(lines, answered)
+                        results = segment_tree.query_many(lows, highs)
+                        output_file.writelines(f"{result}\n" for result in results)
+                        answered += len(lines)
+            except OSError as e:
+                raise CommandException(str(e))
+
+            print(f"Answered {answered} queries, results written to {output_path}")
+        except (ArgumentError, CommandException) as e:
+            return e
+
+    def _parse_ranges(self, lines: list[str], first_line_number: int) -> tuple[list[int], list[int]]:
+        lows: list[int] = []
+        highs: list[int] = []
+
+        for line_number, line in enumerate(lines, start=first_line_number+1):
+            try:
+                low, high = map(int, line.split())
+            except ValueError:
+                raise CommandException(f"Line {line_number} is not a 'low high' pair: {line.strip()!r}")
+
+            lows.append(low)
+            highs.append(high)
+
+        return lows, highs
+
+query_many_cmd = QueryMany()
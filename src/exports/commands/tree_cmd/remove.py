@@ -20,15 +20,11 @@ class Remove(BaseCommand):
             tree_manager = app_state.tree_manager
             segment_tree = tree_manager.segment_tree
             
-            index_to_remove = len(segment_tree.array)-1
+            index_to_remove = segment_tree.array_length-1
             if (parsed_args.index != -1):
                 index_to_remove = parsed_args.index
 
-            segment_tree.array.pop(index_to_remove)
-            segment_tree.rebuild()
-            tree_manager.generate_node_position()
-            tree_manager.compute_transformed_coordinates()
-            tree_manager.center_tree()
+            segment_tree.remove(index_to_remove)
         except (ArgumentError, CommandException) as e:
             return e
 
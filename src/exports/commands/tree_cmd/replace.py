@@ -18,8 +18,9 @@ class Replace(BaseCommand):
     def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
         try:
             parsed_args: argparse.Namespace = self.parser.parse_args(args)
-            segment_tree = app_state.tree_manager.segment_tree
-            segment_tree.update_element_no_lazy(parsed_args.index, parsed_args.value)
+            tree_manager = app_state.tree_manager
+            tree_manager.segment_tree.update_element_no_lazy(parsed_args.index, parsed_args.value)
+            tree_manager.refresh_layout()
         except (ArgumentError, CommandException) as e:
             return e
 
@@ -0,0 +1,38 @@
+import argparse
+from typing import Optional
+
+from src.app_state.app_state import AppState
+from src.base_command import BaseCommand
+from src.exceptions import ArgumentError, CommandException
+
+class ReplaceMany(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="replace-many",
+            description="Replace the elements at several indices at once, given as 'index value' pairs.",
+        )
+
+        self.parser.add_argument("pairs", type=int, nargs="+")
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            tree_manager = app_state.tree_manager
+            segment_tree = tree_manager.segment_tree
+
+            if len(parsed_args.pairs) % 2 != 0:
+                raise CommandException("Expected 'index value' pairs, got an odd number of integers!")
+
+            positions = parsed_args.pairs[0::2]
+            values = parsed_args.pairs[1::2]
+
+            for pos in positions:
+                if not 0 <= pos < segment_tree.array_length:
+                    raise CommandException(f"Index {pos} is out of range!")
+
+            segment_tree.update_many(positions, values)
+            tree_manager.refresh_layout()
+        except (ArgumentError, CommandException) as e:
+            return e
+
+replace_many_cmd = ReplaceMany()
@@ -0,0 +1,49 @@
+import argparse
+from typing import Optional
+
+from src.app_state.app_state import AppState
+from src.base_command import BaseCommand
+from src.exceptions import ArgumentError, CommandException
+
+class SetArray(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="set-array",
+            description="Replace the whole array. If the length doesn't change, only the elements that differ are updated. Leaves sparse mode.",
+        )
+
+        self.parser.add_argument("sequence", type=int, nargs="+")
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+            tree_manager = app_state.tree_manager
+            segment_tree = tree_manager.segment_tree
+            new_array: list[int] = parsed_args.sequence
+
+            if tree_manager.is_sparse:
+                tree_manager.use_dense_tree(new_array)
+                return
+
+            if len(new_array) == segment_tree.array_length:
+                positions = [idx for idx, (old, new) in enumerate(zip(segment_tree.array, new_array)) if old != new]
+                if positions:
+                    segment_tree.update_many(positions, [new_array[idx] for idx in positions])
+                return
+
+            previous_array = segment_tree.array
+            segment_tree.array = new_array
+
+            try:
+                segment_tree.rebuild()
+            except CommandException:
+                segment_tree.array = previous_array
+                segment_tree.rebuild(save_version=False)
+                raise
+
+            tree_manager.generate_node_position()
+            tree_manager.center_tree()
+        except (ArgumentError, CommandException) as e:
+            return e
+
+set_array_cmd = SetArray()
@@ -0,0 +1,29 @@
+import argparse
+from typing import Optional
+
+from src.base_command import BaseCommand
+from src.app_state.app_state import AppState
+from src.exceptions import ArgumentError, CommandException
+
+class Sparse(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="sparse",
+            description="Replace the array with a virtual one of the given length where every element has the default value. Nodes are only created where updates reach, set-array or clear go back to a regular tree.",
+        )
+
+        self.parser.add_argument("length", type=int)
+        self.parser.add_argument("default", type=int, default=0, nargs="?")
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            parsed_args: argparse.Namespace = self.parser.parse_args(args)
+
+            if parsed_args.length <= 0:
+                raise CommandException("The length of a sparse array must be positive!")
+
+            app_state.tree_manager.use_sparse_tree(parsed_args.length, parsed_args.default)
+        except (ArgumentError, CommandException) as e:
+            return e
+
+sparse_cmd = Sparse()
@@ -0,0 +1,26 @@
+from typing import Optional
+
+from src.base_command import BaseCommand
+from src.app_state.app_state import AppState
+from src.exceptions import ArgumentError, CommandException
+
+class Undo(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="undo",
+            description="Restore the segment tree to the version before the current one, requires persistent mode.",
+        )
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            tree_manager = app_state.tree_manager
+            segment_tree = tree_manager.segment_tree
+
+            if segment_tree.persistent and segment_tree.version_index == 0:
+                raise CommandException("Nothing to undo!")
+
+            tree_manager.checkout_version(segment_tree.version_index-1)
+        except (ArgumentError, CommandException) as e:
+            return e
+
+undo_cmd = Undo()
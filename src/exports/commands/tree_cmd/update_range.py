@@ -19,7 +19,9 @@ class UpdateRange(BaseCommand):
     def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
         try:
             parsed_args: argparse.Namespace = self.parser.parse_args(args)
-            app_state.tree_manager.segment_tree.update_segment_lazy(parsed_args.value, parsed_args.segment_low, parsed_args.segment_high)
+            tree_manager = app_state.tree_manager
+            tree_manager.segment_tree.update_segment_lazy(parsed_args.value, parsed_args.segment_low, parsed_args.segment_high)
+            tree_manager.refresh_layout()
         except (ArgumentError, CommandException) as e:
             return e
 
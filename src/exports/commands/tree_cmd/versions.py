@@ -0,0 +1,27 @@
+from typing import Optional
+
+from src.base_command import BaseCommand
+from src.app_state.app_state import AppState
+from src.exceptions import ArgumentError, CommandException
+
+class Versions(BaseCommand):
+    def __init__(self):
+        super().__init__(
+            name="versions",
+            description="List the saved versions of the segment tree, the current one being marked with a *.",
+        )
+
+    def execute(self, args: list[str], app_state: AppState) -> Optional[ArgumentError | CommandException]:
+        try:
+            segment_tree = app_state.tree_manager.segment_tree
+
+            if not segment_tree.persistent:
+                raise CommandException("Persistent mode is off, no version is saved!")
+
+            for index, version in enumerate(segment_tree.versions):
+                marker = "*" if index == segment_tree.version_index else " "
+                print(f"{marker} {index}: {version.label} ({version.function.name}, length {version.length})")
+        except (ArgumentError, CommandException) as e:
+            return e
+
+versions_cmd = Versions()
@@ -1 +1,2 @@
-from src.exports.query_functions.core_query_functions import exported_core_query_functions
\ No newline at end of file
+from src.exports.query_functions.core_query_functions import exported_core_query_functions
+from src.exports.query_functions.modular_query_functions import exported_modular_query_functions, modular_query_functions
\ No newline at end of file
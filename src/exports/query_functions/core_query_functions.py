@@ -1,24 +1,168 @@
 import math
+from typing import Optional
 
+import numpy
+
+from src.utils import const
 from src.dataclass import QueryFunction
 
-min_f = QueryFunction(name="min_f", description="min(x, y)", fn=min, invalid_query_val=-1)
-max_f = QueryFunction(name="max_f", description="max(x, y)", fn=max, invalid_query_val=-1)
+INT64_MAX: int = numpy.iinfo(numpy.int64).max
+
+def checked_add(x: numpy.ndarray, y: numpy.ndarray) -> numpy.ndarray:
+    """Element-wise x + y over int64 arrays that refuses to wrap around.
+
+    A signed addition overflowed exactly when both operands have the same
+    sign and the result has the other one.
+
+    Raises:
+        OverflowError: If any of the sums does not fit in an int64.
+    """
+
+    result = x + y
+
+    if (((x ^ result) & (y ^ result)) < 0).any():
+        raise OverflowError("int64 overflow in x + y")
+
+    return result
+
+def checked_lcm(x: numpy.ndarray, y: numpy.ndarray) -> numpy.ndarray:
+    """Element-wise lcm(x, y) over int64 arrays that refuses to wrap around.
+
+    lcm(x, y) is |x| / gcd(x, y) * |y|, so it fits in an int64 as long as
+    |y| is not larger than INT64_MAX divided by the first factor.
+
+    Raises:
+        OverflowError: If any of the results does not fit in an int64.
+    """
+
+    gcd = numpy.gcd(x, y)
+    reduced = numpy.abs(x) // numpy.where(gcd == 0, 1, gcd)
+
+    if (numpy.abs(y) > INT64_MAX // numpy.where(reduced == 0, 1, reduced)).any():
+        raise OverflowError("int64 overflow in lcm(x, y)")
+
+    return numpy.lcm(x, y)
+
+def add_to_each(aggregate: int, val: int, length: int) -> int:
+    """Range increment on a sum: every element of the segment contributes `val` once."""
+
+    return aggregate + val * length
+
+def add_once(aggregate: int, val: int, length: int) -> int:
+    """Range increment on a minimum or maximum: the extreme element moves by `val`."""
+
+    return aggregate + val
+
+def assign_sum(val: int, length: int) -> int:
+    """Range assignment on a sum: `length` copies of `val`."""
+
+    return val * length
+
+def assign_product(val: int, length: int) -> int:
+    """Range assignment on a product: `length` copies of `val`.
+
+    Raises:
+        OverflowError: If the product would be longer than `MAX_RESULT_BITS`.
+    """
+
+    check_power_bits(val, length)
+    return val ** length
+
+def assign_same(val: int, length: int) -> int:
+    """Range assignment on an idempotent function: combining `val` with itself gives `val`."""
+
+    return val
+
+def assign_abs(val: int, length: int) -> int:
+    """Range assignment on gcd and lcm: a leaf keeps its sign, gcd(v, v) and lcm(v, v) are |v|."""
+
+    return val if length == 1 else abs(val)
+
+def assign_xor(val: int, length: int) -> int:
+    """Range assignment on xor: pairs of equal values cancel each other out."""
+
+    return val if length % 2 == 1 else 0
+
+def scale_each(aggregate: int, factor: int, length: int) -> int:
+    """Range multiplication on a sum: the sum is multiplied by the factor."""
+
+    return aggregate * factor
+
+def scale_product(aggregate: int, factor: int, length: int) -> int:
+    """Range multiplication on a product: every element contributes the factor once.
+
+    Raises:
+        OverflowError: If the product would be longer than `MAX_RESULT_BITS`.
+    """
+
+    check_power_bits(factor, length, aggregate.bit_length())
+    return aggregate * factor ** length
+
+def scale_order_preserving(aggregate: int, factor: int, length: int) -> Optional[int]:
+    """Range multiplication on a minimum or maximum, only possible when the order of the elements is kept."""
+
+    return aggregate * factor if factor > 0 else None
+
+def product_bits(x: int, y: int) -> int:
+    """Bit length bound of x * y and lcm(x, y): the bit lengths of the operands add up."""
+
+    return x.bit_length() + y.bit_length()
+
+def power_bits(x: int, y: int) -> int:
+    """Bit length bound of x ** y: |x| ** y has at most y times as many bits as |x|.
+
+    Powers of 0, 1 and -1, and powers by an exponent below 2 or that isn't an integer,
+    are not longer than their base.
+    """
+
+    if isinstance(x, int) and isinstance(y, int) and y > 1 and abs(x) > 1:
+        return x.bit_length() * y
+
+    return 0
+
+def check_power_bits(base: int, exponent: int, extra_bits: int = 0):
+    """Refuse a power before computing it if it, times a number of `extra_bits`, could be longer than `MAX_RESULT_BITS`.
+
+    Raises:
+        OverflowError: If the bound given by `power_bits` is too long.
+    """
+
+    if power_bits(base, exponent) + extra_bits > const.MAX_RESULT_BITS:
+        raise OverflowError(f"{base} ** {exponent} is longer than {const.MAX_RESULT_BITS} bits")
+
+min_f = QueryFunction(name="min_f", description="min(x, y)", fn=min, invalid_query_val=-1, vectorized_fn=numpy.minimum,
+                      range_add_fn=add_once, range_assign_fn=assign_same, range_scale_fn=scale_order_preserving,
+                      associative=True, commutative=True, idempotent=True, beats_field="min")
+max_f = QueryFunction(name="max_f", description="max(x, y)", fn=max, invalid_query_val=-1, vectorized_fn=numpy.maximum,
+                      range_add_fn=add_once, range_assign_fn=assign_same, range_scale_fn=scale_order_preserving,
+                      associative=True, commutative=True, idempotent=True, beats_field="max")
 
-add_f = QueryFunction(name="add_f", description="x + y", fn=lambda x, y: x + y, invalid_query_val=0)
+add_f = QueryFunction(name="add_f", description="x + y", fn=lambda x, y: x + y, invalid_query_val=0, vectorized_fn=checked_add,
+                      range_add_fn=add_to_each, range_assign_fn=assign_sum, range_scale_fn=scale_each,
+                      associative=True, commutative=True, identity=0, inverse_fn=lambda x, y: x - y, beats_field="sum")
 sub_f = QueryFunction(name="sub_f", description="x - y", fn=lambda x, y: x - y, invalid_query_val=0)
-mul_f = QueryFunction(name="mul_f", description="x * y", fn=lambda x, y: x * y, invalid_query_val=-1)
-exp_f = QueryFunction(name="exp_f", description="x ** y", fn=lambda x, y: x ** y,invalid_query_val=-1)
+mul_f = QueryFunction(name="mul_f", description="x * y", fn=lambda x, y: x * y, invalid_query_val=-1,
+                      range_assign_fn=assign_product, range_scale_fn=scale_product,
+                      associative=True, commutative=True, identity=1, result_bits_fn=product_bits)
+exp_f = QueryFunction(name="exp_f", description="x ** y", fn=lambda x, y: x ** y,invalid_query_val=-1,
+                      result_bits_fn=power_bits)
 mod_f = QueryFunction(name="mod_f", description="x % y", fn=lambda x, y: x % y, invalid_query_val=-1)
 
-and_f = QueryFunction(name="and_f", description="x & y", fn=lambda x, y: x & y, invalid_query_val=-1)
-or_f  = QueryFunction(name="or_f",  description="x | y", fn=lambda x, y: x | y, invalid_query_val=-1)
-xor_f = QueryFunction(name="xor_f", description="x ^ y", fn=lambda x, y: x ^ y, invalid_query_val=-1)
+and_f = QueryFunction(name="and_f", description="x & y", fn=lambda x, y: x & y, invalid_query_val=-1, vectorized_fn=numpy.bitwise_and,
+                      range_assign_fn=assign_same, associative=True, commutative=True, identity=-1, idempotent=True)
+or_f  = QueryFunction(name="or_f",  description="x | y", fn=lambda x, y: x | y, invalid_query_val=-1, vectorized_fn=numpy.bitwise_or,
+                      range_assign_fn=assign_same, associative=True, commutative=True, identity=0, idempotent=True)
+xor_f = QueryFunction(name="xor_f", description="x ^ y", fn=lambda x, y: x ^ y, invalid_query_val=-1, vectorized_fn=numpy.bitwise_xor,
+                      range_assign_fn=assign_xor, associative=True, commutative=True, identity=0, inverse_fn=lambda x, y: x ^ y)
 
-lcm_f = QueryFunction(name="lcm_f", description="Least Common Multiple of x and y", fn=math.lcm, invalid_query_val=-1)
-gcd_f = QueryFunction(name="gcd_f", description="Greatest Common Divisor of x and y", fn=math.gcd, invalid_query_val=1)
+lcm_f = QueryFunction(name="lcm_f", description="Least Common Multiple of x and y", fn=math.lcm, invalid_query_val=-1, vectorized_fn=checked_lcm,
+                      range_assign_fn=assign_abs, associative=True, commutative=True, identity=1, idempotent=True,
+                      result_bits_fn=product_bits)
+gcd_f = QueryFunction(name="gcd_f", description="Greatest Common Divisor of x and y", fn=math.gcd, invalid_query_val=1, vectorized_fn=numpy.gcd,
+                      range_assign_fn=assign_abs, associative=True, commutative=True, identity=0, idempotent=True)
 
-avg_f = QueryFunction(name="avg_f", description="The arithmetic mean of x and y", fn=lambda x, y: int((x+y)/2), invalid_query_val=0)
+avg_f = QueryFunction(name="avg_f", description="The arithmetic mean of x and y", fn=lambda x, y: int((x+y)/2), invalid_query_val=0,
+                      commutative=True)
 
 exported_core_query_functions: list[QueryFunction] = [
     min_f,
@@ -0,0 +1,84 @@
+from typing import Callable
+
+import numpy
+
+from src.utils import const
+from src.dataclass import QueryFunction
+from src.exports.query_functions.core_query_functions import INT64_MAX
+
+def add_mod_vectorized(modulus: int) -> Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray]:
+    """Element-wise (x + y) mod m over int64 arrays; the reduced operands add up to less than 2m."""
+
+    def fn(x: numpy.ndarray, y: numpy.ndarray) -> numpy.ndarray:
+        return (x % modulus + y % modulus) % modulus
+
+    return fn
+
+def mul_mod_vectorized(modulus: int) -> Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray]:
+    """Element-wise (x * y) mod m over int64 arrays; the reduced operands multiply to less than m²."""
+
+    def fn(x: numpy.ndarray, y: numpy.ndarray) -> numpy.ndarray:
+        return (x % modulus) * (y % modulus) % modulus
+
+    return fn
+
+def pow_mod_vectorized(modulus: int) -> Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray]:
+    """Element-wise x ** (y mod m) mod m over int64 arrays, by squaring every base once per bit of the exponents."""
+
+    mul_mod = mul_mod_vectorized(modulus)
+
+    def fn(x: numpy.ndarray, y: numpy.ndarray) -> numpy.ndarray:
+        base, exponent = x % modulus, y % modulus
+        result = numpy.full_like(base, 1 % modulus)
+
+        while (exponent > 0).any():
+            odd = (exponent & 1) == 1
+            result[odd] = mul_mod(result[odd], base[odd])
+            base = mul_mod(base, base)
+            exponent >>= 1
+
+        return result
+
+    return fn
+
+def reduce_unless_leaf(value: int, length: int, modulus: int) -> int:
+    """Reduce the value of a segment modulo m, unless the segment is a single leaf, which keeps the element itself."""
+
+    return value if length == 1 else value % modulus
+
+def modular_query_functions(modulus: int) -> list[QueryFunction]:
+    """Create the query functions computing modulo a given modulus.
+
+    Their results always lie in [0, modulus), so they stay as long as the modulus
+    however many values are combined. The vectorized forms are only given when
+    every intermediate value fits in an int64. A leaf keeps its element as is,
+    so the range update functions leave single elements unreduced.
+
+    Args:
+        modulus (int): The modulus, at least 2.
+
+    Returns:
+        list[QueryFunction]: add_mod, mul_mod and pow_mod for this modulus.
+    """
+
+    m = modulus
+    products_fit = (m-1) * (m-1) <= INT64_MAX
+    sums_fit = 2 * (m-1) <= INT64_MAX
+
+    add_mod = QueryFunction(name="add_mod", description=f"(x + y) mod {m}", fn=lambda x, y: (x+y) % m, invalid_query_val=0,
+                            vectorized_fn=add_mod_vectorized(m) if sums_fit else None,
+                            range_add_fn=lambda aggregate, val, length: reduce_unless_leaf(aggregate + val*length, length, m),
+                            range_assign_fn=lambda val, length: reduce_unless_leaf(val*length, length, m),
+                            range_scale_fn=lambda aggregate, factor, length: reduce_unless_leaf(aggregate*factor, length, m),
+                            associative=True, commutative=True, identity=0)
+    mul_mod = QueryFunction(name="mul_mod", description=f"(x * y) mod {m}", fn=lambda x, y: (x % m) * (y % m) % m, invalid_query_val=-1,
+                            vectorized_fn=mul_mod_vectorized(m) if products_fit else None,
+                            range_assign_fn=lambda val, length: val if length == 1 else pow(val, length, m),
+                            range_scale_fn=lambda aggregate, factor, length: aggregate*factor if length == 1 else aggregate * pow(factor, length, m) % m,
+                            associative=True, commutative=True, identity=1)
+    pow_mod = QueryFunction(name="pow_mod", description=f"x ** (y mod {m}) mod {m}", fn=lambda x, y: pow(x, y % m, m), invalid_query_val=-1,
+                            vectorized_fn=pow_mod_vectorized(m) if products_fit else None)
+
+    return [add_mod, mul_mod, pow_mod]
+
+exported_modular_query_functions: list[QueryFunction] = modular_query_functions(const.DEFAULT_MODULUS)
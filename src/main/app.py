@@ -18,11 +18,12 @@ class App:
     of the application.
     """
 
-    def __init__(self):
+    def __init__(self, array_path: Optional[str] = None):
         self.previous_mouse_pos = (0, 0)
         self.current_mouse_pos = (0, 0)
+        self.hover_pos: tuple[int, int] = pg.mouse.get_pos()
 
-        self.app_state = AppState()
+        self.app_state = AppState(array_path)
         tree_manager = self.app_state.tree_manager
         theme_manager = self.app_state.theme_manager
         cmdline_interface = self.app_state.cmdline_interface
@@ -39,8 +40,8 @@ class App:
         """Processes user input events for the application.
 
         This method handles various types of input events, including mouse
-        wheel scrolling for zooming, window resizing, and command input from the command
-        line interface. It updates the application state based on user interactions
+        wheel scrolling for zooming, mouse motion for hovering, window resizing, and command
+        input from the command line interface. It updates the application state based on user interactions
         and manages panning when the command box is not focused.
 
         Args:
@@ -53,6 +54,9 @@ class App:
             if event.type == pg.MOUSEWHEEL and not cmdline_interface.command_box.UI.is_focused:
                 self.zoom(event.y)
 
+            if event.type == pg.MOUSEMOTION:
+                self.hover_pos = event.pos
+
             if event.type == pg.VIDEORESIZE:
                 self.on_window_size_changed()
 
@@ -69,9 +73,12 @@ class App:
 
         This method refreshes the user interface by updating the command
         line interface, requesting the current theme for rendering, and
-        drawing the segment tree along with its associated data. It also
-        handles the display of any hovered node information and ensures
-        the UI is drawn correctly on the screen.
+        drawing the segment tree along with its associated data. The tree is
+        laid out again first if updates since the last frame changed its shape,
+        commands only marking the layout as outdated. The hovered
+        node is only picked again after the mouse or the camera moved, and is
+        shared by the tree, the array and the node information views. It also
+        ensures the UI is drawn correctly on the screen.
 
         Args:
             dt_time (float): The elapsed time since the last update,
@@ -87,9 +94,11 @@ class App:
         rendering.request_theme(theme_manager.current_theme)
 
         pygame_window.fill_background(theme_manager.current_theme.BACKGROUND_CLR)
+        tree_manager.refresh_layout()
 
         if tree_manager.segment_tree.array_length != 0:
-            hovered_node: Optional[Node] = rendering.draw_tree(tree_manager.segment_tree.root)
+            hovered_node: Optional[Node] = tree_manager.hovered_node(self.hover_pos)
+            rendering.draw_tree(tree_manager, hovered_node)
             rendering.view_array(tree_manager.segment_tree.array, hovered_node)
             rendering.view_hovered_node_info(hovered_node)
 
@@ -112,28 +121,26 @@ class App:
         This method increases or decreases the zoom level of the tree
         visualization depending on the direction of the mouse wheel scroll.
         It ensures that the zoom level remains within predefined minimum
-        and maximum limits and updates the transformed coordinates accordingly.
+        and maximum limits. Only the camera changes, whatever the size of the tree.
 
         Args:
             y (int): The amount of scroll input from the mouse wheel, where
             positive values indicate zooming in and negative values indicate zooming out.
         """
 
-        tree_manager = self.app_state.tree_manager
+        camera = self.app_state.tree_manager.camera
 
         if (y > 0):
-            tree_manager.zoom_level = min(tree_manager.zoom_level+const.ZOOM_INTENSITY, const.MAX_ZOOM_LEVEL)
+            camera.zoom_level = min(camera.zoom_level+const.ZOOM_INTENSITY, const.MAX_ZOOM_LEVEL)
         else:
-            tree_manager.zoom_level = max(tree_manager.zoom_level-const.ZOOM_INTENSITY, const.MIN_ZOOM_LEVEL)
-
-        tree_manager.compute_transformed_coordinates()
+            camera.zoom_level = max(camera.zoom_level-const.ZOOM_INTENSITY, const.MIN_ZOOM_LEVEL)
 
     def pan(self):
         """Handles panning of the tree visualization based on mouse movement.
 
         This method allows the user to move the tree view by clicking and dragging
-        the mouse. It calculates the change in mouse position and updates the tree's
-        position accordingly, ensuring that the view remains responsive to user input.
+        the mouse. It calculates the change in mouse position and moves the camera
+        accordingly, ensuring that the view remains responsive to user input.
         """
 
         tree_manager = self.app_state.tree_manager
@@ -151,6 +158,7 @@ class App:
         delta_x = self.current_mouse_pos[0] - self.previous_mouse_pos[0]
         delta_y = self.current_mouse_pos[1] - self.previous_mouse_pos[1]
 
-        tree_manager.move_tree_by_delta_pos(delta_x, delta_y)
+        if delta_x or delta_y:
+            tree_manager.camera.move(delta_x, delta_y)
+
         self.previous_mouse_pos = self.current_mouse_pos
-        tree_manager.compute_transformed_coordinates()
@@ -1,50 +1,193 @@
+from array import array
+from contextlib import contextmanager
+from heapq import heapify, heappop, heappush
+from typing import Callable, Iterator, Optional, Sequence
+
+import numpy
+
+from src.utils import TraversalEnum, QueryEngineEnum, const, build_in_parallel, parallel_build_supported, Int64Values, SparseValues
+from src.engines import SparseTable, FenwickTree, PersistentSegmentTree, SegmentTreeBeats, WaveletMatrix, ImplicitTreap
+from src.exceptions import CommandException
 from src.dataclass import Node
-from src.dataclass import QueryFunction 
+from src.dataclass import QueryFunction
+from src.dataclass import Version
 
 class SegmentTree:
     """
-    Represents a segment tree data structure that allows for efficient range 
-    queries and updates on an array. This class provides methods to initialize 
+    Represents a segment tree data structure that allows for efficient range
+    queries and updates on an array. This class provides methods to initialize
     the tree, perform queries, update values, and rebuild the tree as needed.
+
+    Nodes are not stored as objects. Every per-node field (data, lazy value,
+    segment bounds and layout coordinates) lives in a flat array indexed by the
+    node's heap-style ID, where the root is 1 and the children of a node are
+    2*ID and 2*ID+1. Lightweight `Node` views over these arrays are handed out
+    by `root` and `node` for code that prefers to walk the tree.
     """
 
-    def __init__(self, array: list[int], function_obj: QueryFunction):
+    def __init__(self, array: list[int] | numpy.ndarray, function_obj: QueryFunction, build_workers: int = 1):
         """Initialize a segment tree with the given array and function object.
 
-        This constructor sets up the segment tree by storing the input array and 
-        defining the function used for queries. It initializes the root node and 
-        builds the segment tree structure based on the provided array.
+        This constructor sets up the segment tree by storing the input array and
+        defining the function used for queries. It allocates the flat node storage
+        and builds the segment tree structure based on the provided array. The
+        array can be a NumPy array, typically one mapped from a file by `map_array`;
+        the tree is then built straight from it and it is only copied into a list
+        once its length changes or a value no longer fits in an int64.
 
         Args:
-            array (list[int]): The array of integers to be represented in the segment tree.
-            function_obj (QueryFunction): An object containing the function used for 
+            array (list[int] | numpy.ndarray): The array of integers to be represented in the segment tree.
+            function_obj (QueryFunction): An object containing the function used for
             combining values and the value to return for invalid queries.
+            build_workers (int): The number of processes building large arrays, 1
+            to always build in this process.
+        """
+
+        self._array = array
+        self._array_synced = True
+        self.traversal = TraversalEnum.RECURSIVE
+        self.engine = QueryEngineEnum.SEGMENT_TREE
+        self.build_workers = build_workers
+        self._fenwick_tree: Optional[FenwickTree] = None
+        self._beats_tree: Optional[SegmentTreeBeats] = None
+        self._sequence_tree: Optional[ImplicitTreap] = None
+        self._wavelet_matrix: Optional[WaveletMatrix] = None
+        self._tree_stale = False
+        self.layout_outdated = False
+        self.persistent = False
+        self.versions: list[Version] = []
+        self.version_index = -1
+        self._pools: dict[QueryFunction, PersistentSegmentTree] = {}
+        self.allocate_layout(0)
+
+        self.switch_function(function_obj)
+        self._build()
+
+    @property
+    def array(self) -> list[int] | numpy.ndarray:
+        """Get the current values of the underlying array.
+
+        Range updates only leave lazy tags in the tree, so the array isn't written
+        to when they happen. It is brought up to date the first time it is read
+        afterwards, from the leaves and the tags pending on their ancestors, then
+        kept as is until the next range update. The returned array is the backing
+        array itself, so its values can be edited in place before a `rebuild`.
+
+        Returns:
+            list[int] | numpy.ndarray: The values currently represented by the segment tree.
         """
 
-        self.array = array
-        self.root = Node()
+        if not self._array_synced:
+            self._sync_array()
 
-        self._fn = function_obj.fn
-        self._INVALID_QUERY = function_obj.invalid_query_val
-        self._build(self.root, 0, self.array_length-1)
+        return self._array
+
+    @array.setter
+    def array(self, array: list[int] | numpy.ndarray):
+        self._array = array
+        self._array_synced = True
+        self._sequence_tree = None
 
     @property
     def array_length(self) -> int:
         """Get the length of the underlying array.
 
-        This property returns the number of elements in the array associated with 
-        the segment tree. It provides a convenient way to access the size of the 
-        array without directly interacting with it.
+        This property returns the number of elements in the array associated with
+        the segment tree. It provides a convenient way to access the size of the
+        array without directly interacting with it. While the sequence engine holds
+        the values, the backing array may be behind, so the length is the engine's.
 
         Returns:
             int: The length of the array.
         """
 
-        return len(self.array)
+        if self._sequence_tree is not None:
+            return len(self._sequence_tree)
+
+        return len(self._array)
+
+    @property
+    def capacity(self) -> int:
+        """Get the number of slots allocated for every per-node array.
+
+        Valid node IDs are always in the range [1, capacity), although not
+        every ID in that range belongs to a node.
+
+        Returns:
+            int: The length of the per-node arrays.
+        """
+
+        return len(self.low)
+
+    @property
+    def root(self) -> Node:
+        """Get a view of the root node of the segment tree.
+
+        Returns:
+            Node: A view over the node with ID 1.
+        """
+
+        self.materialize()
+        return Node(self, 1)
+
+    def node(self, ID: int) -> Node:
+        """Get a view of the node with the given ID.
+
+        Args:
+            ID (int): The heap-style identifier of the node.
+
+        Returns:
+            Node: A view over the node's slots in the flat arrays.
+        """
+
+        self.materialize()
+        return Node(self, ID)
+
+    def has_node(self, ID: int) -> bool:
+        """Check whether a node with the given ID exists in the tree.
+
+        Args:
+            ID (int): The heap-style identifier to check.
+
+        Returns:
+            bool: True if the ID refers to a node of the current tree, otherwise False.
+        """
+
+        return 0 < ID < self.capacity and self.low[ID] <= self.high[ID]
+
+    def is_leaf(self, ID: int) -> bool:
+        """Check whether the node with the given ID is a leaf.
+
+        Args:
+            ID (int): The heap-style identifier of an existing node.
+
+        Returns:
+            bool: True if the node manages a single element, otherwise False.
+        """
+
+        return self.low[ID] == self.high[ID]
+
+    def node_ids(self) -> Iterator[int]:
+        """Iterate over the IDs of every node in the tree in breadth-first order.
+
+        Because children always have larger IDs than their parent and nodes
+        on the same level are numbered from left to right, increasing ID order
+        is the same order a breadth-first traversal would visit the nodes in.
+
+        Yields:
+            int: The ID of the next node.
+        """
+
+        self.materialize()
+        low, high = self.low, self.high
+
+        for ID in range(1, self.capacity):
+            if low[ID] <= high[ID]:
+                yield ID
 
     def switch_function(self, function_obj: QueryFunction):
         """
-        Switches the function used for queries in the segment tree. This method 
+        Switches the function used for queries in the segment tree. This method
         updates the internal function reference and the value returned for invalid
         queries based on the provided function object.
 
@@ -53,13 +196,68 @@ class SegmentTree:
             for combining values and the value for invalid queries.
         """
 
-        self._fn = function_obj.fn
-        self._INVALID_QUERY = function_obj.invalid_query_val
+        if self._tree_stale and not self._array_synced:
+            self._sync_array()
+
+        self._function = function_obj
+        self._fn = self._guarded_fn(function_obj)
+        self._result_bits_fn = function_obj.result_bits_fn
+        self._vectorized_fn = function_obj.vectorized_fn
+        self._range_add_fn = function_obj.range_add_fn
+        self._range_assign_fn = function_obj.range_assign_fn
+        self._range_scale_fn = function_obj.range_scale_fn
+        self._INVALID_QUERY = function_obj.invalid_query_val if function_obj.identity is None else function_obj.identity
+        self._function_name = function_obj.name
+        self._associative = function_obj.associative
+        self._idempotent = function_obj.associative and function_obj.idempotent
+        self._identity = function_obj.identity
+        self._inverse_fn = function_obj.inverse_fn \
+            if function_obj.associative and function_obj.commutative and function_obj.identity is not None else None
+        self._beats_field = function_obj.beats_field
+        self._sparse_table: Optional[SparseTable] = None
+        self._fenwick_tree = None
+        self._beats_tree = None
+        self._sequence_tree = None
+
+    def set_engine(self, engine: QueryEngineEnum):
+        """Select the engine answering range queries.
+
+        The sparse table only serves `query` and `query_many`, it is built from the
+        array on the first query after a change and thrown away by any update. The
+        Fenwick tree also takes point updates and, for sums, range increments, the
+        node values of the segment tree are then only rebuilt once the tree itself
+        is looked at, typically to be drawn. Any other update goes through the
+        segment tree and throws the Fenwick tree away. The beats engine works the
+        same way and also takes range chmin and chmax, see `chmin_segment`. So does
+        the sequence engine, which takes point updates, inserts and removals, see
+        `splice`. If the query function is later switched to one the engine can't
+        handle, the segment tree is used until a suitable function is selected again.
+
+        Args:
+            engine (QueryEngineEnum): The engine to use.
+
+        Raises:
+            CommandException: If the current query function can't be served by the engine.
+        """
+
+        if engine == QueryEngineEnum.SPARSE_TABLE and not self._idempotent:
+            raise CommandException(f"QueryFunction <{self._function_name}> isn't associative and idempotent, a sparse table can't answer its queries!")
+
+        if engine == QueryEngineEnum.FENWICK and self._inverse_fn is None:
+            raise CommandException(f"QueryFunction <{self._function_name}> isn't associative, commutative and invertible with an identity, a Fenwick tree can't answer its queries!")
+
+        if engine == QueryEngineEnum.BEATS and self._beats_field is None:
+            raise CommandException(f"QueryFunction <{self._function_name}> isn't a sum, min or max, a segment tree beats can't answer its queries!")
+
+        if engine == QueryEngineEnum.SEQUENCE and not self._associative:
+            raise CommandException(f"QueryFunction <{self._function_name}> isn't associative, an implicit treap can't answer its queries!")
+
+        self.engine = engine
 
     def query(self, q_low: int, q_high: int) -> int:
         """Retrieve the result of a query on the segment tree for a specified range.
 
-        This function queries the segment tree to compute the aggregate value for 
+        This function queries the segment tree to compute the aggregate value for
         the elements within the range defined by `q_low` and `q_high`. It delegates
         the actual querying logic to a private method that handles the specifics of
         the segment tree traversal.
@@ -72,13 +270,128 @@ class SegmentTree:
             int: The result of the query for the specified range.
         """
 
-        return self._query(q_low, q_high, self.root, 0, self.array_length-1)
+        if self.engine == QueryEngineEnum.SPARSE_TABLE and self._idempotent:
+            return self._query_sparse_table(q_low, q_high)
+
+        if self._uses_fenwick():
+            return self._query_fenwick(q_low, q_high)
+
+        if self._uses_beats():
+            return self._query_beats(q_low, q_high)
+
+        if self._uses_sequence():
+            return self._query_sequence(q_low, q_high)
+
+        self.materialize()
+
+        if self.traversal == TraversalEnum.ITERATIVE and self._associative and not self.tagged_nodes:
+            return self._query_iterative(q_low, q_high)
+
+        return self._query(q_low, q_high, 1, 0, self.array_length-1)
+
+    def query_many(self, lows: Sequence[int], highs: Sequence[int]) -> list[int]:
+        """Retrieve the results of a batch of range queries in a single pass.
+
+        Every result is the same as what `query` would return for that range.
+        With the iterative traversal, no pending lazy values and a vectorized
+        query function, the two-pointer climb of every query is done at once with
+        NumPy, one tree level per step. Otherwise the tree is walked once for the
+        whole batch, each node being visited a single time for all the queries
+        overlapping it.
+
+        Args:
+            lows (Sequence[int]): The lower bound of each range to query.
+            highs (Sequence[int]): The upper bound of each range to query.
+
+        Returns:
+            list[int]: The result of each query, in the same order as the ranges.
+        """
+
+        if self.engine == QueryEngineEnum.SPARSE_TABLE and self._idempotent:
+            return self._query_many_sparse_table(lows, highs)
+
+        if self._uses_fenwick():
+            return [self._query_fenwick(q_low, q_high) for q_low, q_high in zip(lows, highs)]
+
+        if self._uses_beats():
+            return [self._query_beats(q_low, q_high) for q_low, q_high in zip(lows, highs)]
+
+        if self._uses_sequence():
+            return [self._query_sequence(q_low, q_high) for q_low, q_high in zip(lows, highs)]
+
+        self.materialize()
+
+        if self.traversal == TraversalEnum.ITERATIVE and self._associative and not self.tagged_nodes:
+            if self._vectorized_fn is not None:
+                try:
+                    return self._query_many_vectorized(lows, highs)
+                except OverflowError:
+                    pass
+
+            return [self._query_iterative(q_low, q_high) for q_low, q_high in zip(lows, highs)]
+
+        results = [self._INVALID_QUERY] * len(lows)
+        indices = [i for i in range(len(lows)) if not self._is_segment_invalid(lows[i], highs[i], 0, self.array_length-1)]
+
+        if indices:
+            self._query_many(lows, highs, indices, results, 1, 0, self.array_length-1)
+
+        return results
+
+    def kth_smallest(self, q_low: int, q_high: int, k: int) -> int:
+        """Find the k-th smallest element of a range of the array.
+
+        Order statistics don't depend on the query function, they are answered by a
+        wavelet matrix built from the array on the first such query after a change,
+        in O(log σ) for σ distinct values.
+
+        Args:
+            q_low (int): The lower bound of the range.
+            q_high (int): The upper bound of the range.
+            k (int): The position of the element in the sorted range, 1 being the smallest.
+
+        Returns:
+            int: The k-th smallest element of the range.
+
+        Raises:
+            CommandException: If the range doesn't have k elements.
+        """
+
+        q_low = max(q_low, 0)
+        q_high = min(q_high, self.array_length-1)
+
+        if not 1 <= k <= q_high - q_low + 1:
+            raise CommandException(f"There is no element {k} in a range of {max(q_high - q_low + 1, 0)} elements!")
+
+        return self._order_statistics().kth_smallest(q_low, q_high, k-1)
+
+    def count_less(self, q_low: int, q_high: int, x: int) -> int:
+        """Count the elements of a range of the array that are strictly less than a value.
+
+        See `kth_smallest`.
+
+        Args:
+            q_low (int): The lower bound of the range.
+            q_high (int): The upper bound of the range.
+            x (int): The value the elements are compared to.
+
+        Returns:
+            int: The number of elements of the range below `x`.
+        """
+
+        q_low = max(q_low, 0)
+        q_high = min(q_high, self.array_length-1)
+
+        if q_low > q_high:
+            return 0
+
+        return self._order_statistics().count_less(q_low, q_high, x)
 
     def update_element_no_lazy(self, pos: int, val: int) -> None:
         """Update the value at a specified position in the segment tree.
 
         This function modifies the value of an element in the segment tree at the
-        given position. It delegates the actual update logic to a private method 
+        given position. It delegates the actual update logic to a private method
         that handles the specifics of the segment tree traversal and value adjustment.
 
         Args:
@@ -86,191 +399,1676 @@ class SegmentTree:
             val (int): The new value to set at the specified position.
         """
 
-        self.array[pos] = val
-        self._update_element_no_lazy(pos, val, self.root, 0, self.array_length-1)
+        self._sparse_table = None
+        self._wavelet_matrix = None
+
+        if self._uses_fenwick():
+            self._fenwick().set(pos, val)
+            self._beats_tree = None
+            self._sequence_tree = None
+            self._write_array(pos, val)
+            self._tree_stale = True
+        elif self._uses_beats():
+            self._beats().set(pos, val)
+            self._fenwick_tree = None
+            self._sequence_tree = None
+            self._write_array(pos, val)
+            self._tree_stale = True
+        elif self._uses_sequence():
+            self._sequence().set(pos, val)
+            self._fenwick_tree = None
+            self._beats_tree = None
+            self._array_synced = False
+            self._tree_stale = True
+        else:
+            self.materialize()
+            self._fenwick_tree = None
+            self._beats_tree = None
+            self._sequence_tree = None
+
+            with self._restore_on_abort():
+                self._write_array(pos, val)
+
+                if self.traversal == TraversalEnum.ITERATIVE:
+                    self._update_element_iterative(pos, val)
+                else:
+                    self._update_element_no_lazy(pos, val, 1, 0, self.array_length-1)
+
+        if self.persistent:
+            self._save_point_updates(f"replace {pos} with {val}", [pos], [val])
+
+    def update_many(self, positions: Sequence[int], values: Sequence[int]) -> None:
+        """Update the values at a batch of positions in the segment tree.
+
+        All the leaves are written first, then every ancestor of a written leaf is
+        recomputed exactly once, deepest first. Since a parent's ID is always smaller
+        than its children's, recomputing the ancestors in decreasing ID order
+        guarantees that both children of a node are up to date before the node is.
+        Pending lazy values on the affected paths are pushed down beforehand so they
+        are not applied on top of the new values. If a position appears more than
+        once, the last value wins.
+
+        Args:
+            positions (Sequence[int]): The positions in the segment tree to update.
+            values (Sequence[int]): The new value for each position.
+        """
+
+        self._sparse_table = None
+        self._wavelet_matrix = None
+
+        if self._uses_fenwick():
+            fenwick_tree = self._fenwick()
+            for pos, val in zip(positions, values):
+                fenwick_tree.set(pos, val)
+                self._write_array(pos, val)
+            self._beats_tree = None
+            self._sequence_tree = None
+            self._tree_stale = True
+        elif self._uses_beats():
+            beats_tree = self._beats()
+            for pos, val in zip(positions, values):
+                beats_tree.set(pos, val)
+                self._write_array(pos, val)
+            self._fenwick_tree = None
+            self._sequence_tree = None
+            self._tree_stale = True
+        elif self._uses_sequence():
+            sequence_tree = self._sequence()
+            for pos, val in zip(positions, values):
+                sequence_tree.set(pos, val)
+            self._fenwick_tree = None
+            self._beats_tree = None
+            self._array_synced = False
+            self._tree_stale = True
+        else:
+            with self._restore_on_abort():
+                self._update_many(positions, values)
+
+        if self.persistent:
+            self._save_point_updates(f"replace {len(positions)} elements", positions, values)
+
+    def _update_many(self, positions: Sequence[int], values: Sequence[int]) -> None:
+        """Update the values at a batch of positions in the segment tree itself, see `update_many`.
+
+        Args:
+            positions (Sequence[int]): The positions in the segment tree to update.
+            values (Sequence[int]): The new value for each position.
+        """
+
+        self.materialize()
+        self._fenwick_tree = None
+        self._beats_tree = None
+        self._sequence_tree = None
+
+        fn, data, leaf_ID = self._fn, self.data, self.leaf_ID
+        leaves = [leaf_ID[pos] for pos in positions]
+        ancestors: set[int] = set()
+
+        for leaf in leaves:
+            ID = leaf >> 1
+            while ID and ID not in ancestors:
+                ancestors.add(ID)
+                ID >>= 1
+
+        if self.tagged_nodes:
+            for ID in sorted(ancestors):
+                self.propagate(ID)
+            for leaf in leaves:
+                self.propagate(leaf)
+
+        for pos, leaf, val in zip(positions, leaves, values):
+            self._write_array(pos, val)
+            data[leaf] = val
+
+        for ID in sorted(ancestors, reverse=True):
+            self.propagate(2*ID)
+            self.propagate(2*ID+1)
+            data[ID] = fn(data[2*ID], data[2*ID+1])
 
     def update_segment_lazy(self, val: int, segment_low: int, segment_high: int):
         """Updates a range of values in the segment tree with a given increment.
 
-        This function applies an increment to all elements within the specified segment range in the array. 
+        This function applies an increment to all elements within the specified segment range in the array.
         It also updates the segment tree structure via lazy propagation to reflect these changes, ensuring
-        that subsequent queries  will return the correct values.
+        that subsequent queries  will return the correct values. How an increment changes a node's value
+        is defined by the query function's `range_add_fn`.
 
         Args:
             val (int): The value to be added to each element in the specified range.
             segment_low (int): The starting index of the segment to be updated.
             segment_high (int): The ending index of the segment to be updated.
+
+        Raises:
+            CommandException: If the current query function doesn't support lazy range increments.
+        """
+
+        self.affine_segment_lazy(1, val, segment_low, segment_high)
+
+    def assign_segment_lazy(self, val: int, segment_low: int, segment_high: int):
+        """Sets every value of a range in the segment tree to a given value.
+
+        The assignment is stored as a lazy tag like range increments are, so it takes
+        O(log n) no matter how wide the range is. How an assignment changes a node's
+        value is defined by the query function's `range_assign_fn`.
+
+        Args:
+            val (int): The value given to each element in the specified range.
+            segment_low (int): The starting index of the segment to be updated.
+            segment_high (int): The ending index of the segment to be updated.
+
+        Raises:
+            CommandException: If the current query function doesn't support lazy range assignments.
+        """
+
+        self.affine_segment_lazy(0, val, segment_low, segment_high)
+
+    def affine_segment_lazy(self, scale: int, val: int, segment_low: int, segment_high: int):
+        """Maps every value x of a range in the segment tree to scale * x + val.
+
+        Increments (scale 1) and assignments (scale 0) are special cases of this
+        update. Lazy tags hold such a pair, and two tags compose into a single one,
+        so any mix of those updates costs O(log n) per update.
+
+        Args:
+            scale (int): The factor each element in the specified range is multiplied by.
+            val (int): The value then added to each element in the specified range.
+            segment_low (int): The starting index of the segment to be updated.
+            segment_high (int): The ending index of the segment to be updated.
+
+        Raises:
+            CommandException: If the current query function doesn't support the update lazily.
+        """
+
+        self._check_tag_supported(scale, val)
+        self._sparse_table = None
+        self._wavelet_matrix = None
+
+        if self._uses_fenwick() and scale == 1:
+            fenwick_low, fenwick_high = max(segment_low, 0), min(segment_high, self.array_length-1)
+            if fenwick_low <= fenwick_high:
+                self._fenwick().add_range(val, fenwick_low, fenwick_high)
+                self._beats_tree = None
+                self._sequence_tree = None
+                self._array_synced = False
+                self._tree_stale = True
+        elif self._uses_beats() and scale in (0, 1):
+            beats_low, beats_high = max(segment_low, 0), min(segment_high, self.array_length-1)
+            if beats_low <= beats_high:
+                beats_tree = self._beats()
+                if scale == 1:
+                    beats_tree.add_range(val, beats_low, beats_high)
+                else:
+                    beats_tree.chmin(val, beats_low, beats_high)
+                    beats_tree.chmax(val, beats_low, beats_high)
+                self._fenwick_tree = None
+                self._sequence_tree = None
+                self._array_synced = False
+                self._tree_stale = True
+        else:
+            self.materialize()
+            self._fenwick_tree = None
+            self._beats_tree = None
+            self._sequence_tree = None
+
+            with self._restore_on_abort():
+                self._array_synced = False
+                self._allocate_tags()
+                self._update_segment_lazy(scale, val, 1, 0, self.array_length-1, segment_low, segment_high)
+
+        if self.persistent:
+            self._save_range_update(scale, val, segment_low, segment_high)
+
+    def chmin_segment(self, val: int, segment_low: int, segment_high: int):
+        """Replaces every value x of a range in the segment tree with min(x, val).
+
+        The update goes through the segment tree beats, in amortized O(log² n), and
+        the node values of the segment tree are only rebuilt once it is looked at.
+
+        Args:
+            val (int): The upper bound given to the values of the range.
+            segment_low (int): The starting index of the segment to be updated.
+            segment_high (int): The ending index of the segment to be updated.
+
+        Raises:
+            CommandException: If the beats engine isn't selected or can't be used with
+            the current query function.
+        """
+
+        self._clamp_segment(val, segment_low, segment_high, SegmentTreeBeats.chmin)
+
+        if self.persistent:
+            self._save_snapshot(f"chmin [{segment_low}, {segment_high}] to {val}")
+
+    def chmax_segment(self, val: int, segment_low: int, segment_high: int):
+        """Replaces every value x of a range in the segment tree with max(x, val).
+
+        See `chmin_segment`.
+
+        Args:
+            val (int): The lower bound given to the values of the range.
+            segment_low (int): The starting index of the segment to be updated.
+            segment_high (int): The ending index of the segment to be updated.
+
+        Raises:
+            CommandException: If the beats engine isn't selected or can't be used with
+            the current query function.
+        """
+
+        self._clamp_segment(val, segment_low, segment_high, SegmentTreeBeats.chmax)
+
+        if self.persistent:
+            self._save_snapshot(f"chmax [{segment_low}, {segment_high}] to {val}")
+
+    def beats_fields(self, ID: int) -> Optional[dict[str, int | float]]:
+        """Get the fields the segment tree beats keeps for a node, see `SegmentTreeBeats.fields`.
+
+        Args:
+            ID (int): The ID of the node.
+
+        Returns:
+            Optional[dict[str, int | float]]: The node's fields, None if the beats
+            engine isn't in use.
         """
 
-        for idx in range(segment_low, segment_high+1):
-            self.array[idx] += val
+        if not self._uses_beats() or not self.has_node(ID):
+            return None
 
-        self._update_segment_lazy(val, self.root, 0, self.array_length-1, segment_low, segment_high)
+        return self._beats().fields(ID)
 
-    def propagate(self, node: Node):
+    def propagate(self, ID: int):
         """Propagates the lazy value down the segment tree.
 
-        This function updates the current node's data based on its lazy value and propagates the lazy value 
-        to its child nodes if the current node is not a leaf.
+        This function updates the node's data based on its lazy tag and composes the tag
+        into the tags of its child nodes if the node is not a leaf.
 
         Args:
-            node (Node): The node in the segment tree to propagate the lazy value from.
+            ID (int): The ID of the node to propagate the lazy value from.
         """
 
-        if node.lazy_data == 0:
+        self.materialize()
+        scale, lazy_data = self.lazy_scale[ID], self.lazy_data[ID]
+
+        if scale == 1 and lazy_data == 0:
             return
 
-        node.data += (node.high - node.low + 1) * node.lazy_data
+        self.data[ID] = self._apply_tag(self.data[ID], scale, lazy_data, self.high[ID] - self.low[ID] + 1)
 
-        if not node.is_leaf():
-            node.left.lazy_data += node.lazy_data
-            node.right.lazy_data += node.lazy_data
+        if not self.is_leaf(ID):
+            self._compose_lazy(2*ID, scale, lazy_data)
+            self._compose_lazy(2*ID+1, scale, lazy_data)
 
-        node.lazy_data = 0
+        self.lazy_scale[ID] = 1
+        self.lazy_data[ID] = 0
+        self.tagged_nodes.discard(ID)
 
-    def rebuild(self):
-        """Rebuild the segment tree from the current array.
+    def propagate_all(self):
+        """Push every pending lazy tag down to the leaves.
 
-        This function initializes a new root node for the segment tree and constructs
-        the tree structure based on the current array. It ensures that the segment 
-        tree is updated to reflect any changes in the underlying data.
+        Only the nodes holding a tag are visited, taken from `tagged_nodes` by
+        increasing ID so that a node is always propagated after its ancestors and
+        never twice. Untouched subtrees are skipped entirely.
         """
 
-        self.root = Node()
-        self._build(self.root, 0, self.array_length-1)
+        self.materialize()
+        tagged_nodes = self.tagged_nodes
+        heap = list(tagged_nodes)
+        heapify(heap)
+
+        while heap:
+            ID = heappop(heap)
+            if ID not in tagged_nodes:
+                continue
+
+            self.propagate(ID)
 
-    def _build(self, node: Node, low: int, high: int, ID: int = 1) -> None:
-        """Recursively build the segment tree from the given array.
+            if not self.is_leaf(ID):
+                heappush(heap, 2*ID)
+                heappush(heap, 2*ID+1)
 
-        This function constructs the segment tree by initializing nodes and setting
-        their values based on the specified range. It divides the range into 
-        subranges and recursively builds the left and right child nodes, combining
-        their values using the specified function.
+    def insert(self, pos: int, val: int):
+        """Insert a value into the array before the given position and rebuild the tree.
+
+        Positions follow the semantics of `list.insert`, so a position past the end
+        appends the value. See `splice`.
 
         Args:
-            node (Node): The current node being constructed in the segment tree.
-            low (int): The lower index of the range for the current node.
-            high (int): The upper index of the range for the current node.
-            ID (int, optional): The identifier for the current node. Defaults to 1.
+            pos (int): The position the value is inserted at.
+            val (int): The value to insert.
         """
 
-        if self.array_length == 0:
-            return
+        self.splice(pos, [val])
 
-        node.construct(low, high, ID)
+    def splice(self, pos: int, values: Sequence[int]):
+        """Insert a sequence of values into the array before the given position and rebuild the tree.
 
-        if low == high:
-            node.data = self.array[low]
-            return
+        The shape of a segment tree is set by the length of its array, so inserting
+        moves every later element to another leaf and the whole tree is rebuilt.
+        With the sequence engine, the values are inserted into its implicit treap
+        in O(m + log n) instead, neither the array nor the tree being touched; the
+        tree is only rebuilt once it is looked at, typically to be drawn. Either
+        way the layout is marked as outdated.
+
+        Args:
+            pos (int): The position the first value is inserted at.
+            values (Sequence[int]): The values to insert, in order.
+        """
 
-        node.init_children()
+        if self._uses_sequence():
+            with self._restore_on_abort():
+                self._sequence().splice(self._insert_position(pos), values)
+                self._sequence_changed()
+        else:
+            with self._restore_on_abort():
+                self._detach_array()
+                self.array[pos:pos] = values
+                self._fenwick_tree = None
+                self._beats_tree = None
+                self._sequence_tree = None
+                self._build()
 
-        mid = (low+high) // 2
-        self._build(node.left, low, mid, 2*ID)
-        self._build(node.right, mid+1, high, 2*ID+1)
+        self.layout_outdated = True
 
-        node.data = self._fn(node.left.data, node.right.data)
+        if self.persistent:
+            self._save_snapshot(f"insert {values[0]} at {pos}" if len(values) == 1 else f"insert {len(values)} elements at {pos}")
 
-    def _update_segment_lazy(self, val: int, node: Node, low: int, high: int, segment_low: int, segment_high: int):
-        """Recursively updates a segment in the segment tree with a lazy value.
+    def remove(self, pos: int) -> int:
+        """Remove the value at the given position from the array and rebuild the tree.
 
-        This function applies a value to a specified segment of the segment tree, handling lazy propagation 
-        to ensure that all updates are correctly applied. It checks if the segment is valid and whether it 
-        falls within the range of the current node, updating the node's data and propagating changes as necessary.
+        With the sequence engine, the value is removed from its implicit treap in
+        O(log n) and the tree is only rebuilt once it is looked at, see `splice`.
 
         Args:
-            val (int): The value to be added to the specified segment.
-            node (Node): The current node in the segment tree being updated.
-            low (int): The lower bound of the current segment.
-            high (int): The upper bound of the current segment.
-            segment_low (int): The starting index of the segment to be updated.
-            segment_high (int): The ending index of the segment to be updated.
+            pos (int): The position of the value to remove; negative positions count
+                from the end of the array.
+
+        Returns:
+            int: The removed value.
+
+        Raises:
+            CommandException: If the position is outside of the array.
         """
 
-        self.propagate(node)
+        if not -self.array_length <= pos < self.array_length:
+            raise CommandException(f"Position {pos} is outside of the array!")
 
-        if self._is_segment_invalid(segment_low, segment_high, low, high):
-            return
-        if self._is_segment_within_range(segment_low, segment_high, low, high):
-            node.data += (node.high - node.low + 1) * val
+        if self._uses_sequence():
+            with self._restore_on_abort():
+                val = self._sequence().remove(pos % self.array_length)
+                self._sequence_changed()
+        else:
+            with self._restore_on_abort():
+                self._detach_array()
+                val = self.array.pop(pos)
+                self._fenwick_tree = None
+                self._beats_tree = None
+                self._sequence_tree = None
+                self._build()
 
-            if not node.is_leaf():
-                node.left.lazy_data += val
-                node.right.lazy_data += val
+        self.layout_outdated = True
 
-            return
+        if self.persistent:
+            self._save_snapshot(f"remove {val} at {pos}")
 
-        mid = (low+high) // 2
-        self._update_segment_lazy(val, node.left, low, mid, segment_low, segment_high)
-        self._update_segment_lazy(val, node.right, mid+1, high, segment_low, segment_high)
-        node.data = self._fn(node.left.data, node.right.data)
+        return val
 
-    def _update_element_no_lazy(self, pos: int, val: int, node: Node, low: int, high: int) -> None:
-        """Recursively update the value at a specified position in the segment tree.
+    def rebuild(self, save_version: bool = True):
+        """Rebuild the segment tree from the current array.
 
-        This function modifies the value of a node in the segment tree at the given
-        position and updates the relevant parent nodes accordingly. It traverses the
-        tree to find the correct node to update based on the specified position and
-        ensures that the current node's value is updated after the change.
+        This function reallocates the flat node storage and constructs the tree
+        based on the current array. It ensures that the segment tree is updated
+        to reflect any changes in the underlying data.
 
         Args:
-            pos (int): The position in the segment tree to update.
-            val (int): The new value to set at the specified position.
-            node (Node): The current node being updated in the segment tree.
-            low (int): The lower index of the range for the current node.
-            high (int): The upper index of the range for the current node.
+            save_version (bool): Whether to save the rebuilt tree as a new version
+                when persistence is on. Rolling back a failed change passes False,
+                the tree being back to the current version.
         """
 
-        if low == high:
-            node.data = val
+        self._build()
+        self._fenwick_tree = None
+        self._beats_tree = None
+        self._sequence_tree = None
+
+        if self.persistent and save_version:
+            self._save_snapshot("rebuild")
+
+    def enable_persistence(self):
+        """Start saving a version of the tree after every update.
+
+        Versions are kept in pools of immutable nodes, one pool per query function.
+        Point updates and range increments only add the O(log n) nodes on their
+        path to the pool, every other node being shared with the previous version.
+        Updates that change the length of the array, rebuilds and range updates
+        other than increments save a full copy of the tree instead. The current
+        state is saved as the first version.
+        """
+
+        if self.persistent:
             return
 
-        mid = (low+high) // 2
-        if pos <= mid:
-            self._update_element_no_lazy(pos, val, node.left, low, mid)
-        else:
-            self._update_element_no_lazy(pos, val, node.right, mid+1, high)
+        self.persistent = True
+        self._save_snapshot("initial state")
 
-        node.data = self._fn(node.left.data, node.right.data)
+    def disable_persistence(self):
+        """Stop saving versions and drop the history."""
 
-    def _query(self, q_low: int, q_high: int, node: Node, low: int, high: int) -> int:
-        """Recursively query the segment tree for a specified range.
+        self.persistent = False
+        self.versions = []
+        self.version_index = -1
+        self._pools = {}
 
-        This function retrieves the aggregate value for the elements within the 
-        range defined by `q_low` and `q_high`. It checks for invalid queries and 
-        determines if the current node's range is fully within the query range, 
-        returning the node's data if so, or recursively querying the left and right
-        children otherwise.
+    def checkout(self, index: int):
+        """Restore the tree to a saved version.
+
+        The array and query function of the version are restored and the tree is
+        rebuilt from them; the history itself is left as is, so later versions can
+        still be checked out until the next update replaces them.
 
         Args:
-            q_low (int): The lower bound of the query range.
-            q_high (int): The upper bound of the query range.
-            node (Node): The current node being queried in the segment tree.
-            low (int): The lower index of the range for the current node.
-            high (int): The upper index of the range for the current node.
+            index (int): The index of the version in `versions`.
+
+        Raises:
+            CommandException: If persistence is off or the version doesn't exist.
         """
 
+        version = self._version(index)
 
-        if self._is_segment_invalid(q_low, q_high, low, high):
-            return self._INVALID_QUERY
+        self.switch_function(version.function)
+        self.array = version.pool.values(version.root, version.length)
+        self._build()
+        self.version_index = index
 
-        self.propagate(node)
+    def query_at(self, index: int, q_low: int, q_high: int) -> int:
+        """Query a range of a saved version without restoring it.
 
-        if self._is_segment_within_range(q_low, q_high, low, high):
-            return node.data
+        The version is walked the same way the recursive traversal walks the tree.
 
-        mid = (low+high) // 2
-        left_child = self._query(q_low, q_high, node.left, low, mid)
-        right_child = self._query(q_low, q_high, node.right, mid+1, high)
+        Args:
+            index (int): The index of the version in `versions`.
+            q_low (int): The lower bound of the range.
+            q_high (int): The upper bound of the range.
+
+        Returns:
+            int: The result of the query on the version.
+
+        Raises:
+            CommandException: If persistence is off or the version doesn't exist.
+        """
+
+        version = self._version(index)
+        return version.pool.query(version.root, version.length, q_low, q_high)
+
+    def allocate_layout(self, capacity: Optional[int] = None):
+        """Allocate the per-node layout arrays used to position nodes on screen.
+
+        Layout coordinates are only needed when the tree is drawn, so they are
+        not allocated by `rebuild` and have to be requested by whoever computes
+        the layout after every rebuild. Until then the arrays still describe the
+        layout of the tree as it was before the rebuild.
+
+        Args:
+            capacity (Optional[int]): The number of slots for each array, the
+                capacity of the tree if not given.
+        """
+
+        if capacity is None:
+            capacity = self.capacity
+
+        self.original_x = array("q", [0]) * capacity
+        self.original_y = array("q", [0]) * capacity
+        self.preliminary_x = array("d", [0.0]) * capacity
+        self.modifier = array("d", [0.0]) * capacity
+        self.thread = array("q", [0]) * capacity
+        self.thread_modifier = array("d", [0.0]) * capacity
+
+    def _allocate(self, capacity: int):
+        """Allocate every per-node array with the given number of slots.
+
+        Slots that do not belong to a node keep a low bound greater than their
+        high bound, which is what `has_node` relies on. The layout arrays are
+        not touched, they are only replaced by `allocate_layout`. The lazy tags
+        are not allocated until the first range update, see `_allocate_tags`,
+        and the node values are allocated by whichever build computes them, as a
+        list or as an int64 array.
+
+        Args:
+            capacity (int): The number of slots for each array.
+        """
+
+        self.lazy_scale: list[int] | SparseValues = SparseValues(1)
+        self.lazy_data: list[int] | SparseValues = SparseValues(0)
+        self.low = array("q", [0]) * capacity
+        self.high = array("q", [-1]) * capacity
+        self.leaf_ID = array("q", [0]) * self.array_length
+        self.tagged_nodes: set[int] = set()
+        self._sparse_table = None
+        self._wavelet_matrix = None
+        self._tree_stale = False
+
+    def _build(self) -> None:
+        """Build the segment tree from the given array without recursion.
+
+        The segment bounds are assigned level by level from the root, which
+        splits every range at its midpoint exactly like a recursive build would.
+        Node values are then filled from the deepest level up so that both
+        children of a node are always computed before the node itself. When the
+        query function has a vectorized version and every value fits in an int64,
+        each level is computed with a single array operation; otherwise, or as
+        soon as a level overflows, the values are computed with Python ints. Arrays
+        of at least `PARALLEL_BUILD_MIN_LENGTH` values are built vectorized by
+        `build_workers` processes when there are more than one.
+        """
+
+        # The array is derived from the nodes, which are about to be reallocated.
+        if not self._array_synced:
+            self._sync_array()
+
+        n = self.array_length
+
+        # The deepest node of a midpoint-split tree over n leaves has
+        # an ID below 2 * 2^ceil(log2(n)).
+        self._allocate(1 << (max(n-1, 0).bit_length() + 1))
+
+        if n == 0:
+            self.data: list[int] | Int64Values = [0] * self.capacity
+            return
+
+        levels = self._build_structure()
+
+        if self._vectorized_fn is not None:
+            try:
+                self._build_values_vectorized(levels)
+                return
+            except OverflowError:
+                pass
+
+        self._build_values(levels)
+
+    def _build_structure(self) -> list[numpy.ndarray]:
+        """Assign the segment bounds of every node and the position to leaf index.
+
+        The IDs of a level are the contiguous range [2^d, 2^(d+1)), and the children
+        of a range of IDs interleave over the range twice as far, so every level
+        is assigned with strided slices instead of gathering and scattering IDs.
+        Splitting at the midpoint keeps the segments of a level within one element
+        of each other, at least n >> d long on the d-th level, so every level where
+        that is at least 2 is entirely made of internal nodes and is split without
+        looking for leaves. Slots without a node, and below a leaf, keep an empty
+        segment.
+
+        Returns:
+            list[numpy.ndarray]: The IDs of the internal nodes of each level,
+            starting from the root's level, in increasing order.
+        """
+
+        low = numpy.frombuffer(self.low, dtype=numpy.int64)
+        high = numpy.frombuffer(self.high, dtype=numpy.int64)
+        leaf_ID = numpy.frombuffer(self.leaf_ID, dtype=numpy.int64)
+        low[1], high[1] = 0, self.array_length-1
+
+        levels: list[numpy.ndarray] = []
+        start = 1
+
+        while self.array_length // start >= 2:
+            level_low, level_high = low[start:2*start], high[start:2*start]
+            mid = (level_low+level_high) >> 1
+            low[2*start:4*start:2] = level_low
+            high[2*start:4*start:2] = mid
+            numpy.add(mid, 1, out=low[2*start+1:4*start:2])
+            high[2*start+1:4*start:2] = level_high
+
+            levels.append(numpy.arange(start, 2*start))
+            start *= 2
+
+        while 2*start < self.capacity:
+            level_low, level_high = low[start:2*start], high[start:2*start]
+            is_leaf = level_low == level_high
+            internal = level_low < level_high
+            leaf_ID[level_low[is_leaf]] = numpy.flatnonzero(is_leaf) + start
+
+            mid = (level_low+level_high) // 2
+            low[2*start:4*start:2] = numpy.where(internal, level_low, 0)
+            high[2*start:4*start:2] = numpy.where(internal, mid, -1)
+            low[2*start+1:4*start:2] = numpy.where(internal, mid+1, 0)
+            high[2*start+1:4*start:2] = numpy.where(internal, level_high, -1)
+
+            levels.append(numpy.flatnonzero(internal) + start)
+            start *= 2
+
+        level_low, level_high = low[start:2*start], high[start:2*start]
+        is_leaf = level_low == level_high
+        leaf_ID[level_low[is_leaf]] = numpy.flatnonzero(is_leaf) + start
+
+        while levels and not levels[-1].size:
+            levels.pop()
+
+        return levels
+
+    def _build_values(self, levels: list[numpy.ndarray]):
+        """Compute the value of every node with the query function on Python ints.
+
+        Args:
+            levels (list[numpy.ndarray]): The IDs of the internal nodes of each level,
+            starting from the root's level.
+        """
+
+        fn, values = self._fn, self._array_values()
+        self.data = data = [0] * self.capacity
+
+        for pos, ID in enumerate(self.leaf_ID):
+            data[ID] = values[pos]
+
+        for level in reversed(levels):
+            for ID in level.tolist():
+                data[ID] = fn(data[2*ID], data[2*ID+1])
+
+    def _build_values_vectorized(self, levels: list[numpy.ndarray]):
+        """Compute the value of every node with one vectorized operation per level.
+
+        The values of the array are never allowed to be the smallest int64 so that
+        taking their absolute value or negating them can not overflow either. When
+        the array is a NumPy array, typically mapped from a file, the node values
+        stay in an int64 array wrapped in `Int64Values`, so the tree doesn't take
+        a Python int per node; they are only copied into a list once a value no
+        longer fits. Otherwise they are copied into a list right away, like the
+        array already is one.
+
+        Args:
+            levels (list[numpy.ndarray]): The IDs of the internal nodes of each level,
+            starting from the root's level.
+
+        Raises:
+            OverflowError: If a value of the array or of any node does not fit in an int64.
+        """
+
+        fn = self._vectorized_fn
+        values = numpy.asarray(self.array, dtype=numpy.int64)
+
+        if (values == numpy.iinfo(numpy.int64).min).any():
+            raise OverflowError("int64 overflow in the array's values")
+
+        leaf_ID = numpy.frombuffer(self.leaf_ID, dtype=numpy.int64)
+
+        if self.build_workers > 1 and len(values) >= const.PARALLEL_BUILD_MIN_LENGTH and parallel_build_supported():
+            low, high = numpy.frombuffer(self.low, dtype=numpy.int64), numpy.frombuffer(self.high, dtype=numpy.int64)
+            data = build_in_parallel(values, leaf_ID, low, high, levels, fn, self.build_workers)
+        else:
+            data = numpy.zeros(self.capacity, dtype=numpy.int64)
+            data[leaf_ID] = values
+
+            for level in reversed(levels):
+                data[level] = fn(data[2*level], data[2*level+1])
+
+        self.data = Int64Values(data) if isinstance(self._array, numpy.ndarray) else data.tolist()
+
+    def _sync_array(self):
+        """Bring the backing array up to date with the pending lazy tags.
+
+        A leaf always holds the value of its element as of the last tag applied to
+        it, so an element's current value is its leaf's value mapped through the
+        tags pending on the leaf and its ancestors, deeper tags being applied first
+        since they are older. Only the tagged nodes are visited, by increasing ID so
+        that each one composes its tag with the tags above it. Every position then
+        takes the composed tag of its deepest tagged ancestor, written over the
+        node's segment with one slice assignment per tagged node, and the leaves
+        are mapped through their tags with one NumPy operation when every result
+        fits in an int64. The tree itself is left untouched.
+        """
+
+        if self._tree_stale:
+            engine_tree = next(tree for tree in (self._fenwick_tree, self._beats_tree, self._sequence_tree) if tree is not None)
+            values = engine_tree.values()
+
+            if len(values) != len(self._array):
+                self._detach_array()
+
+            self._write_array(slice(None), values)
+            self._array_synced = True
+            return
+
+        leaves = self._leaf_values()
+
+        if not self.tagged_nodes:
+            self._write_synced_array(leaves)
+            return
+
+        lazy_scale, lazy_data, low, high = self.lazy_scale, self.lazy_data, self.low, self.high
+        composed: dict[int, tuple[int, int]] = {}
+        scales: list[int] = []
+        offsets: list[int] = []
+        # The position's index into `scales` and `offsets`, -1 picking the identity appended last.
+        owner = numpy.full(self.array_length, -1, dtype=numpy.int64)
+
+        for ID in sorted(self.tagged_nodes):
+            ancestor = ID >> 1
+            while ancestor and ancestor not in composed:
+                ancestor >>= 1
+
+            parent_scale, parent_offset = composed.get(ancestor, (1, 0))
+            composed[ID] = (parent_scale * lazy_scale[ID], parent_scale * lazy_data[ID] + parent_offset)
+
+            owner[low[ID]:high[ID]+1] = len(scales)
+            scales.append(composed[ID][0])
+            offsets.append(composed[ID][1])
+
+        scales.append(1)
+        offsets.append(0)
+
+        if isinstance(leaves, numpy.ndarray) and leaves.size:
+            largest_leaf = max(-int(leaves.min()), int(leaves.max()))
+            largest_result = max(map(abs, scales)) * largest_leaf + max(map(abs, offsets))
+
+            if largest_result <= numpy.iinfo(numpy.int64).max:
+                self._write_synced_array(numpy.array(scales, dtype=numpy.int64)[owner] * leaves + numpy.array(offsets, dtype=numpy.int64)[owner])
+                return
+
+            leaves = leaves.tolist()
+
+        self._write_synced_array([scales[i] * val + offsets[i] for i, val in zip(owner.tolist(), leaves)])
+
+    def _leaf_values(self) -> list[int] | numpy.ndarray:
+        """Get the value of every leaf, in the order of the positions of their elements.
+
+        Returns:
+            list[int] | numpy.ndarray: The values in an int64 array, or in a list if
+            any of them doesn't fit in one.
+        """
+
+        leaf_ID = numpy.frombuffer(self.leaf_ID, dtype=numpy.int64)
+
+        try:
+            return numpy.asarray(self.data, dtype=numpy.int64)[leaf_ID]
+        except OverflowError:
+            data = self.data
+            return [data[ID] for ID in leaf_ID.tolist()]
+
+    def _write_synced_array(self, values: list[int] | numpy.ndarray):
+        """Replace every value of the backing array with the current values and mark it as synced.
+
+        Args:
+            values (list[int] | numpy.ndarray): The current value of every element.
+        """
+
+        if isinstance(values, numpy.ndarray) and not isinstance(self._array, numpy.ndarray):
+            values = values.tolist()
+
+        self._write_array(slice(None), values)
+        self._array_synced = True
+
+    def _version(self, index: int) -> Version:
+        """Get a saved version.
+
+        Args:
+            index (int): The index of the version in `versions`.
+
+        Returns:
+            Version: The version.
+
+        Raises:
+            CommandException: If persistence is off or the version doesn't exist.
+        """
+
+        if not self.persistent:
+            raise CommandException("Persistent mode is off, no version is saved!")
+
+        if not 0 <= index < len(self.versions):
+            raise CommandException(f"Version {index} doesn't exist!")
+
+        return self.versions[index]
+
+    def _save_version(self, label: str, pool: PersistentSegmentTree, root: int):
+        """Append a version after the current one, dropping the versions that were undone.
+
+        Args:
+            label (str): A short description of the update that produced the version.
+            pool (PersistentSegmentTree): The pool holding the version.
+            root (int): The root of the version in the pool.
+        """
+
+        del self.versions[self.version_index+1:]
+        self.versions.append(Version(label, self._function, self.array_length, pool, root))
+        self.version_index = len(self.versions) - 1
+
+    def _save_snapshot(self, label: str):
+        """Save a full copy of the current tree as a new version.
+
+        Args:
+            label (str): A short description of the update that produced the version.
+        """
+
+        # Pools are keyed by the function itself, not its name: the modular
+        # functions are replaced by new ones of the same name when the modulus changes.
+        pool = self._pools.get(self._function)
+        if pool is None:
+            pool = PersistentSegmentTree(self._fn, self._INVALID_QUERY, self._range_add_fn)
+            self._pools[self._function] = pool
+
+        if self.tagged_nodes or self._tree_stale:
+            root = pool.build(self._array_values())
+        else:
+            root = pool.snapshot(self.data)
+
+        self._save_version(label, pool, root)
+
+    def _extends_current_version(self) -> bool:
+        """Check whether the next version can be derived from the current one by path copying.
+
+        Returns:
+            bool: True if the current version has the same query function and length as the tree.
+        """
+
+        version = self.versions[self.version_index]
+        return version.function is self._function and version.length == self.array_length
+
+    def _save_point_updates(self, label: str, positions: Sequence[int], values: Sequence[int]):
+        """Save the version produced by a batch of point updates.
+
+        Args:
+            label (str): A short description of the updates.
+            positions (Sequence[int]): The updated positions.
+            values (Sequence[int]): The new value for each position.
+        """
+
+        if not self._extends_current_version():
+            self._save_snapshot(label)
+            return
+
+        version = self.versions[self.version_index]
+        root = version.root
+        for pos, val in zip(positions, values):
+            root = version.pool.set(root, version.length, pos, val)
+
+        self._save_version(label, version.pool, root)
+
+    def _save_range_update(self, scale: int, val: int, segment_low: int, segment_high: int):
+        """Save the version produced by an affine range update.
+
+        Args:
+            scale (int): The factor every element of the range was multiplied by.
+            val (int): The value added to every element of the range after scaling.
+            segment_low (int): The lower bound of the range.
+            segment_high (int): The upper bound of the range.
+        """
+
+        if scale == 1:
+            label = f"add {val} to [{segment_low}, {segment_high}]"
+        elif scale == 0:
+            label = f"set [{segment_low}, {segment_high}] to {val}"
+        else:
+            label = f"map [{segment_low}, {segment_high}] to {scale}*x{val:+}"
+
+        if scale != 1 or not self._extends_current_version():
+            self._save_snapshot(label)
+            return
+
+        version = self.versions[self.version_index]
+        segment_low, segment_high = max(segment_low, 0), min(segment_high, version.length-1)
+
+        root = version.root
+        if val and segment_low <= segment_high:
+            root = version.pool.add_range(root, version.length, val, segment_low, segment_high)
+
+        self._save_version(label, version.pool, root)
+
+    def _array_values(self) -> list[int]:
+        """Get the current values of the array as Python ints.
+
+        Returns:
+            list[int]: The array itself, or a copy of it if it is a NumPy array.
+        """
+
+        array = self.array
+        return array.tolist() if isinstance(array, numpy.ndarray) else array
+
+    def _detach_array(self):
+        """Copy a NumPy array into a list, before it is written to in a way it can't hold."""
+
+        if isinstance(self._array, numpy.ndarray):
+            self._array = self._array.tolist()
+
+    def _write_array(self, key: int | slice, values: int | list[int]):
+        """Write to the backing array, copying a NumPy array into a list first if a value doesn't fit in it.
+
+        Args:
+            key (int | slice): The position, or the slice, to write to.
+            values (int | list[int]): The value, or the values, to write.
+        """
+
+        try:
+            self._array[key] = values
+        except OverflowError:
+            self._detach_array()
+            self._array[key] = values
+
+    def materialize(self):
+        """Rebuild the node values if the Fenwick, beats or sequence engine took updates the segment tree hasn't seen."""
+
+        if self._tree_stale:
+            self._build()
+
+    def _uses_fenwick(self) -> bool:
+        """Check whether the Fenwick engine is selected and usable with the current query function.
+
+        Returns:
+            bool: True if queries and updates go through the Fenwick tree, otherwise False.
+        """
+
+        return self.engine == QueryEngineEnum.FENWICK and self._inverse_fn is not None
+
+    def _fenwick(self) -> FenwickTree:
+        """Get the Fenwick tree of the current values, building it first if needed.
+
+        Returns:
+            FenwickTree: The Fenwick tree.
+        """
+
+        if self._fenwick_tree is None:
+            self._fenwick_tree = FenwickTree(self._array_values(), self._fn, self._inverse_fn, self._identity)
+
+        return self._fenwick_tree
+
+    def _query_fenwick(self, q_low: int, q_high: int) -> int:
+        """Query a range through the Fenwick tree.
+
+        Args:
+            q_low (int): The lower bound of the query range.
+            q_high (int): The upper bound of the query range.
+
+        Returns:
+            int: The result of the query for the specified range.
+        """
+
+        q_low = max(q_low, 0)
+        q_high = min(q_high, self.array_length-1)
+
+        if q_low > q_high:
+            return self._INVALID_QUERY
+
+        return self._fenwick().query(q_low, q_high)
+
+    def _uses_beats(self) -> bool:
+        """Check whether the beats engine is selected and usable with the current query function.
+
+        Returns:
+            bool: True if queries and updates go through the segment tree beats, otherwise False.
+        """
+
+        return self.engine == QueryEngineEnum.BEATS and self._beats_field is not None
+
+    def _beats(self) -> SegmentTreeBeats:
+        """Get the segment tree beats of the current values, building it first if needed.
+
+        The segment tree beats mirrors the shape of the segment tree, so the segment
+        tree is rebuilt first if another engine took updates, which may have changed
+        the length of the array.
+
+        Returns:
+            SegmentTreeBeats: The segment tree beats.
+        """
+
+        if self._beats_tree is None:
+            self.materialize()
+            self._beats_tree = SegmentTreeBeats(self._array_values(), self.leaf_ID, self.capacity)
+
+        return self._beats_tree
+
+    def _query_beats(self, q_low: int, q_high: int) -> int:
+        """Query a range through the segment tree beats.
+
+        Args:
+            q_low (int): The lower bound of the query range.
+            q_high (int): The upper bound of the query range.
+
+        Returns:
+            int: The result of the query for the specified range.
+        """
+
+        q_low = max(q_low, 0)
+        q_high = min(q_high, self.array_length-1)
+
+        if q_low > q_high:
+            return self._INVALID_QUERY
+
+        return self._beats().query(self._beats_field, q_low, q_high)
+
+    def _uses_sequence(self) -> bool:
+        """Check whether the sequence engine is selected and usable with the current query function.
+
+        Returns:
+            bool: True if queries, point updates, inserts and removals go through the
+            implicit treap, otherwise False.
+        """
+
+        return self.engine == QueryEngineEnum.SEQUENCE and self._associative
+
+    def _sequence(self) -> ImplicitTreap:
+        """Get the implicit treap of the current values, building it first if needed.
+
+        Returns:
+            ImplicitTreap: The implicit treap.
+        """
+
+        if self._sequence_tree is None:
+            self._sequence_tree = ImplicitTreap(self._array_values(), self._fn)
+
+        return self._sequence_tree
+
+    def _query_sequence(self, q_low: int, q_high: int) -> int:
+        """Query a range through the implicit treap.
+
+        Args:
+            q_low (int): The lower bound of the query range.
+            q_high (int): The upper bound of the query range.
+
+        Returns:
+            int: The result of the query for the specified range.
+        """
+
+        q_low = max(q_low, 0)
+        q_high = min(q_high, self.array_length-1)
+
+        if q_low > q_high:
+            return self._INVALID_QUERY
+
+        return self._sequence().query(q_low, q_high)
+
+    def _sequence_changed(self):
+        """Mark the array and the tree as behind the implicit treap after an insert or a removal."""
+
+        self._sparse_table = None
+        self._wavelet_matrix = None
+        self._fenwick_tree = None
+        self._beats_tree = None
+        self._array_synced = False
+        self._tree_stale = True
+
+    def _insert_position(self, pos: int) -> int:
+        """Map a position given to `list.insert` to the position the value actually ends up at.
+
+        Args:
+            pos (int): The position, negative positions counting from the end.
+
+        Returns:
+            int: The position, between 0 and the length of the array.
+        """
+
+        n = self.array_length
+
+        if pos < 0:
+            return max(pos + n, 0)
+
+        return min(pos, n)
+
+    def _clamp_segment(self, val: int, segment_low: int, segment_high: int,
+                       clamp: Callable[[SegmentTreeBeats, int, int, int], None]):
+        """Apply a range chmin or chmax through the segment tree beats.
+
+        Args:
+            val (int): The bound given to the values of the range.
+            segment_low (int): The starting index of the segment to be updated.
+            segment_high (int): The ending index of the segment to be updated.
+            clamp (Callable[[SegmentTreeBeats, int, int, int], None]): `SegmentTreeBeats.chmin`
+                or `SegmentTreeBeats.chmax`.
+
+        Raises:
+            CommandException: If the beats engine isn't selected or can't be used with
+            the current query function.
+        """
+
+        if self.engine != QueryEngineEnum.BEATS:
+            raise CommandException("Range chmin and chmax need the beats engine, select it with 'engine beats'!")
+
+        if self._beats_field is None:
+            raise CommandException(f"QueryFunction <{self._function_name}> isn't a sum, min or max, a segment tree beats can't answer its queries!")
+
+        segment_low, segment_high = max(segment_low, 0), min(segment_high, self.array_length-1)
+        if segment_low > segment_high:
+            return
+
+        clamp(self._beats(), val, segment_low, segment_high)
+        self._sparse_table = None
+        self._wavelet_matrix = None
+        self._fenwick_tree = None
+        self._sequence_tree = None
+        self._array_synced = False
+        self._tree_stale = True
+
+    def _guarded_fn(self, function_obj: QueryFunction) -> Callable[[int, int], int]:
+        """Get the function combining two values, checked against the result length budget if it declares a bound.
+
+        Args:
+            function_obj (QueryFunction): The query function.
+
+        Returns:
+            Callable[[int, int], int]: The query function's `fn`, or a version of it raising
+            a CommandException instead of computing a result longer than `MAX_RESULT_BITS`.
+        """
+
+        fn, result_bits_fn = function_obj.fn, function_obj.result_bits_fn
+
+        if result_bits_fn is None:
+            return fn
+
+        def guarded_fn(x: int, y: int) -> int:
+            if result_bits_fn(x, y) > const.MAX_RESULT_BITS:
+                raise self._result_too_long(function_obj.name)
+
+            return fn(x, y)
+
+        return guarded_fn
+
+    @staticmethod
+    def _result_too_long(name: str) -> CommandException:
+        """Create the error aborting a computation whose result would be longer than `MAX_RESULT_BITS`.
+
+        Args:
+            name (str): The name of the query function.
+
+        Returns:
+            CommandException: The error.
+        """
+
+        return CommandException(f"QueryFunction <{name}> would produce a result longer than {const.MAX_RESULT_BITS} bits, aborted!")
+
+    @contextmanager
+    def _restore_on_abort(self) -> Iterator[None]:
+        """Put the previous values back if the result length budget aborts the update run in the block.
+
+        Only a query function declaring `result_bits_fn` can abort an update midway,
+        the array is only copied beforehand for those.
+        """
+
+        if self._result_bits_fn is None:
+            yield
+            return
+
+        values = list(self._array_values())
+
+        try:
+            yield
+        except CommandException:
+            self.array = values
+            self._build()
+            raise
+
+    def _check_tag_supported(self, scale: int, val: int):
+        """Make sure the current query function can apply a lazy tag before any node is touched.
+
+        Args:
+            scale (int): The factor of the tag.
+            val (int): The value added by the tag.
+
+        Raises:
+            CommandException: If the current query function can't apply the tag.
+        """
+
+        if scale == 0:
+            if self._range_assign_fn is None:
+                raise CommandException(f"QueryFunction <{self._function_name}> doesn't support range assignments!")
+            return
+
+        if val != 0 and self._range_add_fn is None:
+            raise CommandException(f"QueryFunction <{self._function_name}> doesn't support range increments!")
+
+        if scale != 1 and (self._range_scale_fn is None or self._range_scale_fn(0, scale, 1) is None):
+            raise CommandException(f"QueryFunction <{self._function_name}> doesn't support range multiplications by {scale}!")
+
+    def _apply_tag(self, aggregate: int, scale: int, val: int, length: int) -> int:
+        """Compute the value of a node after applying the lazy tag x -> scale * x + val to its segment.
+
+        Args:
+            aggregate (int): The value of the node before the tag is applied.
+            scale (int): The factor of the tag.
+            val (int): The value added by the tag.
+            length (int): The number of elements in the node's segment.
+
+        Returns:
+            int: The value of the node once the tag is applied.
+
+        Raises:
+            CommandException: If the query function declares `result_bits_fn` and the
+            value is longer than `MAX_RESULT_BITS`. Range functions raising powers,
+            like those of products, refuse before computing a power that is too long.
+        """
+
+        try:
+            if scale == 0:
+                aggregate = self._range_assign_fn(val, length)
+            else:
+                if scale != 1:
+                    aggregate = self._range_scale_fn(aggregate, scale, length)
+                if val != 0:
+                    aggregate = self._range_add_fn(aggregate, val, length)
+        except OverflowError:
+            raise self._result_too_long(self._function_name)
+
+        if self._result_bits_fn is not None and aggregate.bit_length() > const.MAX_RESULT_BITS:
+            raise self._result_too_long(self._function_name)
+
+        return aggregate
+
+    def _allocate_tags(self):
+        """Allocate the lazy tags of every node if no range update allocated them yet.
+
+        Until then, every node reads the identity tag from an empty `SparseValues`,
+        so a tree never updated by range, such as one over a memory-mapped array,
+        does not hold two Python lists as long as its node arrays.
+        """
+
+        if isinstance(self.lazy_scale, SparseValues):
+            self.lazy_scale = [1] * self.capacity
+            self.lazy_data = [0] * self.capacity
+
+    def _compose_lazy(self, ID: int, scale: int, val: int):
+        """Compose a lazy tag on top of a node's tag while keeping `tagged_nodes` up to date.
+
+        Applying x -> a1 * x + b1 and then x -> a2 * x + b2 is the same as applying
+        x -> (a2 * a1) * x + (a2 * b1 + b2), so a node never holds more than one tag.
+
+        Args:
+            ID (int): The ID of the node receiving the lazy tag.
+            scale (int): The factor of the tag applied last.
+            val (int): The value added by the tag applied last.
+        """
+
+        before_scale, before_data = self.lazy_scale[ID], self.lazy_data[ID]
+        after_scale, after_data = scale * before_scale, scale * before_data + val
+
+        self.lazy_scale[ID] = after_scale
+        self.lazy_data[ID] = after_data
+
+        if after_scale != 1 or after_data != 0:
+            self.tagged_nodes.add(ID)
+        else:
+            self.tagged_nodes.discard(ID)
+
+    def _update_segment_lazy(self, scale: int, val: int, ID: int, low: int, high: int, segment_low: int, segment_high: int):
+        """Recursively updates a segment in the segment tree with a lazy tag.
+
+        This function applies a tag to a specified segment of the segment tree, handling lazy propagation
+        to ensure that all updates are correctly applied. It checks if the segment is valid and whether it
+        falls within the range of the current node, updating the node's data and propagating changes as necessary.
+
+        Args:
+            scale (int): The factor each element of the specified segment is multiplied by.
+            val (int): The value then added to each element of the specified segment.
+            ID (int): The ID of the current node in the segment tree being updated.
+            low (int): The lower bound of the current segment.
+            high (int): The upper bound of the current segment.
+            segment_low (int): The starting index of the segment to be updated.
+            segment_high (int): The ending index of the segment to be updated.
+        """
+
+        self.propagate(ID)
+
+        if self._is_segment_invalid(segment_low, segment_high, low, high):
+            return
+        if self._is_segment_within_range(segment_low, segment_high, low, high):
+            self.data[ID] = self._apply_tag(self.data[ID], scale, val, high - low + 1)
+
+            if low != high:
+                self._compose_lazy(2*ID, scale, val)
+                self._compose_lazy(2*ID+1, scale, val)
+
+            return
+
+        mid = (low+high) // 2
+        self._update_segment_lazy(scale, val, 2*ID, low, mid, segment_low, segment_high)
+        self._update_segment_lazy(scale, val, 2*ID+1, mid+1, high, segment_low, segment_high)
+        self.data[ID] = self._fn(self.data[2*ID], self.data[2*ID+1])
+
+    def _update_element_no_lazy(self, pos: int, val: int, ID: int, low: int, high: int) -> None:
+        """Recursively update the value at a specified position in the segment tree.
+
+        This function modifies the value of a node in the segment tree at the given
+        position and updates the relevant parent nodes accordingly. It traverses the
+        tree to find the correct node to update based on the specified position and
+        ensures that the current node's value is updated after the change. Pending
+        lazy tags on the way down are pushed to the children first so they are not
+        applied on top of the new value later on.
+
+        Args:
+            pos (int): The position in the segment tree to update.
+            val (int): The new value to set at the specified position.
+            ID (int): The ID of the current node being updated in the segment tree.
+            low (int): The lower index of the range for the current node.
+            high (int): The upper index of the range for the current node.
+        """
+
+        self.propagate(ID)
+
+        if low == high:
+            self.data[ID] = val
+            return
+
+        mid = (low+high) // 2
+        if pos <= mid:
+            self._update_element_no_lazy(pos, val, 2*ID, low, mid)
+            self.propagate(2*ID+1)
+        else:
+            self._update_element_no_lazy(pos, val, 2*ID+1, mid+1, high)
+            self.propagate(2*ID)
+
+        self.data[ID] = self._fn(self.data[2*ID], self.data[2*ID+1])
+
+    def _update_element_iterative(self, pos: int, val: int) -> None:
+        """Update the value at a specified position by walking from its leaf to the root.
+
+        The leaf is found through the position to leaf index instead of descending
+        from the root. Pending lazy values on the leaf's ancestors are pushed down
+        first so they are not applied on top of the new value, then every ancestor
+        is recomputed on the way back up.
+
+        Args:
+            pos (int): The position in the segment tree to update.
+            val (int): The new value to set at the specified position.
+        """
+
+        fn, data = self._fn, self.data
+        leaf = self.leaf_ID[pos]
+
+        if self.tagged_nodes:
+            for shift in range(leaf.bit_length()-1, -1, -1):
+                self.propagate(leaf >> shift)
+
+        data[leaf] = val
+        ID = leaf
+
+        while ID > 1:
+            self.propagate(ID ^ 1)
+            ID >>= 1
+            data[ID] = fn(data[2*ID], data[2*ID+1])
+
+    def _query_iterative(self, q_low: int, q_high: int) -> int:
+        """Query the segment tree for a specified range without recursion.
+
+        Two pointers start at the leaves of both ends of the range and climb
+        towards their lowest common ancestor. On the way up, the left pointer
+        collects every right sibling and the right pointer every left sibling,
+        which are exactly the nodes fully covered by the range. Values are
+        combined from left to right, so the result matches the recursive query
+        for every associative function. Must only be used while no lazy values
+        are pending, since the nodes' data is read as is.
+
+        Args:
+            q_low (int): The lower bound of the query range.
+            q_high (int): The upper bound of the query range.
+
+        Returns:
+            int: The result of the query for the specified range.
+        """
+
+        q_low = max(q_low, 0)
+        q_high = min(q_high, self.array_length-1)
+
+        if q_low > q_high:
+            return self._INVALID_QUERY
+
+        fn, data = self._fn, self.data
+        left = self.leaf_ID[q_low]
+        right = self.leaf_ID[q_high]
+
+        if left == right:
+            return data[left]
+
+        ancestor_left, ancestor_right = left, right
+        while ancestor_left.bit_length() > ancestor_right.bit_length():
+            ancestor_left >>= 1
+        while ancestor_right.bit_length() > ancestor_left.bit_length():
+            ancestor_right >>= 1
+        while ancestor_left != ancestor_right:
+            ancestor_left >>= 1
+            ancestor_right >>= 1
+
+        common_ancestor = ancestor_left
+        left_result, right_result = data[left], data[right]
+
+        while left >> 1 != common_ancestor:
+            if left % 2 == 0:
+                left_result = fn(left_result, data[left+1])
+            left >>= 1
+
+        while right >> 1 != common_ancestor:
+            if right % 2 == 1:
+                right_result = fn(data[right-1], right_result)
+            right >>= 1
+
+        return fn(left_result, right_result)
+
+    def _query_sparse_table(self, q_low: int, q_high: int) -> int:
+        """Query a range through the sparse table, building the table first if needed.
+
+        Args:
+            q_low (int): The lower bound of the query range.
+            q_high (int): The upper bound of the query range.
+
+        Returns:
+            int: The result of the query for the specified range.
+        """
+
+        q_low = max(q_low, 0)
+        q_high = min(q_high, self.array_length-1)
+
+        if q_low > q_high:
+            return self._INVALID_QUERY
+
+        if self._sparse_table is None:
+            self._sparse_table = SparseTable(self.array, self._fn, self._vectorized_fn)
+
+        return self._sparse_table.query(q_low, q_high)
+
+    def _query_many_sparse_table(self, lows: Sequence[int], highs: Sequence[int]) -> list[int]:
+        """Query a batch of ranges through the sparse table, building the table first if needed.
+
+        Args:
+            lows (Sequence[int]): The lower bound of each range to query.
+            highs (Sequence[int]): The upper bound of each range to query.
+
+        Returns:
+            list[int]: The result of each query, in the same order as the ranges.
+        """
+
+        q_low = numpy.maximum(numpy.asarray(lows, dtype=numpy.int64), 0)
+        q_high = numpy.minimum(numpy.asarray(highs, dtype=numpy.int64), self.array_length-1)
+        valid = q_low <= q_high
+
+        results = [self._INVALID_QUERY] * len(lows)
+        if not valid.any():
+            return results
+
+        if self._sparse_table is None:
+            self._sparse_table = SparseTable(self.array, self._fn, self._vectorized_fn)
+
+        indices = numpy.flatnonzero(valid)
+        for i, result in zip(indices.tolist(), self._sparse_table.query_many(q_low[indices], q_high[indices])):
+            results[i] = result
+
+        return results
+
+    def _order_statistics(self) -> WaveletMatrix:
+        """Get the wavelet matrix of the current values, building it first if needed.
+
+        Returns:
+            WaveletMatrix: The wavelet matrix.
+        """
+
+        if self._wavelet_matrix is None:
+            self._wavelet_matrix = WaveletMatrix(self._array_values())
+
+        return self._wavelet_matrix
+
+    def _query_many_vectorized(self, lows: Sequence[int], highs: Sequence[int]) -> list[int]:
+        """Run the two-pointer climb of `_query_iterative` for a batch of ranges at once.
+
+        Every step moves all the pointers that have not reached the child of their
+        lowest common ancestor up by one level, so the number of NumPy operations
+        depends on the height of the tree and not on the number of queries. Must
+        only be used while no lazy values are pending.
+
+        Args:
+            lows (Sequence[int]): The lower bound of each range to query.
+            highs (Sequence[int]): The upper bound of each range to query.
+
+        Returns:
+            list[int]: The result of each query, in the same order as the ranges.
+
+        Raises:
+            OverflowError: If a node value or a partial result does not fit in an int64.
+        """
+
+        fn = self._vectorized_fn
+        data = numpy.asarray(self.data, dtype=numpy.int64)
+        leaf_ID = numpy.frombuffer(self.leaf_ID, dtype=numpy.int64)
+
+        q_low = numpy.maximum(numpy.asarray(lows, dtype=numpy.int64), 0)
+        q_high = numpy.minimum(numpy.asarray(highs, dtype=numpy.int64), self.array_length-1)
+        valid = q_low <= q_high
+
+        left = leaf_ID[numpy.where(valid, q_low, 0)]
+        right = leaf_ID[numpy.where(valid, q_high, 0)]
+
+        # Leaves of a midpoint-split tree are at most one level apart.
+        ancestor_left = numpy.where(self._depths(left) > self._depths(right), left >> 1, left)
+        ancestor_right = numpy.where(self._depths(right) > self._depths(left), right >> 1, right)
+        while (differs := ancestor_left != ancestor_right).any():
+            ancestor_left[differs] >>= 1
+            ancestor_right[differs] >>= 1
+
+        common_ancestor = ancestor_left
+        left_result, right_result = data[left], data[right]
+        same_leaf = left == right
+
+        climbing = ~same_leaf & ((left >> 1) != common_ancestor)
+        while climbing.any():
+            take = climbing & (left % 2 == 0)
+            left_result[take] = fn(left_result[take], data[left[take]+1])
+            left[climbing] >>= 1
+            climbing &= (left >> 1) != common_ancestor
+
+        climbing = ~same_leaf & ((right >> 1) != common_ancestor)
+        while climbing.any():
+            take = climbing & (right % 2 == 1)
+            right_result[take] = fn(data[right[take]-1], right_result[take])
+            right[climbing] >>= 1
+            climbing &= (right >> 1) != common_ancestor
+
+        split = ~same_leaf
+        left_result[split] = fn(left_result[split], right_result[split])
+        results = left_result.tolist()
+
+        for i in numpy.flatnonzero(~valid).tolist():
+            results[i] = self._INVALID_QUERY
+
+        return results
+
+    def _query_many(self, lows: Sequence[int], highs: Sequence[int], indices: list[int], results: list[int], ID: int, low: int, high: int):
+        """Recursively query the segment tree for every range of a batch overlapping a node.
+
+        This function mirrors `_query`, but carries the indices of all the queries
+        overlapping the current node so that the node is visited once per batch
+        instead of once per query. Children that no query overlaps are skipped,
+        exactly like `_query` stops at segments that are invalid for its range.
+
+        Args:
+            lows (Sequence[int]): The lower bound of each range of the batch.
+            highs (Sequence[int]): The upper bound of each range of the batch.
+            indices (list[int]): The indices of the queries overlapping the current node.
+            results (list[int]): The results of the batch, where the result of each query
+            of `indices` for the current node is written.
+            ID (int): The ID of the current node being queried in the segment tree.
+            low (int): The lower index of the range for the current node.
+            high (int): The upper index of the range for the current node.
+        """
+
+        self.propagate(ID)
+
+        mid = (low+high) // 2
+        left_indices: list[int] = []
+        right_indices: list[int] = []
+
+        for i in indices:
+            q_low, q_high = lows[i], highs[i]
+
+            if q_low <= low and high <= q_high:
+                results[i] = self.data[ID]
+                continue
+
+            if q_low <= mid and low <= q_high:
+                left_indices.append(i)
+            if q_low <= high and mid+1 <= q_high:
+                right_indices.append(i)
+
+        if left_indices:
+            self._query_many(lows, highs, left_indices, results, 2*ID, low, mid)
+
+        both = [i for i in right_indices if lows[i] <= mid]
+        left_results = [results[i] for i in both]
+
+        if right_indices:
+            self._query_many(lows, highs, right_indices, results, 2*ID+1, mid+1, high)
+
+        for i, left_result in zip(both, left_results):
+            results[i] = self._fn(left_result, results[i])
+
+    @staticmethod
+    def _depths(IDs: numpy.ndarray) -> numpy.ndarray:
+        """Get the depth of every node of an array of heap-style IDs.
+
+        Args:
+            IDs (numpy.ndarray): The IDs of the nodes.
+
+        Returns:
+            numpy.ndarray: The depth of each node, the root having a depth of 0.
+        """
+
+        return numpy.frexp(IDs.astype(numpy.float64))[1] - 1
+
+    def _query(self, q_low: int, q_high: int, ID: int, low: int, high: int) -> int:
+        """Recursively query the segment tree for a specified range.
+
+        This function retrieves the aggregate value for the elements within the
+        range defined by `q_low` and `q_high`. It checks for invalid queries and
+        determines if the current node's range is fully within the query range,
+        returning the node's data if so, or recursively querying the children that
+        overlap the range otherwise. The invalid query value is only returned for a
+        range outside of the array, never combined into a result, since it isn't
+        the identity of every query function.
+
+        Args:
+            q_low (int): The lower bound of the query range.
+            q_high (int): The upper bound of the query range.
+            ID (int): The ID of the current node being queried in the segment tree.
+            low (int): The lower index of the range for the current node.
+            high (int): The upper index of the range for the current node.
+        """
+
+
+        if self._is_segment_invalid(q_low, q_high, low, high):
+            return self._INVALID_QUERY
+
+        self.propagate(ID)
+
+        if self._is_segment_within_range(q_low, q_high, low, high):
+            return self.data[ID]
+
+        mid = (low+high) // 2
+
+        if q_high <= mid:
+            return self._query(q_low, q_high, 2*ID, low, mid)
+        if mid < q_low:
+            return self._query(q_low, q_high, 2*ID+1, mid+1, high)
+
+        left_child = self._query(q_low, q_high, 2*ID, low, mid)
+        right_child = self._query(q_low, q_high, 2*ID+1, mid+1, high)
 
         return self._fn(left_child, right_child)
 
     def _is_segment_invalid(self, s_low: int, s_high: int, low: int, high: int) -> bool:
         """Check if the segment is invalid.
 
-        This function determines whether the specified segment is valid by 
+        This function determines whether the specified segment is valid by
         checking if the lower bound exceeds the upper bound or if the segment
-        does not overlap with the current range. It returns a boolean indicating 
+        does not overlap with the current range. It returns a boolean indicating
         the validity of the segment.
 
         Args:
@@ -288,8 +2086,8 @@ class SegmentTree:
     def _is_segment_within_range(self, s_low: int, s_high: int, low: int, high: int) -> bool:
         """Check if the current range is fully within a segment.
 
-        This function determines whether the specified range defined by `low` and 
-        `high` is completely contained within the segment defined by `s_low` 
+        This function determines whether the specified range defined by `low` and
+        `high` is completely contained within the segment defined by `s_low`
         and `s_high`. It returns a boolean indicating if the current range is within
         the bounds of the segment.
 
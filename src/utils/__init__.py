@@ -1,3 +1,8 @@
-from src.utils.app_enum import VisibilityEnum, ContourEnum, JSONThemeFieldsEnum, CommandRequestFields
+from src.utils.app_enum import VisibilityEnum, ContourEnum, JSONThemeFieldsEnum, CommandRequestFields, TraversalEnum, QueryEngineEnum
+from src.utils.array_file import map_array
+from src.utils.function_verifier import verify_query_function
 import src.utils.app_type as kay_typing
-import src.utils.constants as const
\ No newline at end of file
+import src.utils.constants as const
+from src.utils.parallel_build import build_in_parallel, parallel_build_supported, shutdown_build_pool
+from src.utils.int64_values import Int64Values
+from src.utils.sparse_values import SparseValues
@@ -15,6 +15,50 @@ class ContourEnum(Enum):
     LEFT = auto()
     RIGHT = auto()
 
+@unique
+class TraversalEnum(Enum):
+    """
+    Enumerates the ways the segment tree can walk its nodes when answering
+    point updates and range queries.
+
+    Attributes:
+        RECURSIVE: Descend from the root, splitting every segment at its middle.
+        ITERATIVE: Start from the leaves found through the position to leaf index
+        and climb towards the root. Queries of a query function that isn't
+        associative still descend from the root.
+    """
+
+    RECURSIVE = "recursive"
+    ITERATIVE = "iterative"
+
+@unique
+class QueryEngineEnum(Enum):
+    """
+    Enumerates the engines that can answer range queries. Whatever the engine,
+    the segment tree stays the model that is drawn and updated.
+
+    Attributes:
+        SEGMENT_TREE: Walk the segment tree itself.
+        SPARSE_TABLE: Look the range up in a sparse table built from the array,
+        only available for idempotent query functions.
+        FENWICK: Keep the values in a Fenwick tree that also takes point updates
+        and, for sums, range increments, only available for invertible query
+        functions. The segment tree is then only rebuilt when it is looked at.
+        BEATS: Keep the values in a segment tree beats that also takes range
+        chmin and chmax, only available for sums, minimums and maximums. The
+        segment tree is then only rebuilt when it is looked at.
+        SEQUENCE: Keep the values in an implicit treap that also takes point
+        updates and positional inserts and removals in O(log n), only available
+        for associative query functions. The segment tree is then only rebuilt
+        when it is looked at.
+    """
+
+    SEGMENT_TREE = "segment-tree"
+    SPARSE_TABLE = "sparse-table"
+    FENWICK = "fenwick"
+    BEATS = "beats"
+    SEQUENCE = "sequence"
+
 @unique
 class VisibilityEnum(Enum):
     """
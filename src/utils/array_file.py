@@ -0,0 +1,42 @@
+import os
+
+import numpy
+
+from src.exceptions import CommandException
+
+def map_array(path: str) -> numpy.ndarray:
+    """Memory-map an array of integers stored in a file.
+
+    `.npy` files are opened with their own header, any other file is read as raw
+    little-endian int64 values. The mapping is copy-on-write: nothing is read
+    until it's needed, pages only end up in memory once they are read, and values
+    written to the array stay private to the process instead of reaching the file.
+
+    Args:
+        path (str): The path of the file to map.
+
+    Returns:
+        numpy.ndarray: A one-dimensional array backed by the file.
+
+    Raises:
+        CommandException: If the file can't be read or doesn't hold a one-dimensional array of integers.
+    """
+
+    try:
+        if path.endswith(".npy"):
+            mapped = numpy.load(path, mmap_mode="c", allow_pickle=False)
+        else:
+            size = os.path.getsize(path)
+            if size % 8 != 0:
+                raise CommandException(f"File <{path}> isn't made of int64 values, its size isn't a multiple of 8 bytes!")
+            if size == 0:
+                return numpy.empty(0, dtype=numpy.int64)
+
+            mapped = numpy.memmap(path, dtype="<i8", mode="c")
+    except (OSError, ValueError) as e:
+        raise CommandException(f"Couldn't map <{path}>: {e}")
+
+    if mapped.ndim != 1 or not numpy.can_cast(mapped.dtype, numpy.int64):
+        raise CommandException(f"File <{path}> doesn't hold a one-dimensional array of integers that fit in an int64!")
+
+    return mapped
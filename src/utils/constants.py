@@ -33,11 +33,25 @@ CIRCLE_OUTLINE_THICKNESS: int = 4
 LINE_THICKNESS: float = CIRCLE_OUTLINE_THICKNESS / 2.0
 NODE_CIRCLE_RADIUS: int = 50
 
+# -- Viewport culling
+# How far beyond the window, in pixels, a node is still drawn: its circle,
+# value and lazy tag are drawn around it at a fixed size whatever the zoom.
+VIEWPORT_MARGIN: int = 4 * NODE_CIRCLE_RADIUS
+
+# -- Hover picking
+# Side, in pixels, of the square around a node's center the mouse hovers it in.
+NODE_HIT_BOX_SIZE: int = NODE_CIRCLE_RADIUS + 25
+
 # -- Distance between nodes and subtrees
 NODE_DISTANCE: float = 0.7
 SIBLING_DISTANCE: float = 0.0
 TREE_DISTANCE: float = 0.1
 
+# -- Layout cache
+# Two int64 coordinates per node slot: 128 MiB holds the layouts of arrays
+# up to 2^22 elements.
+LAYOUT_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+
 # -- UI config files
 THEME_IDENTIFIER_SUFFIX: str = "-app-theme"
 CMD_THEME_FILE: str = "theme/cmdline_ui-DO-NOT-EDIT.json"
@@ -53,6 +67,24 @@ LAZY_LINE_OFFSET = NODE_CIRCLE_RADIUS - CIRCLE_OUTLINE_THICKNESS - 5
 
 HISTORY_SIZE_LIMIT: int = 100
 
+# -- Batch commands
+BATCH_CHUNK_SIZE: int = 65536
+
+# -- Parallel build
+# Building the values is memory bound: a reused pool still spends about 10 ms a
+# build on its tasks, and copying the nodes in and out of shared memory takes
+# about 3/4 of a serial build, so the pool needs more than 3 workers to win at
+# all. With 8, measured costs put the break-even at about 2M elements.
+PARALLEL_BUILD_MIN_LENGTH: int = 1 << 21
+PARALLEL_BUILD_TASKS_PER_WORKER: int = 4
+
+# -- Query functions
+# Results are printed and drawn in decimal, which Python refuses to do past
+# 4300 digits (about 14000 bits).
+MAX_RESULT_BITS: int = 8192
+DEFAULT_MODULUS: int = 998244353
+MAX_NODE_DATA_DIGITS: int = 12
+
 # Links
 GITHUB_LINK: kay_typing.WebLink = kay_typing.WebLink("https://github.com/bennett-nguyen/KAY")
 LICENSE_LINK: kay_typing.WebLink = kay_typing.WebLink("https://github.com/bennett-nguyen/KAY/blob/main/LICENSE")
@@ -0,0 +1,97 @@
+import random
+from typing import Callable, Optional
+
+import numpy
+
+from src.dataclass import QueryFunction
+
+BEATS_FUNCTIONS: dict[str, Callable[[int, int], int]] = {"sum": lambda x, y: x + y, "max": max, "min": min}
+
+def verify_query_function(function: QueryFunction, samples: int = 200, seed: int = 0) -> list[str]:
+    """Check the properties a query function declares on random values.
+
+    Samples mix small values, which make equal operands likely, with large ones.
+    A sample on which `fn` raises is skipped, the declared properties only have
+    to hold where the function is defined. The values are drawn from a generator
+    seeded with `seed`, so a function is always checked on the same values.
+
+    Args:
+        function (QueryFunction): The function to check.
+        samples (int): The number of random triples of values to check each property on.
+        seed (int): The seed of the random values.
+
+    Returns:
+        list[str]: The names of the fields declaring a property that doesn't hold,
+        empty if every declared property holds.
+    """
+
+    rng = random.Random(seed)
+    fn = function.fn
+    failed: dict[str, None] = {}
+
+    def draw() -> int:
+        return rng.randint(-16, 16) if rng.random() < 0.5 else rng.randint(-10**6, 10**6)
+
+    def holds(check: Callable[[], bool]) -> bool:
+        try:
+            return check()
+        except (ArithmeticError, ValueError):
+            return True
+
+    # Functions such as x ** y are costly on large values, they are only
+    # evaluated for the properties the function declares.
+    checks_result = function.identity is not None or function.idempotent \
+        or function.inverse_fn is not None or function.beats_field is not None
+
+    for _ in range(samples):
+        x, y, z = draw(), draw(), draw()
+        result = _try(fn, x, y) if checks_result else None
+
+        if function.associative and not holds(lambda: fn(fn(x, y), z) == fn(x, fn(y, z))):
+            failed["associative"] = None
+
+        if function.commutative and not holds(lambda: fn(x, y) == fn(y, x)):
+            failed["commutative"] = None
+
+        if result is None:
+            continue
+
+        if function.identity is not None \
+                and not holds(lambda: fn(function.identity, result) == result == fn(result, function.identity)):
+            failed["identity"] = None
+
+        if function.idempotent and not holds(lambda: fn(result, result) == result):
+            failed["idempotent"] = None
+
+        if function.inverse_fn is not None and not holds(lambda: function.inverse_fn(result, y) == x):
+            failed["inverse_fn"] = None
+
+        if function.beats_field is not None \
+                and BEATS_FUNCTIONS.get(function.beats_field, lambda x, y: None)(x, y) != result:
+            failed["beats_field"] = None
+
+    if function.vectorized_fn is not None and not _vectorized_fn_matches(function, rng, samples):
+        failed["vectorized_fn"] = None
+
+    return list(failed)
+
+def _try(fn: Callable[[int, int], int], x: int, y: int) -> Optional[int]:
+    """Combine two values, None if `fn` isn't defined for them."""
+
+    try:
+        return fn(x, y)
+    except (ArithmeticError, ValueError):
+        return None
+
+def _vectorized_fn_matches(function: QueryFunction, rng: random.Random, samples: int) -> bool:
+    """Check that the vectorized form of a function gives the same results as the function on values that fit in an int64."""
+
+    xs = [rng.randint(-10**6, 10**6) for _ in range(samples)]
+    ys = [rng.randint(-10**6, 10**6) for _ in range(samples)]
+
+    try:
+        vectorized = function.vectorized_fn(numpy.array(xs, dtype=numpy.int64), numpy.array(ys, dtype=numpy.int64)).tolist()
+    except OverflowError:
+        return True
+
+    return all(_try(function.fn, x, y) in (None, result) for x, y, result in zip(xs, ys, vectorized))
@@ -0,0 +1,51 @@
+from typing import Iterator, Optional
+
+import numpy
+
+class Int64Values:
+    """
+    Represents a fixed-length sequence of integers kept in an int64 array for as
+    long as its values fit in one. Values are read back as Python ints, so code
+    combining them never runs into NumPy's wrap-around arithmetic. The first value
+    written that doesn't fit in an int64 copies the array into a list of Python
+    ints, which holds any value from then on.
+    """
+
+    def __init__(self, values: numpy.ndarray):
+        """Wrap an int64 array without copying it.
+
+        Args:
+            values (numpy.ndarray): The int64 array holding the values.
+        """
+
+        self._values: numpy.ndarray | list[int] = values
+        self._detached = False
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, index: int) -> int:
+        if self._detached:
+            return self._values[index]
+
+        return self._values.item(index)
+
+    def __setitem__(self, index: int, val: int):
+        try:
+            self._values[index] = val
+        except OverflowError:
+            self._values = self._values.tolist()
+            self._detached = True
+            self._values[index] = val
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._values if self._detached else self._values.tolist())
+
+    def __array__(self, dtype: Optional[numpy.dtype] = None, copy: Optional[bool] = None) -> numpy.ndarray:
+        """Get the values as an array, the int64 array itself while the values fit in it.
+
+        Raises:
+            OverflowError: If the values no longer fit in the requested type.
+        """
+
+        return numpy.asarray(self._values, dtype=dtype)
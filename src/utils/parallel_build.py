@@ -0,0 +1,184 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Optional
+
+import numpy
+
+from src.utils import constants as const
+
+VectorizedFn = Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray]
+
+# Set in every worker by `_init_worker`. The workers are forked, so the
+# function is inherited rather than pickled, which lets lambdas and closures
+# be used as query functions. The nodes change with every build, so each task
+# attaches them from shared memory instead.
+_worker_fn: Optional[VectorizedFn] = None
+
+# The pool kept between builds by `_get_pool`, with the function its workers
+# were forked with and their number.
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_fn: Optional[VectorizedFn] = None
+_pool_workers: int = 0
+
+def parallel_build_supported() -> bool:
+    """Check whether worker processes can be forked on this platform.
+
+    Returns:
+        bool: True if the "fork" start method is available, otherwise False.
+    """
+
+    return "fork" in multiprocessing.get_all_start_methods()
+
+def build_in_parallel(values: numpy.ndarray, leaf_ID: numpy.ndarray, low: numpy.ndarray, high: numpy.ndarray,
+                      levels: list[numpy.ndarray], fn: VectorizedFn, workers: int) -> numpy.ndarray:
+    """Compute the value of every node of a segment tree with a pool of worker processes.
+
+    The tree is cut at the shallowest level with enough nodes to give every worker
+    `PARALLEL_BUILD_TASKS_PER_WORKER` subtrees. The descendants of a contiguous
+    range of IDs [a, b) on that level are the ranges [a*2^k, b*2^k) on the k-th
+    level below, so each task computes the subtrees of a range of IDs level by
+    level, writing disjoint slices of a node array kept in shared memory next to
+    a mask of the internal nodes. The levels above the cut are then computed in
+    this process. The workers are only forked by the first build with a given
+    function, see `_get_pool`.
+
+    Args:
+        values (numpy.ndarray): The int64 value at each position.
+        leaf_ID (numpy.ndarray): The ID of the leaf of each position.
+        low (numpy.ndarray): The low bound of every node slot.
+        high (numpy.ndarray): The high bound of every node slot.
+        levels (list[numpy.ndarray]): The IDs of the internal nodes of each level,
+            starting from the root's level, in increasing order.
+        fn (VectorizedFn): The element-wise query function.
+        workers (int): The number of worker processes.
+
+    Returns:
+        numpy.ndarray: The int64 value of every node slot.
+
+    Raises:
+        OverflowError: If the value of any node does not fit in an int64.
+    """
+
+    capacity = len(low)
+    tasks = workers * const.PARALLEL_BUILD_TASKS_PER_WORKER
+    split_depth = min(max(tasks-1, 0).bit_length(), len(levels))
+    first, last = 1 << split_depth, 2 << split_depth
+
+    bounds = numpy.linspace(first, last, num=min(tasks, last-first)+1, dtype=numpy.int64).tolist()
+    # A new shared memory block is zero-filled, like the slots without a node must be.
+    shared = SharedMemory(create=True, size=capacity * (numpy.dtype(numpy.int64).itemsize + 1))
+
+    try:
+        data, internal = _attach(shared, capacity)
+        data[leaf_ID] = values
+        numpy.less(low, high, out=internal)
+
+        pool = _get_pool(fn, workers)
+        depth = len(levels) - split_depth
+
+        try:
+            futures = [pool.submit(_build_subtrees, shared.name, capacity, depth, a, b) for a, b in zip(bounds, bounds[1:])]
+            # Every task must be done with the shared memory before it is unlinked,
+            # even when one of them failed.
+            wait(futures)
+
+            for future in futures:
+                future.result()
+        except BrokenProcessPool:
+            shutdown_build_pool()
+            raise
+
+        for level in reversed(levels[:split_depth]):
+            data[level] = fn(data[2*level], data[2*level+1])
+
+        result = data.copy()
+    finally:
+        data = internal = None
+        shared.close()
+        shared.unlink()
+
+    return result
+
+def shutdown_build_pool():
+    """Stop the workers kept for the next parallel build, if any.
+
+    A forked worker shares the memory of this process as it was at the fork, so
+    whatever was freed since then stays allocated until the worker stops. The
+    pool should be shut down once the array it was forked over is replaced.
+    """
+
+    global _pool, _pool_fn, _pool_workers
+
+    if _pool is not None:
+        _pool.shutdown()
+        _pool, _pool_fn, _pool_workers = None, None, 0
+
+def _get_pool(fn: VectorizedFn, workers: int) -> ProcessPoolExecutor:
+    """Get a pool of workers computing with the function, forking them if needed.
+
+    The pool is kept between builds, so rebuilding a tree doesn't fork again. It is
+    only replaced when the function or the number of workers changes, since the
+    workers inherit the function when they are forked.
+
+    Args:
+        fn (VectorizedFn): The element-wise query function.
+        workers (int): The number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor: The pool of workers.
+    """
+
+    global _pool, _pool_fn, _pool_workers
+
+    if _pool is None or _pool_fn is not fn or _pool_workers != workers:
+        shutdown_build_pool()
+        context = multiprocessing.get_context("fork")
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(fn,))
+        _pool_fn, _pool_workers = fn, workers
+
+    return _pool
+
+def _attach(shared: SharedMemory, capacity: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """View a shared memory block as the node values followed by the mask of the internal nodes.
+
+    Args:
+        shared (SharedMemory): The shared memory block of the build.
+        capacity (int): The number of node slots of the tree.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: The int64 node values and the boolean mask.
+    """
+
+    data = numpy.ndarray((capacity,), dtype=numpy.int64, buffer=shared.buf)
+    internal = numpy.ndarray((capacity,), dtype=numpy.bool_, buffer=shared.buf, offset=data.nbytes)
+    return data, internal
+
+def _init_worker(fn: VectorizedFn):
+    global _worker_fn
+    _worker_fn = fn
+
+def _build_subtrees(name: str, capacity: int, depth: int, first: int, last: int):
+    """Compute the nodes of the subtrees rooted at the IDs [first, last) of the cut level.
+
+    Args:
+        name (str): The name of the shared memory block of the build.
+        capacity (int): The number of node slots of the tree.
+        depth (int): The number of levels with internal nodes from the cut level down.
+        first (int): The first root.
+        last (int): One past the last root.
+    """
+
+    shared = SharedMemory(name=name)
+
+    try:
+        data, internal = _attach(shared, capacity)
+
+        for k in range(depth-1, -1, -1):
+            begin, end = first << k, last << k
+            IDs = numpy.flatnonzero(internal[begin:end]) + begin
+            data[IDs] = _worker_fn(data[2*IDs], data[2*IDs+1])
+    finally:
+        data = internal = None
+        shared.close()
\ No newline at end of file
@@ -0,0 +1,20 @@
+class SparseValues(dict):
+    """
+    Represents a sequence of integers indexed by ID in which almost every value
+    is the same default, only the other values being stored. Reading an ID that
+    was never written gives the default without storing it, so the memory used
+    only depends on the number of IDs written, not on the length of the sequence.
+    """
+
+    def __init__(self, default: int):
+        """Create a sequence where every ID holds the default.
+
+        Args:
+            default (int): The value of every ID not written otherwise.
+        """
+
+        super().__init__()
+        self.default = default
+
+    def __missing__(self, ID: int) -> int:
+        return self.default
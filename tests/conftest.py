@@ -0,0 +1,17 @@
+import os
+import sys
+
+# The window loads its icon and fonts from paths relative to the repository root.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+import pytest
+
+@pytest.fixture
+def app_state():
+    from src.app_state.app_state import AppState
+
+    return AppState()
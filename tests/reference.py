@@ -0,0 +1,27 @@
+from typing import Callable, Sequence
+
+def midpoint_node(fn: Callable[[int, int], int], values: Sequence[int], low: int, high: int) -> int:
+    """The value of the node over [low, high] of a segment tree split at midpoints, computed from scratch."""
+
+    if low == high:
+        return values[low]
+
+    mid = (low+high) // 2
+    return fn(midpoint_node(fn, values, low, mid), midpoint_node(fn, values, mid+1, high))
+
+def midpoint_query(fn: Callable[[int, int], int], values: Sequence[int], q_low: int, q_high: int) -> int:
+    """The result of a range query on a segment tree split at midpoints, which non-associative functions depend on."""
+
+    def walk(low: int, high: int) -> int:
+        if q_low <= low and high <= q_high:
+            return midpoint_node(fn, values, low, high)
+
+        mid = (low+high) // 2
+        if q_high <= mid:
+            return walk(low, mid)
+        if q_low > mid:
+            return walk(mid+1, high)
+
+        return fn(walk(low, mid), walk(mid+1, high))
+
+    return walk(0, len(values)-1)
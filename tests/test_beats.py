@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from src.exceptions import CommandException
+from src.exports.query_functions.core_query_functions import add_f, max_f, min_f, xor_f
+from src.segment_tree import SegmentTree
+from src.utils import QueryEngineEnum
+
+AGGREGATES = {add_f.name: sum, min_f.name: min, max_f.name: max}
+
+@pytest.mark.parametrize("function", [add_f, min_f, max_f], ids=lambda function: function.name)
+def test_beats_engine_matches_brute_force(function):
+    rng = random.Random(16)
+    aggregate = AGGREGATES[function.name]
+    values = [rng.randint(-20, 20) for _ in range(40)]
+    segment_tree = SegmentTree(list(values), function)
+    segment_tree.set_engine(QueryEngineEnum.BEATS)
+
+    for _ in range(150):
+        low = rng.randrange(40)
+        high = rng.randrange(low, 40)
+        val = rng.randint(-25, 25)
+        roll = rng.random()
+
+        if roll < 0.2:
+            segment_tree.chmin_segment(val, low, high)
+            values[low:high+1] = [min(x, val) for x in values[low:high+1]]
+        elif roll < 0.4:
+            segment_tree.chmax_segment(val, low, high)
+            values[low:high+1] = [max(x, val) for x in values[low:high+1]]
+        elif roll < 0.55:
+            segment_tree.update_segment_lazy(val // 5, low, high)
+            values[low:high+1] = [x + val // 5 for x in values[low:high+1]]
+        elif roll < 0.65:
+            segment_tree.update_element_no_lazy(low, val)
+            values[low] = val
+        else:
+            assert segment_tree.query(low, high) == aggregate(values[low:high+1])
+
+    assert segment_tree.array == values
+
+def test_beats_fields_of_the_root():
+    values = [5, -3, 5, 8, 8, 1]
+    segment_tree = SegmentTree(list(values), add_f)
+    segment_tree.set_engine(QueryEngineEnum.BEATS)
+    segment_tree.chmin_segment(6, 0, 5)
+    values = [min(x, 6) for x in values]
+
+    fields = segment_tree.beats_fields(1)
+    assert fields["sum"] == sum(values)
+    assert fields["max"] == 6 and fields["max count"] == 2
+
+    segment_tree.set_engine(QueryEngineEnum.SEGMENT_TREE)
+    assert segment_tree.beats_fields(1) is None
+    assert segment_tree.query(0, 5) == sum(values)
+
+def test_clamping_needs_the_beats_engine():
+    segment_tree = SegmentTree([1, 2, 3], add_f)
+
+    with pytest.raises(CommandException):
+        segment_tree.chmin_segment(2, 0, 2)
+
+    with pytest.raises(CommandException):
+        SegmentTree([1, 2, 3], xor_f).set_engine(QueryEngineEnum.BEATS)
@@ -0,0 +1,47 @@
+import numpy
+import pytest
+
+from src.app_state.states.tree_manager import TreeManager
+from src.dataclass.camera import Camera
+from src.window import pygame_window
+
+@pytest.mark.parametrize("zoom_level", [0.25, 1.0, 1.5])
+def test_screen_and_world_coordinates_round_trip(zoom_level):
+    camera = Camera(zoom_level=zoom_level)
+    camera.move(37, -11)
+
+    for x, y in [(0, 0), (100, 40), (-64, 1000)]:
+        screen_x, screen_y = camera.to_screen(x, y)
+        assert camera.to_world(screen_x, screen_y) == pytest.approx((x, y), abs=1 / zoom_level)
+
+def test_to_screen_many_matches_to_screen():
+    camera = Camera(x_offset=-20, y_offset=7, zoom_level=0.75)
+    x = numpy.array([0, 3, -5, 1001, -999], dtype=numpy.int64)
+    y = numpy.array([0, 80, 160, 240, -7], dtype=numpy.int64)
+
+    screen_x, screen_y = camera.to_screen_many(x, y)
+    assert list(zip(screen_x.tolist(), screen_y.tolist())) == [camera.to_screen(*point) for point in zip(x.tolist(), y.tolist())]
+
+def test_panning_and_zooming_leave_the_layout_alone():
+    tree_manager = TreeManager(list(range(100)))
+    tree_manager.generate_node_position()
+    segment_tree = tree_manager.segment_tree
+    original_x, original_y = list(segment_tree.original_x), list(segment_tree.original_y)
+
+    tree_manager.camera.move(50, -30)
+    tree_manager.camera.zoom_level = 0.5
+
+    assert list(segment_tree.original_x) == original_x and list(segment_tree.original_y) == original_y
+
+@pytest.mark.parametrize("zoom_level", [0.5, 1.0, 2.0])
+def test_focus_node_centers_it(zoom_level):
+    tree_manager = TreeManager(list(range(100)))
+    tree_manager.generate_node_position()
+    segment_tree = tree_manager.segment_tree
+    tree_manager.camera.zoom_level = zoom_level
+    ID = segment_tree.leaf_ID[37]
+
+    tree_manager.focus_node(ID)
+
+    assert tree_manager.camera.to_screen(segment_tree.original_x[ID], segment_tree.original_y[ID]) == \
+        (pygame_window.half_window_width, pygame_window.half_window_height)
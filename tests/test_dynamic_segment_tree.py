@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from src.dynamic_segment_tree import DynamicSegmentTree
+from src.exceptions import CommandException
+from src.exports.query_functions.core_query_functions import add_f, gcd_f, max_f, min_f, sub_f, xor_f
+from src.segment_tree import SegmentTree
+
+@pytest.mark.parametrize("function", [add_f, min_f, max_f, xor_f, gcd_f, sub_f], ids=lambda function: function.name)
+def test_dynamic_tree_matches_dense_tree(function):
+    rng = random.Random(13)
+    dynamic_tree = DynamicSegmentTree(37, 2, function)
+    segment_tree = SegmentTree([2] * 37, function)
+
+    for _ in range(80):
+        low = rng.randint(-2, 37)
+        high = rng.randint(low - 1, 39)
+        roll = rng.random()
+
+        if roll < 0.3 and 0 <= low < 37:
+            val = rng.randint(-5, 5)
+            dynamic_tree.update_element_no_lazy(low, val)
+            segment_tree.update_element_no_lazy(low, val)
+        elif roll < 0.6:
+            scale, val = rng.choice([(1, rng.randint(-3, 3)), (0, rng.randint(-3, 3))])
+            try:
+                segment_tree.affine_segment_lazy(scale, val, low, high)
+            except CommandException:
+                with pytest.raises(CommandException):
+                    dynamic_tree.affine_segment_lazy(scale, val, low, high)
+                continue
+            dynamic_tree.affine_segment_lazy(scale, val, low, high)
+
+        assert list(dynamic_tree.array) == segment_tree.array
+        assert dynamic_tree.query(low, high) == segment_tree.query(low, high)
+
+def test_nodes_are_created_in_pairs_and_collapsed_nodes_are_leaves():
+    dynamic_tree = DynamicSegmentTree(100, 0, add_f)
+    dynamic_tree.update_element_no_lazy(40, 5)
+    dynamic_tree.update_segment_lazy(1, 10, 60)
+
+    for ID in dynamic_tree.data:
+        assert (ID in dynamic_tree.uniform) == dynamic_tree.is_leaf(ID)
+        if ID > 1:
+            assert ID // 2 in dynamic_tree.data and ID ^ 1 in dynamic_tree.data
+
+    for pos in range(100):
+        leaf = dynamic_tree.leaf_ID[pos]
+        assert dynamic_tree.low[leaf] <= pos <= dynamic_tree.high[leaf]
+
+def test_huge_length_stays_small():
+    length = 10**12
+    dynamic_tree = DynamicSegmentTree(length, 1, add_f)
+    dynamic_tree.update_element_no_lazy(123456789, 10)
+    dynamic_tree.update_segment_lazy(2, 10**11, 5 * 10**11)
+
+    # Each update only splits the nodes along the paths to the ends of its range.
+    height = length.bit_length() + 1
+    assert len(dynamic_tree.data) <= 3 * 2 * height
+    assert dynamic_tree.query(0, length - 1) == length + 9 + 2 * (4 * 10**11 + 1)
+    assert dynamic_tree.query(123456789, 123456789) == 10
+
+def test_dynamic_tree_refuses_length_changes_and_persistence():
+    dynamic_tree = DynamicSegmentTree(10, 0, add_f)
+
+    for change in (lambda: dynamic_tree.insert(0, 1), lambda: dynamic_tree.remove(0), dynamic_tree.enable_persistence):
+        with pytest.raises(CommandException):
+            change()
@@ -0,0 +1,82 @@
+import random
+from functools import reduce
+
+import pytest
+
+from src.engines import FenwickTree
+from src.exceptions import CommandException
+from src.exports.query_functions.core_query_functions import add_f, min_f, xor_f
+from src.segment_tree import SegmentTree
+from src.utils import QueryEngineEnum
+
+@pytest.mark.parametrize("function", [add_f, xor_f], ids=lambda function: function.name)
+def test_fenwick_tree_matches_brute_force(function):
+    rng = random.Random(11)
+    values = [rng.randint(-50, 50) for _ in range(35)]
+    fenwick_tree = FenwickTree(values, function.fn, function.inverse_fn, function.identity)
+
+    for _ in range(100):
+        low = rng.randrange(35)
+        high = rng.randrange(low, 35)
+        if rng.random() < 0.5:
+            values[low] = rng.randint(-50, 50)
+            fenwick_tree.set(low, values[low])
+        else:
+            assert fenwick_tree.query(low, high) == reduce(function.fn, values[low:high+1])
+
+@pytest.mark.parametrize("function", [add_f, xor_f], ids=lambda function: function.name)
+def test_fenwick_engine_matches_brute_force(function):
+    rng = random.Random(11)
+    values = [rng.randint(-50, 50) for _ in range(35)]
+    segment_tree = SegmentTree(list(values), function)
+    segment_tree.set_engine(QueryEngineEnum.FENWICK)
+
+    for _ in range(150):
+        low = rng.randrange(35)
+        high = rng.randrange(low, 35)
+        val = rng.randint(-9, 9)
+        roll = rng.random()
+
+        if roll < 0.25:
+            segment_tree.update_element_no_lazy(low, val)
+            values[low] = val
+        elif roll < 0.4:
+            segment_tree.update_many([low, high], [val, val + 1])
+            values[low], values[high] = val, val + 1
+        elif roll < 0.55 and function is add_f:
+            segment_tree.update_segment_lazy(val, low, high)
+            values[low:high+1] = [x + val for x in values[low:high+1]]
+        else:
+            expected = reduce(function.fn, values[low:high+1])
+            assert segment_tree.query(low, high) == expected
+            assert segment_tree.query_many([low, -5], [high, -1]) == [expected, function.identity]
+
+    assert segment_tree.array == values
+
+def test_stale_tree_is_materialized():
+    segment_tree = SegmentTree([1, 2, 3, 4], add_f)
+    segment_tree.set_engine(QueryEngineEnum.FENWICK)
+    segment_tree.update_segment_lazy(10, 0, 2)
+    segment_tree.update_element_no_lazy(3, 0)
+
+    segment_tree.materialize()
+    assert segment_tree.root.data == 11 + 12 + 13
+    assert segment_tree.node(2).data == 23
+
+    # Going back to the segment tree keeps the updates.
+    segment_tree.set_engine(QueryEngineEnum.SEGMENT_TREE)
+    assert segment_tree.query(1, 3) == 25
+
+def test_switching_function_keeps_the_values():
+    segment_tree = SegmentTree([1, 2, 3], add_f)
+    segment_tree.set_engine(QueryEngineEnum.FENWICK)
+    segment_tree.update_segment_lazy(10, 0, 2)
+    segment_tree.update_element_no_lazy(1, 0)
+
+    segment_tree.switch_function(min_f)
+    segment_tree.rebuild()
+    assert segment_tree.array == [11, 0, 13] and segment_tree.query(0, 2) == 0
+
+def test_fenwick_engine_needs_an_inverse():
+    with pytest.raises(CommandException):
+        SegmentTree([1, 2], min_f).set_engine(QueryEngineEnum.FENWICK)
@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from src.app_state.states.tree_manager import TreeManager
+from src.utils import const
+
+class CountingDict(dict):
+    """A dict counting how many times its values are read."""
+
+    reads = 0
+
+    def __getitem__(self, key):
+        CountingDict.reads += 1
+        return super().__getitem__(key)
+
+def coordinates(segment_tree) -> dict[int, tuple[int, int]]:
+    return {ID: (segment_tree.original_x[ID], segment_tree.original_y[ID]) for ID in segment_tree.node_ids()}
+
+def sparse_tree_manager(length: int, updates: int, seed: int) -> TreeManager:
+    rng = random.Random(seed)
+    tree_manager = TreeManager([1])
+    tree_manager.use_sparse_tree(length, 0)
+
+    for _ in range(updates):
+        tree_manager.segment_tree.update_element_no_lazy(rng.randrange(length), rng.randint(1, 9))
+
+    return tree_manager
+
+@pytest.mark.parametrize("length", [1, 2, 3, 5, 8, 13, 100, 127, 128, 129, 1000])
+def test_node_by_node_layout_matches_closed_form(length):
+    tree_manager = TreeManager(list(range(length)))
+    tree_manager.generate_node_position()
+    closed_form = coordinates(tree_manager.segment_tree)
+
+    tree_manager.segment_tree.allocate_layout()
+    tree_manager._compute_prelim_x(1)
+    tree_manager._compute_final_coordinates(1, 0)
+
+    assert coordinates(tree_manager.segment_tree) == closed_form
+
+def test_sparse_layout_keeps_nodes_apart():
+    tree_manager = sparse_tree_manager(2**40, 300, seed=3)
+    tree_manager.generate_node_position()
+    segment_tree = tree_manager.segment_tree
+
+    levels: dict[int, list[int]] = {}
+    for ID in segment_tree.node_ids():
+        levels.setdefault(segment_tree.original_y[ID], []).append(segment_tree.original_x[ID])
+
+    for xs in levels.values():
+        xs.sort()
+        assert all(right > left for left, right in zip(xs, xs[1:]))
+
+def test_contour_walk_reads_constant_modifiers_per_node():
+    # Deep sparse trees thread many contours across long paths; summing the
+    # modifiers again from the root on every thread grew with the depth.
+    for length in (2**20, 2**60):
+        tree_manager = sparse_tree_manager(length, 2000, seed=1)
+        segment_tree = tree_manager.segment_tree
+        segment_tree.allocate_layout()
+        segment_tree.modifier = CountingDict()
+        segment_tree.thread_modifier = CountingDict()
+        CountingDict.reads = 0
+
+        tree_manager._compute_prelim_x(1)
+
+        assert CountingDict.reads / len(segment_tree.data) < 4
+
+def test_cached_layout_is_reused_without_allocating():
+    tree_manager = TreeManager(list(range(50)))
+    tree_manager.generate_node_position()
+    segment_tree = tree_manager.segment_tree
+    expected = coordinates(segment_tree)
+
+    segment_tree.insert(3, 9)
+    tree_manager.generate_node_position()
+    segment_tree.remove(3)
+
+    def allocate_layout(capacity=None):
+        raise AssertionError("a cached layout was computed again")
+
+    segment_tree.allocate_layout = allocate_layout
+    tree_manager.generate_node_position()
+
+    assert coordinates(segment_tree) == expected
+    assert list(tree_manager._layout_cache) == [51, 50]
+
+def test_layout_cache_stays_within_its_budget(monkeypatch):
+    monkeypatch.setattr(const, "LAYOUT_CACHE_MAX_BYTES", 20000)
+    tree_manager = TreeManager([1])
+
+    for length in range(200, 260):
+        tree_manager.use_dense_tree(list(range(length)))
+        assert tree_manager._layout_cache_bytes <= 20000
+
+    # The most recent lengths are the ones kept.
+    assert list(tree_manager._layout_cache)[-1] == 259
+    assert tree_manager._layout_cache_bytes == sum(
+        original_x.itemsize * len(original_x) + original_y.itemsize * len(original_y)
+        for original_x, original_y in tree_manager._layout_cache.values()
+    )
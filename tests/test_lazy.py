@@ -0,0 +1,179 @@
+import random
+from functools import reduce
+
+import numpy
+import pytest
+
+from src.exceptions import CommandException
+from src.exports.query_functions.core_query_functions import INT64_MAX, add_f, and_f, max_f, min_f, mul_f, sub_f, xor_f
+from src.segment_tree import SegmentTree
+from src.utils import TraversalEnum
+
+def assert_matches(segment_tree: SegmentTree, fn, values: list[int], rng: random.Random):
+    for _ in range(20):
+        q_low = rng.randrange(len(values))
+        q_high = rng.randrange(q_low, len(values))
+        assert segment_tree.query(q_low, q_high) == reduce(fn, values[q_low:q_high+1])
+
+@pytest.mark.parametrize("function", [add_f, min_f, max_f], ids=lambda function: function.name)
+def test_range_add_matches_brute_force(function):
+    rng = random.Random(6)
+    values = [rng.randint(-50, 50) for _ in range(40)]
+    segment_tree = SegmentTree(list(values), function)
+
+    for _ in range(60):
+        low = rng.randrange(40)
+        high = rng.randrange(low, 40)
+        val = rng.randint(-20, 20)
+        segment_tree.update_segment_lazy(val, low, high)
+        values[low:high+1] = [x + val for x in values[low:high+1]]
+
+        segment_tree.traversal = rng.choice(list(TraversalEnum))
+        assert_matches(segment_tree, function.fn, values, rng)
+
+@pytest.mark.parametrize("function", [xor_f, sub_f], ids=lambda function: function.name)
+def test_range_add_is_refused_without_range_add_fn(function):
+    segment_tree = SegmentTree([1, 2, 3, 4], function)
+    data = list(segment_tree.data)
+
+    with pytest.raises(CommandException):
+        segment_tree.update_segment_lazy(5, 0, 3)
+
+    assert segment_tree.data == data and not segment_tree.tagged_nodes
+
+@pytest.mark.parametrize("function", [add_f, min_f, max_f, xor_f, and_f, mul_f], ids=lambda function: function.name)
+def test_mixed_range_updates_match_brute_force(function):
+    rng = random.Random(8)
+    values = [rng.randint(-9, 9) for _ in range(30)]
+    segment_tree = SegmentTree(list(values), function)
+
+    for _ in range(80):
+        low = rng.randrange(30)
+        high = rng.randrange(low, 30)
+        scale, val = rng.choice([(0, rng.randint(-9, 9)), (1, rng.randint(-9, 9)), (rng.randint(1, 3), rng.randint(-9, 9))])
+
+        try:
+            segment_tree.affine_segment_lazy(scale, val, low, high)
+        except CommandException:
+            continue
+
+        values[low:high+1] = [scale * x + val for x in values[low:high+1]]
+        assert_matches(segment_tree, function.fn, values, rng)
+
+def test_tags_compose():
+    segment_tree = SegmentTree([1, 2, 3, 4], add_f)
+    segment_tree.update_segment_lazy(1, 0, 3)
+    segment_tree.affine_segment_lazy(2, 0, 0, 3)
+    segment_tree.affine_segment_lazy(1, 5, 0, 3)
+
+    # A node covered by an update takes it right away, its children keep the tag.
+    left = segment_tree.node(2)
+    assert (left.lazy_scale, left.lazy_data) == (2, 7)
+    assert left.tag_label == "*2+7"
+    assert segment_tree.query(0, 3) == 2*10 + 4*7
+
+    segment_tree.assign_segment_lazy(3, 0, 3)
+    assert left.tag_label == "=3"
+    assert list(segment_tree.array) == [3, 3, 3, 3]
+
+def test_scaling_by_a_negative_factor_is_refused_on_minimums():
+    segment_tree = SegmentTree([1, 2, 3], min_f)
+
+    with pytest.raises(CommandException):
+        segment_tree.affine_segment_lazy(-1, 0, 0, 2)
+
+    segment_tree.affine_segment_lazy(3, -1, 0, 2)
+    assert segment_tree.query(0, 2) == 2
+
+def test_array_is_synced_when_read():
+    values = [1, 2, 3, 4, 5, 6]
+    segment_tree = SegmentTree(values, add_f)
+
+    segment_tree.update_segment_lazy(10, 1, 4)
+    segment_tree.affine_segment_lazy(2, 0, 3, 5)
+    assert values == [1, 2, 3, 4, 5, 6]
+
+    assert segment_tree.array is values
+    assert values == [1, 12, 13, 28, 30, 12]
+
+@pytest.mark.parametrize("backing", [list, numpy.array], ids=["list", "numpy"])
+def test_array_synced_through_nested_tags(backing):
+    rng = random.Random(8)
+    values = [rng.randint(-50, 50) for _ in range(70)]
+    segment_tree = SegmentTree(backing(values), add_f)
+
+    for _ in range(40):
+        low = rng.randrange(70)
+        high = rng.randrange(low, 70)
+        scale, val = rng.choice([0, 1, 1, -1, 2]), rng.randint(-9, 9)
+        segment_tree.affine_segment_lazy(scale, val, low, high)
+        values[low:high+1] = [scale * x + val for x in values[low:high+1]]
+
+        if rng.random() < 0.3:
+            assert list(segment_tree.array) == values
+
+    assert list(segment_tree.array) == values
+
+def test_array_synced_past_int64():
+    segment_tree = SegmentTree(numpy.array([1, 2, 3, 4]), add_f)
+    segment_tree.affine_segment_lazy(INT64_MAX, 1, 1, 3)
+
+    assert list(segment_tree.array) == [1, 2 * INT64_MAX + 1, 3 * INT64_MAX + 1, 4 * INT64_MAX + 1]
+
+def test_array_edited_in_place_before_a_rebuild():
+    segment_tree = SegmentTree([1, 2, 3], add_f)
+    segment_tree.update_segment_lazy(1, 0, 2)
+
+    segment_tree.array[1] = 10
+    segment_tree.rebuild()
+
+    assert segment_tree.query(0, 2) == 2 + 10 + 4 and not segment_tree.tagged_nodes
+
+def test_tagged_nodes_hold_exactly_the_pending_tags():
+    rng = random.Random(15)
+    segment_tree = SegmentTree([rng.randint(-9, 9) for _ in range(50)], add_f)
+
+    for _ in range(40):
+        low = rng.randrange(50)
+        high = rng.randrange(low, 50)
+        segment_tree.affine_segment_lazy(rng.randint(1, 2), rng.randint(-3, 3), low, high)
+        if rng.random() < 0.3:
+            segment_tree.propagate(rng.choice(list(segment_tree.node_ids())))
+
+        assert segment_tree.tagged_nodes == {
+            ID for ID in segment_tree.node_ids() if segment_tree.lazy_scale[ID] != 1 or segment_tree.lazy_data[ID] != 0
+        }
+
+def test_propagate_all_pushes_every_tag_down():
+    rng = random.Random(15)
+    values = [rng.randint(-9, 9) for _ in range(50)]
+    segment_tree = SegmentTree(list(values), add_f)
+
+    for _ in range(20):
+        low = rng.randrange(50)
+        high = rng.randrange(low, 50)
+        val = rng.randint(-3, 3)
+        segment_tree.update_segment_lazy(val, low, high)
+        values[low:high+1] = [x + val for x in values[low:high+1]]
+
+    segment_tree.propagate_all()
+
+    assert not segment_tree.tagged_nodes
+    assert [segment_tree.data[segment_tree.leaf_ID[pos]] for pos in range(50)] == values
+    assert_matches(segment_tree, add_f.fn, values, rng)
+
+def test_propagate_all_skips_untagged_subtrees():
+    segment_tree = SegmentTree(list(range(64)), add_f)
+    segment_tree.update_segment_lazy(1, 0, 7)
+    propagated = []
+    propagate = segment_tree.propagate
+
+    def counting_propagate(ID: int):
+        propagated.append(ID)
+        propagate(ID)
+
+    segment_tree.propagate = counting_propagate
+    segment_tree.propagate_all()
+
+    # Only the tagged nodes covering 0..7 and the nodes below them are visited.
+    assert sorted(propagated) == [16, 17, 32, 33, 34, 35] + list(range(64, 72))
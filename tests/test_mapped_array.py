@@ -0,0 +1,85 @@
+import random
+
+import numpy
+import pytest
+
+from src.exceptions import CommandException
+from src.exports.query_functions.core_query_functions import add_f, gcd_f, min_f
+from src.segment_tree import SegmentTree
+from src.utils import Int64Values, map_array
+
+@pytest.fixture
+def raw_file(tmp_path):
+    values = random.Random(3).choices(range(-100, 101), k=37)
+    path = tmp_path / "values.bin"
+    numpy.array(values, dtype="<i8").tofile(path)
+    return str(path), values
+
+def test_map_array_rejects_bad_files(tmp_path):
+    (tmp_path / "odd.bin").write_bytes(b"123")
+    numpy.save(tmp_path / "floats.npy", numpy.array([1.5]))
+
+    for name in ("odd.bin", "floats.npy", "missing.bin"):
+        with pytest.raises(CommandException):
+            map_array(str(tmp_path / name))
+
+def test_npy_files_are_mapped(tmp_path):
+    numpy.save(tmp_path / "values.npy", numpy.array([4, -2, 7], dtype=numpy.int32))
+
+    assert SegmentTree(map_array(str(tmp_path / "values.npy")), add_f).query(0, 2) == 9
+
+@pytest.mark.parametrize("function", [add_f, min_f, gcd_f], ids=lambda function: function.name)
+def test_mapped_tree_keeps_int64_nodes(raw_file, function):
+    path, values = raw_file
+    segment_tree = SegmentTree(map_array(path), function)
+    reference = SegmentTree(list(values), function)
+
+    assert isinstance(segment_tree.data, Int64Values)
+    assert list(segment_tree.data) == reference.data
+    assert all(type(segment_tree.data[ID]) is int for ID in segment_tree.node_ids())
+
+def test_mapped_tree_takes_values_past_int64(raw_file):
+    path, values = raw_file
+    segment_tree = SegmentTree(map_array(path), add_f)
+    before = open(path, "rb").read()
+
+    segment_tree.update_element_no_lazy(3, 2**70)
+    segment_tree.update_segment_lazy(5, 0, 36)
+    values[3] = 2**70
+    values = [val + 5 for val in values]
+
+    assert segment_tree.query(0, 36) == sum(values)
+    assert segment_tree.query_many([0, 4], [36, 10]) == [sum(values), sum(values[4:11])]
+    assert [int(val) for val in segment_tree.array] == values
+    assert open(path, "rb").read() == before
+
+def test_mapped_tree_allocates_tags_on_first_range_update(raw_file):
+    path, values = raw_file
+    segment_tree = SegmentTree(map_array(path), add_f)
+
+    assert len(segment_tree.lazy_scale) == len(segment_tree.lazy_data) == 0
+    assert not any(segment_tree.node(ID).has_tag() for ID in segment_tree.node_ids())
+
+    segment_tree.affine_segment_lazy(2, 1, 4, 30)
+    segment_tree.affine_segment_lazy(-3, 0, 10, 12)
+    values = [2*val + 1 if 4 <= pos <= 30 else val for pos, val in enumerate(values)]
+    values = [-3*val if 10 <= pos <= 12 else val for pos, val in enumerate(values)]
+
+    assert len(segment_tree.lazy_scale) == segment_tree.capacity
+    assert segment_tree.query(0, 36) == sum(values)
+    assert segment_tree.array.tolist() == values
+
+    segment_tree.rebuild()
+    assert len(segment_tree.lazy_scale) == 0
+
+def test_int64_values_detach_on_overflow():
+    values = Int64Values(numpy.arange(4, dtype=numpy.int64))
+    values[1] = 5
+
+    assert type(values[1]) is int
+    assert numpy.asarray(values, dtype=numpy.int64).tolist() == [0, 5, 2, 3]
+
+    values[2] = -2**64
+    assert list(values) == [0, 5, -2**64, 3]
+    with pytest.raises(OverflowError):
+        numpy.asarray(values, dtype=numpy.int64)
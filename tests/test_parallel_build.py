@@ -0,0 +1,54 @@
+import random
+
+import numpy
+import pytest
+
+from src.exports.query_functions.core_query_functions import add_f, gcd_f, max_f, min_f, mul_f, xor_f
+from src.segment_tree import SegmentTree
+from src.utils import const, parallel_build, parallel_build_supported, shutdown_build_pool
+
+pytestmark = pytest.mark.skipif(not parallel_build_supported(), reason="building in parallel isn't supported here")
+
+@pytest.fixture(autouse=True)
+def build_everything_in_parallel(monkeypatch):
+    monkeypatch.setattr(const, "PARALLEL_BUILD_MIN_LENGTH", 1)
+    yield
+    shutdown_build_pool()
+
+@pytest.mark.parametrize("length", [1, 2, 5, 17, 1000])
+@pytest.mark.parametrize("function", [add_f, min_f, max_f, xor_f, gcd_f], ids=lambda function: function.name)
+def test_parallel_build_matches_serial_build(function, length):
+    rng = random.Random(20)
+    values = [rng.randint(-50, 50) for _ in range(length)]
+    serial = list(SegmentTree(list(values), function, build_workers=1).data)
+
+    for workers in (2, 3):
+        assert list(SegmentTree(list(values), function, build_workers=workers).data) == serial
+
+def test_parallel_build_of_a_numpy_array():
+    values = numpy.arange(-500, 500, dtype=numpy.int64)
+
+    segment_tree = SegmentTree(values, add_f, build_workers=2)
+    assert segment_tree.query(0, 999) == -500 and segment_tree.query(500, 999) == sum(range(500))
+
+def test_parallel_build_past_int64():
+    values = [3] * 200
+
+    assert list(SegmentTree(values, mul_f, build_workers=4).data) == list(SegmentTree(values, mul_f, build_workers=1).data)
+
+def test_rebuilds_reuse_the_workers():
+    segment_tree = SegmentTree(list(range(100)), add_f, build_workers=2)
+    pool = parallel_build._pool
+
+    segment_tree.update_element_no_lazy(7, 1000)
+    segment_tree.rebuild()
+    assert parallel_build._pool is pool
+    assert segment_tree.query(0, 99) == sum(range(100)) - 7 + 1000
+
+    segment_tree.switch_function(min_f)
+    segment_tree.rebuild()
+    assert parallel_build._pool is not pool
+    assert segment_tree.query(0, 99) == 0
+
+    shutdown_build_pool()
+    assert parallel_build._pool is None
@@ -0,0 +1,133 @@
+import random
+
+import pytest
+
+from src.app_state.states.tree_manager import TreeManager
+from src.exceptions import CommandException
+from src.exports.commands.config_cmd.persistent import persistent_cmd
+from src.exports.commands.config_cmd.query_fn import query_fn_cmd
+from src.exports.commands.tree_cmd.redo import redo_cmd
+from src.exports.commands.tree_cmd.set_array import set_array_cmd
+from src.exports.commands.tree_cmd.undo import undo_cmd
+from src.exports.query_functions.core_query_functions import add_f, max_f, min_f
+from src.segment_tree import SegmentTree
+
+def test_every_version_answers_its_queries():
+    rng = random.Random(12)
+    segment_tree = SegmentTree([rng.randint(-9, 9) for _ in range(20)], add_f)
+    segment_tree.enable_persistence()
+    history = [list(segment_tree.array)]
+
+    for _ in range(30):
+        low = rng.randrange(20)
+        high = rng.randrange(low, 20)
+        roll = rng.random()
+
+        if roll < 0.4:
+            segment_tree.update_element_no_lazy(low, rng.randint(-9, 9))
+        elif roll < 0.7:
+            segment_tree.update_segment_lazy(rng.randint(-5, 5), low, high)
+        else:
+            segment_tree.assign_segment_lazy(rng.randint(-5, 5), low, high)
+
+        history.append(list(segment_tree.array))
+
+    assert len(segment_tree.versions) == len(history)
+
+    for index, values in enumerate(history):
+        for _ in range(10):
+            low = rng.randrange(20)
+            high = rng.randrange(low, 20)
+            assert segment_tree.query_at(index, low, high) == sum(values[low:high+1])
+
+def test_checkout_restores_the_array_and_function():
+    segment_tree = SegmentTree([3, 1, 4], add_f)
+    segment_tree.enable_persistence()
+    segment_tree.insert(1, 5)
+    segment_tree.switch_function(min_f)
+    segment_tree.rebuild()
+
+    segment_tree.checkout(0)
+    assert segment_tree.array == [3, 1, 4] and segment_tree.query(0, 2) == 8
+
+    segment_tree.checkout(2)
+    assert segment_tree.array == [3, 5, 1, 4] and segment_tree.query(0, 3) == 1
+
+    # An update after a checkout drops the versions after it.
+    segment_tree.checkout(1)
+    segment_tree.update_element_no_lazy(0, 0)
+    assert len(segment_tree.versions) == 3 and segment_tree.version_index == 2
+
+def test_checkout_needs_persistence():
+    segment_tree = SegmentTree([1, 2], add_f)
+
+    with pytest.raises(CommandException):
+        segment_tree.checkout(0)
+
+    segment_tree.enable_persistence()
+    with pytest.raises(CommandException):
+        segment_tree.checkout(1)
+
+def test_undo_and_redo(app_state):
+    segment_tree = app_state.tree_manager.segment_tree
+    assert persistent_cmd.execute(["on"], app_state) is None
+    original = list(segment_tree.array)
+
+    assert set_array_cmd.execute(["4", "2", "7"], app_state) is None
+    assert undo_cmd.execute([], app_state) is None
+    assert segment_tree.array == original
+    assert undo_cmd.execute([], app_state) is not None
+
+    assert redo_cmd.execute([], app_state) is None
+    assert segment_tree.array == [4, 2, 7]
+    assert redo_cmd.execute([], app_state) is not None
+
+def test_no_version_for_an_unchanged_array(app_state):
+    segment_tree = app_state.tree_manager.segment_tree
+    persistent_cmd.execute(["on"], app_state)
+    values = [str(val) for val in segment_tree.array]
+    versions = len(segment_tree.versions)
+
+    assert set_array_cmd.execute(values, app_state) is None
+    assert len(segment_tree.versions) == versions
+
+    values[-1] = str(int(values[-1]) + 1)
+    assert set_array_cmd.execute(values, app_state) is None
+    assert len(segment_tree.versions) == versions + 1
+
+def test_no_version_for_a_rolled_back_function_switch(app_state):
+    segment_tree = app_state.tree_manager.segment_tree
+    persistent_cmd.execute(["on"], app_state)
+    big = str(2**5000)
+    assert set_array_cmd.execute([big, big, big], app_state) is None
+    versions = len(segment_tree.versions)
+
+    assert query_fn_cmd.execute(["mul_f"], app_state) is not None
+    assert len(segment_tree.versions) == versions
+    assert segment_tree.query(0, 2) == 3 * 2**5000
+
+def test_versions_of_different_functions():
+    segment_tree = SegmentTree([5, -2, 8], max_f)
+    segment_tree.enable_persistence()
+    segment_tree.switch_function(min_f)
+    segment_tree.rebuild()
+
+    assert segment_tree.query_at(0, 0, 2) == 8
+    assert segment_tree.query_at(1, 0, 2) == -2
+    assert segment_tree.versions[0].function is max_f
+
+def test_versions_saved_after_changing_the_modulus():
+    tree_manager = TreeManager([2, 3, 4])
+    tree_manager.set_modulus(7)
+    tree_manager.switch_function("add_mod")
+    segment_tree = tree_manager.segment_tree
+    segment_tree.rebuild()
+    segment_tree.enable_persistence()
+    segment_tree.update_element_no_lazy(0, 5)
+
+    # add_mod is replaced by a function of the same name computing modulo 11.
+    tree_manager.set_modulus(11)
+    segment_tree.update_element_no_lazy(1, 3)
+
+    assert segment_tree.query(0, 2) == 12 % 11
+    assert [segment_tree.query_at(index, 0, 2) for index in range(len(segment_tree.versions))] == [9 % 7, 12 % 7, 12 % 11, 12 % 11]
@@ -0,0 +1,54 @@
+import random
+from dataclasses import replace
+from functools import reduce
+
+import pytest
+
+from src.engines import FenwickTree
+from src.exceptions import CommandException
+from src.exports.query_functions import exported_core_query_functions, modular_query_functions
+from src.exports.query_functions.core_query_functions import add_f, max_f, mul_f, xor_f
+from src.segment_tree import SegmentTree
+from src.utils import QueryEngineEnum, verify_query_function
+
+@pytest.mark.parametrize("function", exported_core_query_functions + modular_query_functions(97), ids=lambda function: function.name)
+def test_declared_properties_hold(function):
+    assert verify_query_function(function) == []
+
+def test_verifier_rejects_a_wrong_identity():
+    assert verify_query_function(replace(add_f, identity=1)) == ["identity"]
+
+@pytest.mark.parametrize("function", [add_f, mul_f, xor_f], ids=lambda function: function.name)
+def test_empty_range_results_in_the_identity(function):
+    segment_tree = SegmentTree([3, 1, 4], function)
+
+    assert segment_tree.query(5, 9) == function.identity
+    assert segment_tree.query_many([2, -4], [1, -1]) == [function.identity] * 2
+
+def test_empty_range_without_identity_is_invalid():
+    segment_tree = SegmentTree([3, 1, 4], max_f)
+
+    assert segment_tree.query(5, 9) == max_f.invalid_query_val
+
+@pytest.mark.parametrize("function", [add_f, xor_f], ids=lambda function: function.name)
+def test_fenwick_tree_matches_brute_force(function):
+    rng = random.Random(4)
+    values = [rng.randint(-100, 100) for _ in range(50)]
+    fenwick_tree = FenwickTree(values, function.fn, function.inverse_fn, function.identity)
+
+    for _ in range(200):
+        pos, val = rng.randrange(50), rng.randint(-100, 100)
+        fenwick_tree.set(pos, val)
+        values[pos] = val
+
+        q_low = rng.randrange(50)
+        q_high = rng.randrange(q_low, 50)
+        assert fenwick_tree.query(q_low, q_high) == reduce(function.fn, values[q_low:q_high+1])
+
+    assert fenwick_tree.values() == values
+
+def test_fenwick_engine_needs_an_identity():
+    segment_tree = SegmentTree([1, 2, 3], replace(xor_f, identity=None))
+
+    with pytest.raises(CommandException):
+        segment_tree.set_engine(QueryEngineEnum.FENWICK)
@@ -0,0 +1,63 @@
+import random
+from functools import reduce
+
+import pytest
+
+from reference import midpoint_query
+from src.exports.commands.tree_cmd.query_many import query_many_cmd
+from src.exports.query_functions.core_query_functions import INT64_MAX, add_f, max_f, sub_f
+from src.segment_tree import SegmentTree
+from src.utils import TraversalEnum
+
+def random_ranges(rng: random.Random, length: int, count: int) -> tuple[list[int], list[int]]:
+    lows = [rng.randint(-3, length+2) for _ in range(count)]
+    highs = [rng.randint(low-2, length+4) for low in lows]
+    return lows, highs
+
+@pytest.mark.parametrize("traversal", list(TraversalEnum), ids=lambda traversal: traversal.value)
+@pytest.mark.parametrize("function", [add_f, max_f, sub_f], ids=lambda function: function.name)
+def test_query_many_matches_query(traversal, function):
+    rng = random.Random(7)
+    segment_tree = SegmentTree([rng.randint(-99, 99) for _ in range(50)], function)
+    segment_tree.traversal = traversal
+    lows, highs = random_ranges(rng, 50, 300)
+
+    assert segment_tree.query_many(lows, highs) == [segment_tree.query(q_low, q_high) for q_low, q_high in zip(lows, highs)]
+
+def test_query_many_past_int64():
+    values = [INT64_MAX, INT64_MAX, 1, -5]
+    segment_tree = SegmentTree(list(values), add_f)
+    segment_tree.traversal = TraversalEnum.ITERATIVE
+
+    assert segment_tree.query_many([0, 2, 1], [1, 3, 3]) == [2*INT64_MAX, -4, INT64_MAX-4]
+
+def test_query_many_with_pending_tags():
+    segment_tree = SegmentTree(list(range(20)), max_f)
+    segment_tree.traversal = TraversalEnum.ITERATIVE
+    segment_tree.update_segment_lazy(30, 4, 12)
+    values = [val + 30 if 4 <= val <= 12 else val for val in range(20)]
+
+    assert segment_tree.tagged_nodes
+    assert segment_tree.query_many([0, 13, 5], [19, 19, 9]) == [max(values), max(values[13:]), max(values[5:10])]
+
+def test_query_many_on_non_associative_function():
+    values = list(range(20))
+    segment_tree = SegmentTree(list(values), sub_f)
+
+    assert segment_tree.query_many([0, 5], [19, 9]) == [midpoint_query(sub_f.fn, values, 0, 19), midpoint_query(sub_f.fn, values, 5, 9)]
+
+def test_query_many_command(app_state, tmp_path):
+    segment_tree = app_state.tree_manager.segment_tree
+    values = list(segment_tree.array)
+    ranges = tmp_path / "ranges.txt"
+    ranges.write_text("0 4\n1 2\n3 3\n")
+
+    assert query_many_cmd.execute([str(ranges)], app_state) is None
+    assert (tmp_path / "ranges.txt.out").read_text().split() == [str(reduce(app_state.tree_manager.current_function.fn, values[low:high+1]))
+                                                                for low, high in ((0, 4), (1, 2), (3, 3))]
+
+def test_query_many_command_reports_bad_lines(app_state, tmp_path):
+    ranges = tmp_path / "ranges.txt"
+    ranges.write_text("0 4\nnot a range\n")
+
+    assert "Line 2" in str(query_many_cmd.execute([str(ranges), "-o", str(tmp_path / "out.txt")], app_state))
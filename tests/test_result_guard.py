@@ -0,0 +1,62 @@
+import pytest
+
+from src.dynamic_segment_tree import DynamicSegmentTree
+from src.exceptions import CommandException
+from src.exports.query_functions.core_query_functions import assign_product, lcm_f, mul_f, scale_product
+from src.segment_tree import SegmentTree
+from src.utils import const
+
+def test_power_range_functions_refuse_before_computing():
+    with pytest.raises(OverflowError):
+        assign_product(3, const.MAX_RESULT_BITS)
+    with pytest.raises(OverflowError):
+        scale_product(2**(const.MAX_RESULT_BITS-4), 3, 4)
+
+    assert assign_product(-2, 3) == -8
+    assert scale_product(5, 2, 3) == 40
+
+def test_aborted_range_update_keeps_values():
+    segment_tree = SegmentTree([2] * 1000, mul_f)
+
+    with pytest.raises(CommandException):
+        segment_tree.assign_segment_lazy(3**100, 0, 999)
+    with pytest.raises(CommandException):
+        segment_tree.affine_segment_lazy(2**20, 0, 0, 999)
+
+    assert list(segment_tree.array) == [2] * 1000
+    assert segment_tree.query(0, 999) == 2**1000
+
+def test_aborted_point_update_keeps_values():
+    segment_tree = SegmentTree([2**4000, 1, 1], mul_f)
+
+    with pytest.raises(CommandException):
+        segment_tree.update_element_no_lazy(2, 2**5000)
+
+    assert list(segment_tree.array) == [2**4000, 1, 1]
+    assert segment_tree.query(0, 2) == 2**4000
+
+def test_idempotent_assignment_is_not_refused():
+    segment_tree = SegmentTree([6] * 100, lcm_f)
+    segment_tree.assign_segment_lazy(2**200, 0, 99)
+
+    assert segment_tree.query(0, 99) == 2**200
+
+def test_sparse_tree_rolls_back_aborted_updates():
+    segment_tree = DynamicSegmentTree(10**6, 1, mul_f)
+    segment_tree.update_element_no_lazy(5, 2)
+    segment_tree.assign_segment_lazy(2, 0, 5000)
+    before = (dict(segment_tree.data), dict(segment_tree.uniform), dict(segment_tree.lazy_data), set(segment_tree.tagged_nodes))
+
+    updates = [
+        lambda: segment_tree.assign_segment_lazy(3, 0, 10**5),
+        lambda: segment_tree.update_many([1, 7000], [2**9000, 5]),
+        lambda: segment_tree.affine_segment_lazy(2**9, 0, 10, 90000),
+    ]
+
+    for update in updates:
+        with pytest.raises(CommandException):
+            update()
+
+        assert (segment_tree.data, segment_tree.uniform, segment_tree.lazy_data, segment_tree.tagged_nodes) == before
+
+    assert segment_tree.query(0, 10) == 2**11
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from reference import midpoint_node, midpoint_query
+from src.dataclass import Node
+from src.exports.query_functions import exported_core_query_functions
+from src.exports.query_functions.core_query_functions import add_f
+from src.segment_tree import SegmentTree
+
+# Powers grow too fast and remainders hit zero on random values.
+FUNCTIONS = [function for function in exported_core_query_functions if function.name not in ("exp_f", "mod_f")]
+
+@pytest.mark.parametrize("length", [1, 2, 3, 7, 8, 9, 100])
+def test_nodes_split_at_midpoints(length):
+    segment_tree = SegmentTree(list(range(length)), add_f)
+    IDs = list(segment_tree.node_ids())
+
+    assert IDs == sorted(IDs) and len(IDs) == 2*length - 1
+    assert all(segment_tree.leaf_ID[pos] in IDs and segment_tree.is_leaf(segment_tree.leaf_ID[pos]) for pos in range(length))
+
+    for ID in IDs:
+        low, high = segment_tree.low[ID], segment_tree.high[ID]
+        assert segment_tree.data[ID] == sum(range(low, high+1))
+
+        if not segment_tree.is_leaf(ID):
+            mid = (low+high) // 2
+            assert (segment_tree.low[2*ID], segment_tree.high[2*ID]) == (low, mid)
+            assert (segment_tree.low[2*ID+1], segment_tree.high[2*ID+1]) == (mid+1, high)
+
+    assert not segment_tree.has_node(0) and not segment_tree.has_node(segment_tree.capacity)
+
+def test_nodes_are_views_over_the_arrays():
+    segment_tree = SegmentTree([5, 1, 4], add_f)
+    root = segment_tree.root
+
+    assert root == segment_tree.node(1) and root.data == 10 and root.depth == 0
+    assert (root.low, root.high) == (0, 2)
+
+    segment_tree.update_element_no_lazy(1, 6)
+    assert root.data == 15 and segment_tree.node(2) == Node(segment_tree, 2)
+
+@pytest.mark.parametrize("function", FUNCTIONS, ids=lambda function: function.name)
+def test_queries_match_a_tree_built_from_scratch(function):
+    rng = random.Random(1)
+    values = [rng.randint(1, 12) for _ in range(23)]
+    segment_tree = SegmentTree(list(values), function)
+
+    assert segment_tree.root.data == midpoint_node(function.fn, values, 0, len(values)-1)
+
+    for _ in range(100):
+        if rng.random() < 0.3:
+            pos, val = rng.randrange(len(values)), rng.randint(1, 12)
+            segment_tree.update_element_no_lazy(pos, val)
+            values[pos] = val
+
+        q_low = rng.randrange(len(values))
+        q_high = rng.randrange(q_low, len(values))
+        assert segment_tree.query(q_low, q_high) == midpoint_query(function.fn, values, q_low, q_high)
+
+def test_empty_tree():
+    segment_tree = SegmentTree([], add_f)
+
+    assert segment_tree.array_length == 0 and list(segment_tree.node_ids()) == []
+    assert segment_tree.query(0, 3) == add_f.identity
@@ -0,0 +1,143 @@
+import random
+from functools import reduce
+
+import pytest
+
+from reference import midpoint_node
+from src.engines import ImplicitTreap
+from src.exceptions import CommandException
+from src.exports.commands.tree_cmd.extend import extend_cmd
+from src.exports.commands.tree_cmd.insert import insert_cmd
+from src.exports.commands.tree_cmd.remove import remove_cmd
+from src.exports.query_functions.core_query_functions import add_f, max_f, min_f, sub_f, xor_f
+from src.segment_tree import SegmentTree
+from src.utils import QueryEngineEnum
+
+def test_implicit_treap_matches_a_list():
+    rng = random.Random(5)
+
+    for _ in range(50):
+        values = [rng.randint(-50, 50) for _ in range(rng.randint(0, 20))]
+        treap = ImplicitTreap(values, lambda x, y: x + y)
+
+        for _ in range(60):
+            action = rng.random()
+
+            if action < 0.3:
+                pos = rng.randint(0, len(values))
+                inserted = [rng.randint(-9, 9) for _ in range(rng.randint(0, 4))]
+                treap.splice(pos, inserted)
+                values[pos:pos] = inserted
+            elif action < 0.5 and values:
+                pos = rng.randrange(len(values))
+                assert treap.remove(pos) == values.pop(pos)
+            elif action < 0.6 and values:
+                pos, val = rng.randrange(len(values)), rng.randint(-9, 9)
+                treap.set(pos, val)
+                values[pos] = val
+            elif values:
+                q_low = rng.randrange(len(values))
+                q_high = rng.randrange(q_low, len(values))
+                assert treap.query(q_low, q_high) == sum(values[q_low:q_high+1])
+
+            assert len(treap) == len(values)
+
+        assert treap.values() == values
+
+def test_sequence_engine_needs_an_associative_function():
+    with pytest.raises(CommandException):
+        SegmentTree([1, 2], sub_f).set_engine(QueryEngineEnum.SEQUENCE)
+
+@pytest.mark.parametrize("function", [add_f, min_f, max_f, xor_f], ids=lambda function: function.name)
+def test_sequence_engine_matches_brute_force(function):
+    rng = random.Random(3)
+    values = [rng.randint(-20, 20) for _ in range(25)]
+    segment_tree = SegmentTree(list(values), function)
+    segment_tree.set_engine(QueryEngineEnum.SEQUENCE)
+
+    for _ in range(200):
+        action = rng.random()
+        n = len(values)
+
+        if action < 0.25:
+            pos = rng.randint(-n-3, n+3)
+            inserted = [rng.randint(-9, 9) for _ in range(rng.randint(1, 3))]
+            segment_tree.splice(pos, inserted)
+            values[len(values[:pos]):len(values[:pos])] = inserted
+        elif action < 0.4 and n > 1:
+            pos = rng.randint(-n, n-1)
+            assert segment_tree.remove(pos) == values.pop(pos)
+        elif action < 0.55:
+            pos, val = rng.randrange(n), rng.randint(-9, 9)
+            segment_tree.update_element_no_lazy(pos, val)
+            values[pos] = val
+        else:
+            q_low = rng.randrange(n)
+            q_high = rng.randrange(q_low, n)
+            assert segment_tree.query(q_low, q_high) == reduce(function.fn, values[q_low:q_high+1])
+
+        assert segment_tree.array_length == len(values)
+
+    assert list(segment_tree.array) == values
+    assert segment_tree.root.data == midpoint_node(function.fn, values, 0, len(values)-1)
+
+def test_tree_is_rebuilt_when_looked_at():
+    segment_tree = SegmentTree([1, 2, 3], add_f)
+    segment_tree.set_engine(QueryEngineEnum.SEQUENCE)
+    segment_tree.insert(1, 10)
+    segment_tree.remove(-1)
+
+    assert [segment_tree.node(ID).data for ID in segment_tree.node_ids()] == [13, 11, 2, 1, 10]
+
+    segment_tree.set_engine(QueryEngineEnum.SEGMENT_TREE)
+    segment_tree.insert(0, 5)
+    assert list(segment_tree.array) == [5, 1, 10, 2] and segment_tree.query(0, 3) == 18
+
+@pytest.mark.parametrize("change", ["insert", "remove"])
+def test_switching_to_beats_after_a_length_change(change):
+    values = [1, 2, 3, 4, 5]
+    segment_tree = SegmentTree(list(values), add_f)
+    segment_tree.set_engine(QueryEngineEnum.SEQUENCE)
+
+    if change == "insert":
+        segment_tree.insert(0, 100)
+        values.insert(0, 100)
+    else:
+        segment_tree.remove(4)
+        values.pop(4)
+
+    segment_tree.set_engine(QueryEngineEnum.BEATS)
+    segment_tree.chmin_segment(3, 0, len(values) - 1)
+    values = [min(x, 3) for x in values]
+
+    assert segment_tree.query(0, len(values) - 1) == sum(values)
+    assert segment_tree.beats_fields(1)["sum"] == sum(values)
+    assert segment_tree.array == values
+
+def test_inserts_are_laid_out_once_when_drawn(app_state):
+    tree_manager = app_state.tree_manager
+    tree_manager.use_dense_tree(list(range(1000)))
+    segment_tree = tree_manager.segment_tree
+    segment_tree.set_engine(QueryEngineEnum.SEQUENCE)
+
+    builds = []
+    build = segment_tree._build
+
+    def counting_build():
+        builds.append(segment_tree.array_length)
+        build()
+
+    segment_tree._build = counting_build
+
+    for pos in range(10):
+        assert insert_cmd.execute([str(pos), str(2 * pos)], app_state) is None
+    assert remove_cmd.execute(["0"], app_state) is None
+    assert extend_cmd.execute(["7", "8", "-i", "3"], app_state) is None
+    assert not builds and segment_tree.layout_outdated
+
+    tree_manager.refresh_layout()
+    assert builds == [1011] and not segment_tree.layout_outdated
+    assert tree_manager.world_IDs.size == sum(1 for _ in segment_tree.node_ids())
+
+    tree_manager.refresh_layout()
+    assert builds == [1011]
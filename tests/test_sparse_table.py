@@ -0,0 +1,71 @@
+import random
+from dataclasses import replace
+from functools import reduce
+
+import numpy
+import pytest
+
+from src.engines import SparseTable
+from src.exceptions import CommandException
+from src.exports.query_functions.core_query_functions import INT64_MAX, add_f, and_f, gcd_f, lcm_f, max_f, min_f, or_f
+from src.segment_tree import SegmentTree
+from src.utils import QueryEngineEnum
+
+IDEMPOTENT = [min_f, max_f, and_f, or_f, gcd_f, lcm_f]
+
+@pytest.mark.parametrize("vectorized", [True, False], ids=["numpy", "python"])
+@pytest.mark.parametrize("function", IDEMPOTENT, ids=lambda function: function.name)
+def test_sparse_table_matches_brute_force(function, vectorized):
+    rng = random.Random(10)
+    values = [rng.randint(-30, 30) for _ in range(45)]
+    table = SparseTable(values, function.fn, function.vectorized_fn if vectorized else None)
+
+    lows = numpy.array([rng.randrange(45) for _ in range(200)], dtype=numpy.int64)
+    highs = numpy.array([rng.randint(low, 44) for low in lows.tolist()], dtype=numpy.int64)
+    expected = [reduce(function.fn, values[low:high+1]) for low, high in zip(lows.tolist(), highs.tolist())]
+
+    assert [table.query(low, high) for low, high in zip(lows.tolist(), highs.tolist())] == expected
+    assert table.query_many(lows, highs) == expected
+
+def test_sparse_table_past_int64():
+    values = [INT64_MAX, 3, 2**80, -2**90]
+    table = SparseTable(values, max_f.fn, max_f.vectorized_fn)
+
+    assert table.query(0, 1) == INT64_MAX and table.query(0, 3) == 2**80
+
+def test_query_many_with_results_past_int64():
+    values = [3000017, 3000029, 3000047]
+    table = SparseTable(values, lcm_f.fn, lcm_f.vectorized_fn)
+    lows = numpy.array([0, 0, 1, 2], dtype=numpy.int64)
+    highs = numpy.array([2, 1, 2, 2], dtype=numpy.int64)
+
+    expected = [reduce(lcm_f.fn, values[low:high+1]) for low, high in zip(lows.tolist(), highs.tolist())]
+    assert expected[0] > INT64_MAX
+    assert table.query_many(lows, highs) == expected
+
+    segment_tree = SegmentTree(list(values), lcm_f)
+    segment_tree.set_engine(QueryEngineEnum.SPARSE_TABLE)
+    assert segment_tree.query_many([0, 5], [2, 9]) == [expected[0], lcm_f.identity]
+
+def test_sparse_table_engine_follows_updates():
+    rng = random.Random(2)
+    values = [rng.randint(-30, 30) for _ in range(30)]
+    segment_tree = SegmentTree(list(values), min_f)
+    segment_tree.set_engine(QueryEngineEnum.SPARSE_TABLE)
+
+    for _ in range(50):
+        low = rng.randrange(30)
+        high = rng.randrange(low, 30)
+        if rng.random() < 0.5:
+            inc = rng.randint(-5, 5)
+            segment_tree.update_segment_lazy(inc, low, high)
+            values = [x + inc if low <= i <= high else x for i, x in enumerate(values)]
+        else:
+            assert segment_tree.query(low, high) == min(values[low:high+1])
+            assert segment_tree.query_many([low, -3], [high, 40]) == [min(values[low:high+1]), min(values)]
+
+def test_sparse_table_engine_needs_an_idempotent_function():
+    with pytest.raises(CommandException):
+        SegmentTree([1, 2], add_f).set_engine(QueryEngineEnum.SPARSE_TABLE)
+    with pytest.raises(CommandException):
+        SegmentTree([1, 2], replace(min_f, associative=False)).set_engine(QueryEngineEnum.SPARSE_TABLE)
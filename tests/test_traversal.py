@@ -0,0 +1,49 @@
+import random
+from functools import reduce
+
+import pytest
+
+from reference import midpoint_query
+from src.exports.query_functions.core_query_functions import add_f, avg_f, gcd_f, min_f, sub_f, xor_f
+from src.segment_tree import SegmentTree
+from src.utils import TraversalEnum
+
+@pytest.mark.parametrize("function", [add_f, min_f, xor_f, gcd_f], ids=lambda function: function.name)
+@pytest.mark.parametrize("length", [1, 2, 5, 64, 100])
+def test_iterative_traversal_matches_brute_force(function, length):
+    rng = random.Random(length)
+    values = [rng.randint(-50, 50) for _ in range(length)]
+    segment_tree = SegmentTree(list(values), function)
+    segment_tree.traversal = TraversalEnum.ITERATIVE
+
+    for _ in range(200):
+        pos, val = rng.randrange(length), rng.randint(-50, 50)
+        segment_tree.update_element_no_lazy(pos, val)
+        values[pos] = val
+
+        q_low = rng.randrange(length)
+        q_high = rng.randrange(q_low, length)
+        assert segment_tree.query(q_low, q_high) == reduce(function.fn, values[q_low:q_high+1])
+
+    segment_tree.traversal = TraversalEnum.RECURSIVE
+    assert segment_tree.root.data == reduce(function.fn, values)
+
+@pytest.mark.parametrize("function", [sub_f, avg_f], ids=lambda function: function.name)
+def test_non_associative_functions_keep_walking_the_tree(function):
+    rng = random.Random(2)
+    values = [rng.randint(-50, 50) for _ in range(37)]
+    segment_tree = SegmentTree(list(values), function)
+    segment_tree.traversal = TraversalEnum.ITERATIVE
+
+    for _ in range(100):
+        q_low = rng.randrange(37)
+        q_high = rng.randrange(q_low, 37)
+        assert segment_tree.query(q_low, q_high) == midpoint_query(function.fn, values, q_low, q_high)
+
+def test_iterative_query_clamps_to_the_array():
+    segment_tree = SegmentTree([4, 8, 15, 16], add_f)
+    segment_tree.traversal = TraversalEnum.ITERATIVE
+
+    assert segment_tree.query(-3, 1) == 12
+    assert segment_tree.query(2, 10) == 31
+    assert segment_tree.query(6, 9) == add_f.identity
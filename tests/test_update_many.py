@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from src.exports.commands.tree_cmd.replace_many import replace_many_cmd
+from src.exports.query_functions.core_query_functions import add_f, gcd_f, sub_f
+from src.segment_tree import SegmentTree
+
+@pytest.mark.parametrize("function", [add_f, gcd_f, sub_f], ids=lambda function: function.name)
+def test_update_many_matches_point_updates(function):
+    rng = random.Random(5)
+    values = [rng.randint(-40, 40) for _ in range(33)]
+    batched = SegmentTree(list(values), function)
+    one_by_one = SegmentTree(list(values), function)
+
+    for _ in range(30):
+        positions = [rng.randrange(33) for _ in range(rng.randint(1, 10))]
+        new_values = [rng.randint(-40, 40) for _ in positions]
+
+        batched.update_many(positions, new_values)
+        for pos, val in zip(positions, new_values):
+            one_by_one.update_element_no_lazy(pos, val)
+
+        assert batched.data == one_by_one.data
+
+def test_last_value_wins():
+    segment_tree = SegmentTree([0] * 6, add_f)
+    segment_tree.update_many([2, 4, 2], [5, 1, 9])
+
+    assert list(segment_tree.array) == [0, 0, 9, 0, 1, 0]
+    assert segment_tree.root.data == 10
+
+def test_update_many_below_pending_tags():
+    segment_tree = SegmentTree([1] * 8, add_f)
+    segment_tree.update_segment_lazy(10, 0, 7)
+    segment_tree.update_many([0, 5], [2, 3])
+
+    assert list(segment_tree.array) == [2, 11, 11, 11, 11, 3, 11, 11]
+    assert segment_tree.query(0, 7) == 71
+
+def test_replace_many_command(app_state):
+    segment_tree = app_state.tree_manager.segment_tree
+    expected = list(segment_tree.array)
+    expected[0], expected[3] = 7, -1
+
+    assert replace_many_cmd.execute(["0", "7", "3", "-1"], app_state) is None
+    assert list(segment_tree.array) == expected
+
+    assert replace_many_cmd.execute(["0", "7", "3"], app_state) is not None
+    assert replace_many_cmd.execute(["99", "1"], app_state) is not None
+    assert list(segment_tree.array) == expected
@@ -0,0 +1,46 @@
+import random
+from dataclasses import replace
+
+import numpy
+import pytest
+
+from src.exports.query_functions import exported_core_query_functions, modular_query_functions
+from src.exports.query_functions.core_query_functions import INT64_MAX, add_f, checked_add, checked_lcm, lcm_f
+from src.segment_tree import SegmentTree
+
+VECTORIZED = [function for function in exported_core_query_functions + modular_query_functions(1009) if function.vectorized_fn is not None]
+
+@pytest.mark.parametrize("function", VECTORIZED, ids=lambda function: function.name)
+@pytest.mark.parametrize("length", [1, 2, 3, 17, 1000])
+def test_vectorized_build_matches_python_build(function, length):
+    rng = random.Random(length)
+    # Small enough for the lcm of every value to stay within the result length budget.
+    values = [rng.randint(-1000, 1000) for _ in range(length)]
+
+    vectorized = SegmentTree(list(values), function)
+    python = SegmentTree(list(values), replace(function, vectorized_fn=None))
+
+    assert vectorized.data == python.data
+    assert all(type(val) is int for val in vectorized.data)
+
+@pytest.mark.parametrize("values", [[INT64_MAX, 1, 2], [-INT64_MAX-1, 5], [2**70, -3]])
+def test_build_falls_back_to_python_ints(values):
+    segment_tree = SegmentTree(list(values), add_f)
+
+    assert segment_tree.root.data == sum(values)
+
+def test_lcm_falls_back_past_int64():
+    values = [2**40 - 87, 2**40 - 75, 2**40 - 33]
+    segment_tree = SegmentTree(values, lcm_f)
+
+    assert segment_tree.query(0, 2) == lcm_f.fn(lcm_f.fn(values[0], values[1]), values[2])
+
+def test_checked_kernels_refuse_to_wrap():
+    big = numpy.array([INT64_MAX], dtype=numpy.int64)
+
+    with pytest.raises(OverflowError):
+        checked_add(big, numpy.array([1], dtype=numpy.int64))
+    with pytest.raises(OverflowError):
+        checked_lcm(big, numpy.array([2], dtype=numpy.int64))
+
+    assert checked_add(big, numpy.array([-1], dtype=numpy.int64)).tolist() == [INT64_MAX-1]
@@ -0,0 +1,129 @@
+import random
+
+import numpy
+import pytest
+
+from src.app_state.states.tree_manager import TreeManager
+from src.utils import const
+from src.window import pygame_window
+
+def dense_tree_manager(length: int) -> TreeManager:
+    tree_manager = TreeManager(list(range(length)))
+    tree_manager.generate_node_position()
+    return tree_manager
+
+def sparse_tree_manager(seed: int) -> TreeManager:
+    rng = random.Random(seed)
+    tree_manager = TreeManager([1])
+    tree_manager.use_sparse_tree(10**9, 0)
+
+    for _ in range(20):
+        tree_manager.segment_tree.update_element_no_lazy(rng.randrange(10**9), 1)
+
+    tree_manager.generate_node_position()
+    return tree_manager
+
+def random_camera(tree_manager: TreeManager, rng: random.Random):
+    camera = tree_manager.camera
+    camera.zoom_level = rng.choice([0.1, 0.3, 1, 2])
+    camera.x_offset = rng.randint(-int(tree_manager.world_x.max() * camera.zoom_level) - 100, 2000)
+    camera.y_offset = rng.randint(-int(tree_manager.world_y.max() * camera.zoom_level) - 100, 1000)
+
+def visible_by_brute_force(tree_manager: TreeManager, margin: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+    left, top = tree_manager.camera.to_world(-margin, -margin)
+    right, bottom = tree_manager.camera.to_world(pygame_window.window_width + margin, pygame_window.window_height + margin)
+    x, y, parents = tree_manager.world_x, tree_manager.world_y, tree_manager.world_parents
+
+    nodes = numpy.flatnonzero((x >= left) & (x <= right) & (y >= top) & (y <= bottom))
+    edges = numpy.flatnonzero((numpy.maximum(x, x[parents]) >= left) & (numpy.minimum(x, x[parents]) <= right)
+                              & (y >= top) & (y[parents] <= bottom) & (tree_manager.world_IDs > 1))
+    return nodes, edges
+
+TREES = [(dense_tree_manager, length) for length in (1, 2, 7, 100, 4097)] + [(sparse_tree_manager, seed) for seed in range(3)]
+TREE_IDS = [f"{build.__name__.split('_')[0]} {arg}" for build, arg in TREES]
+
+@pytest.mark.parametrize("build, arg", TREES, ids=TREE_IDS)
+def test_visible_nodes_match_brute_force(build, arg):
+    rng = random.Random(24)
+    tree_manager = build(arg)
+
+    for _ in range(40):
+        random_camera(tree_manager, rng)
+        nodes, edges = tree_manager.visible_nodes(200)
+        expected_nodes, expected_edges = visible_by_brute_force(tree_manager, 200)
+
+        assert numpy.array_equal(numpy.sort(nodes), expected_nodes)
+        assert numpy.array_equal(numpy.sort(edges), expected_edges)
+
+def test_visible_nodes_of_a_large_tree_are_bounded_by_the_window():
+    tree_manager = dense_tree_manager(1 << 16)
+    tree_manager.center_tree()
+
+    nodes, edges = tree_manager.visible_nodes(0)
+
+    assert 0 < len(nodes) < tree_manager.world_IDs.size // 100
+    assert len(edges) < tree_manager.world_IDs.size // 100
+
+def nearest_by_brute_force(tree_manager: TreeManager, x: int, y: int) -> set[int]:
+    reach = const.NODE_HIT_BOX_SIZE // 2
+    nearest: set[int] = set()
+    nearest_distance = None
+
+    for i, ID in enumerate(tree_manager.world_IDs.tolist()):
+        screen_x, screen_y = tree_manager.camera.to_screen(int(tree_manager.world_x[i]), int(tree_manager.world_y[i]))
+        if abs(screen_x - x) > reach or abs(screen_y - y) > reach:
+            continue
+
+        distance = (screen_x - x) ** 2 + (screen_y - y) ** 2
+        if nearest_distance is None or distance < nearest_distance:
+            nearest, nearest_distance = {ID}, distance
+        elif distance == nearest_distance:
+            nearest.add(ID)
+
+    return nearest
+
+@pytest.mark.parametrize("build, arg", TREES, ids=TREE_IDS)
+def test_node_at_matches_brute_force(build, arg):
+    rng = random.Random(25)
+    tree_manager = build(arg)
+
+    for _ in range(20):
+        camera = tree_manager.camera
+        camera.zoom_level = rng.choice([0.3, 0.6, 1, 1.5])
+        camera.x_offset = rng.randint(-3000, 500)
+        camera.y_offset = rng.randint(-500, 300)
+
+        for _ in range(20):
+            x, y = rng.randint(0, 800), rng.randint(0, 600)
+            expected = nearest_by_brute_force(tree_manager, x, y)
+            ID = tree_manager.node_at(x, y)
+
+            assert ID in expected if expected else ID is None
+
+def test_hovered_node_is_picked_again_only_when_something_moved():
+    tree_manager = dense_tree_manager(50)
+    segment_tree = tree_manager.segment_tree
+    ID = segment_tree.leaf_ID[20]
+    mouse_pos = tree_manager.camera.to_screen(segment_tree.original_x[ID], segment_tree.original_y[ID])
+
+    picks = []
+    node_at = tree_manager.node_at
+
+    def counting_node_at(x: int, y: int):
+        picks.append((x, y))
+        return node_at(x, y)
+
+    tree_manager.node_at = counting_node_at
+
+    for _ in range(5):
+        assert tree_manager.hovered_node(mouse_pos).ID == ID
+    assert len(picks) == 1
+
+    tree_manager.camera.move(1000, 0)
+    assert tree_manager.hovered_node(mouse_pos) is None
+    assert len(picks) == 2
+
+    tree_manager.camera.move(-1000, 0)
+    tree_manager.generate_node_position()
+    assert tree_manager.hovered_node(mouse_pos).ID == ID
+    assert len(picks) == 3
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from src.engines import WaveletMatrix
+from src.exceptions import CommandException
+from src.exports.query_functions.core_query_functions import add_f
+from src.segment_tree import SegmentTree
+
+@pytest.mark.parametrize("scale", [1, 10**20], ids=["small", "past int64"])
+def test_wavelet_matrix_matches_brute_force(scale):
+    rng = random.Random(17)
+    values = [rng.randint(-10, 10) * scale for _ in range(40)]
+    wavelet_matrix = WaveletMatrix(values)
+
+    for _ in range(200):
+        low = rng.randrange(40)
+        high = rng.randrange(low, 40)
+        ordered = sorted(values[low:high+1])
+        k = rng.randrange(len(ordered))
+        x = rng.randint(-12, 12) * scale
+
+        assert wavelet_matrix.kth_smallest(low, high, k) == ordered[k]
+        assert wavelet_matrix.count_less(low, high, x) == sum(val < x for val in ordered)
+
+def test_order_statistics_follow_updates():
+    rng = random.Random(17)
+    values = [rng.randint(-10, 10) for _ in range(30)]
+    segment_tree = SegmentTree(list(values), add_f)
+
+    for _ in range(100):
+        low = rng.randrange(30)
+        high = rng.randrange(low, 30)
+        roll = rng.random()
+
+        if roll < 0.2:
+            val = rng.randint(-10, 10)
+            segment_tree.update_element_no_lazy(low, val)
+            values[low] = val
+        elif roll < 0.4:
+            val = rng.randint(-3, 3)
+            segment_tree.update_segment_lazy(val, low, high)
+            values[low:high+1] = [x + val for x in values[low:high+1]]
+        else:
+            ordered = sorted(values[low:high+1])
+            k = rng.randint(1, len(ordered))
+            x = rng.randint(-12, 12)
+            assert segment_tree.kth_smallest(low, high, k) == ordered[k-1]
+            assert segment_tree.count_less(low, high, x) == sum(val < x for val in ordered)
+
+def test_order_statistics_out_of_range():
+    segment_tree = SegmentTree([4, 1, 3], add_f)
+
+    assert segment_tree.kth_smallest(-5, 10, 3) == 4
+    assert segment_tree.count_less(2, 1, 100) == 0
+
+    for k in (0, 4):
+        with pytest.raises(CommandException):
+            segment_tree.kth_smallest(0, 2, k)